@@ -1 +1,24 @@
-from .client import MySession
+"""
+FIX session.
+
+Sessions are imported on first use, i.e. the helper modules can be used
+(and tested) without importing the client (and roq).
+"""
+
+import importlib
+
+_EXPORTS = {
+    "MySession": ".client",
+    "MyBufferedSession": ".client",
+    "Engine": ".engine",
+    "Supervisor": ".supervisor",
+}
+
+__all__ = tuple(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
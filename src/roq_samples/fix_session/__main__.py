@@ -4,7 +4,7 @@
 Copyright (c) 2017-2026, Hans Erik Thrane
 """
 
-from . import MySession
+from . import MySession, MyBufferedSession, Engine, Supervisor
 
 if __name__ == "__main__":
     import argparse
@@ -25,25 +25,25 @@ if __name__ == "__main__":
     parser.add_argument(
         "--network_address",
         type=str,
-        required=True,
-        help="network address of a fix server (ipv4 or path)",
+        required=False,
+        help="network address of a fix server (host:port or path)",
     )
     parser.add_argument(
         "--sender_comp_id",
         type=str,
-        required=True,
+        required=False,
         help="sender component identifier",
     )
     parser.add_argument(
         "--target_comp_id",
         type=str,
-        required=True,
+        required=False,
         help="target component identifier",
     )
     parser.add_argument(
         "--username",
         type=str,
-        required=True,
+        required=False,
         help="username",
     )
     parser.add_argument(
@@ -52,13 +52,168 @@ if __name__ == "__main__":
         required=False,
         help="password",
     )
+    parser.add_argument(
+        "--sessions",
+        type=str,
+        required=False,
+        help="path of a JSON file listing sessions (all maintained by a single event loop)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        required=False,
+        default=1,
+        help="number of worker processes (--sessions), assigned by hash of sender_comp_id",
+    )
+    parser.add_argument(
+        "--metrics_address",
+        type=str,
+        required=False,
+        help="path of the unix socket used by workers to report metrics (--workers)",
+    )
+    parser.add_argument(
+        "--stats_interval",
+        type=float,
+        required=False,
+        default=60.0,
+        help="interval (seconds) between logging of session statistics and latencies",
+    )
+    parser.add_argument(
+        "--reconnect_delay",
+        type=float,
+        required=False,
+        default=0.1,
+        help="initial reconnect delay (seconds)",
+    )
+    parser.add_argument(
+        "--reconnect_delay_max",
+        type=float,
+        required=False,
+        default=30.0,
+        help="maximum reconnect delay (seconds)",
+    )
+    parser.add_argument(
+        "--store_dir",
+        type=str,
+        required=False,
+        help="directory persisting sequence numbers and outbound messages (one file per session)",
+    )
+    parser.add_argument(
+        "--reset_seq_num",
+        action="store_true",
+        help="start new FIX sessions, i.e. stored sequence numbers restart from 1 (--store_dir)",
+    )
+    parser.add_argument(
+        "--refdata_dir",
+        type=str,
+        required=False,
+        help="directory used to cache reference data (one file per target comp id)",
+    )
+    parser.add_argument(
+        "--journal",
+        type=str,
+        required=False,
+        help="path of a binary journal recording raw inbound and outbound messages",
+    )
+    parser.add_argument(
+        "--coalesce",
+        action="store_true",
+        help="coalesce outbound messages (one write per loop iteration), implied by --sessions",
+    )
+    parser.add_argument(
+        "--max_batch",
+        type=int,
+        required=False,
+        default=0,
+        help="flush coalesced messages when a session has queued this many (0 means no limit)",
+    )
+    parser.add_argument(
+        "--max_delay",
+        type=float,
+        required=False,
+        default=0.0,
+        help="maximum time a coalesced message waits to be flushed (seconds, 0 means no limit)",
+    )
+    parser.add_argument(
+        "--order_rate",
+        type=float,
+        required=False,
+        default=0.0,
+        help="maximum order requests per second per session (0 means no limit)",
+    )
+    parser.add_argument(
+        "--order_burst",
+        type=int,
+        required=False,
+        default=1,
+        help="order requests which may be sent back-to-back (--order_rate)",
+    )
+    parser.add_argument(
+        "--order_templates",
+        action="store_true",
+        help="send new orders using pre-encoded templates",
+    )
+    parser.add_argument(
+        "--write_buffer_high",
+        type=int,
+        required=False,
+        help="write buffer size (bytes) above which writing (and reading) is paused",
+    )
+    parser.add_argument(
+        "--write_buffer_low",
+        type=int,
+        required=False,
+        help="write buffer size (bytes) below which writing is resumed",
+    )
+    parser.add_argument(
+        "--max_queued",
+        type=int,
+        required=False,
+        default=1 << 22,
+        help="maximum bytes queued while writing is paused (disconnects if exceeded)",
+    )
+    parser.add_argument(
+        "--max_processing",
+        type=float,
+        required=False,
+        default=0.0,
+        help="pause reading when processing a read took longer (seconds, 0 disables)",
+    )
+    parser.add_argument(
+        "--buffered",
+        action="store_true",
+        help="read directly into a preallocated receive buffer (BufferedProtocol)",
+    )
 
     args = parser.parse_args()
 
+    single = ("network_address", "sender_comp_id", "target_comp_id", "username", "password")
+
+    if args.sessions is None:
+        for name in single[:-1]:
+            if getattr(args, name) is None:
+                parser.error(f"--{name} is required (unless --sessions is used)")
+
     import logging
 
     logging.basicConfig(level=args.loglevel.upper())
 
     del args.loglevel
 
-    MySession.main(**vars(args))
+    if args.sessions is not None:
+        for name in single:
+            delattr(args, name)
+        del args.coalesce
+
+    if args.sessions is not None and args.workers > 1:
+        Supervisor.main(**vars(args))
+    else:
+        session_class = MyBufferedSession if args.buffered else MySession
+        del args.buffered
+        del args.workers
+        del args.metrics_address
+        if args.sessions is None:
+            del args.sessions
+            session_class.main(**vars(args))
+        else:
+            Engine.main(session_class=session_class, **vars(args))
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Reconnect delays
+"""
+
+import random
+
+
+class Backoff:
+    """
+    Exponential backoff with (full) jitter.
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.1,
+        maximum: float = 30.0,
+    ):
+        """
+        Constructor.
+        """
+
+        self.initial = initial
+        self.maximum = maximum
+        self.attempt = 0
+
+    def reset(self):
+        """
+        Reset after a successful connection.
+        """
+
+        self.attempt = 0
+
+    def next(self) -> float:
+        """
+        Delay (seconds) before the next attempt.
+        """
+
+        upper = min(self.maximum, self.initial * (1 << min(self.attempt, 32)))
+        self.attempt += 1
+        return random.uniform(self.initial, max(self.initial, upper))
@@ -0,0 +1,786 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Micro-benchmarks for the FIX session layer
+"""
+
+import array
+import asyncio
+import os
+import random
+import socket
+import tempfile
+import time
+
+from datetime import datetime, timedelta
+
+from fastcore.all import typedispatch
+
+import roq
+
+from .book import Books
+from .client import Client, MySession
+from .clock import SessionClock
+from .engine import Engine
+from .framing import FrameBuffer
+from .sender import SendScheduler
+from .timer import TimerWheel
+
+
+def _encode_stream(messages: int) -> bytes:
+    """
+    Encode a stream of messages as if received from a fix server.
+    """
+
+    encoder = roq.codec.fix.Encoder(
+        sender_comp_id="server",
+        target_comp_id="client",
+    )
+    now = datetime.now()
+    return b"".join(
+        encoder.encode(
+            roq.codec.fix.Heartbeat(
+                test_req_id=f"test_req_id_{i}",
+            ),
+            now,
+        )
+        for i in range(messages)
+    )
+
+
+def _split(data: bytes, chunk_size: int):
+    """
+    Split a stream into reads of (at most) chunk_size bytes.
+    """
+
+    return [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+def _report(name: str, messages: int, elapsed: float):
+    rate = messages / elapsed
+    print(f"{name:<24} messages={messages:<10} elapsed={elapsed:.3f}s rate={rate:,.0f} msg/s")
+
+
+def framing(messages: int, chunk_size: int):
+    """
+    Compare the (previous) bytearray re-slicing with the FrameBuffer.
+    """
+
+    chunks = _split(_encode_stream(messages), chunk_size)
+
+    count = 0
+
+    def callback(header, message):  # pylint: disable=unused-argument
+        nonlocal count
+        count += 1
+
+    # previous implementation
+
+    decoder = roq.codec.fix.Decoder()
+    decode_buffer = bytearray()
+    start = time.perf_counter()
+    for data in chunks:
+        decode_buffer += data
+        while True:
+            length = decoder.dispatch(callback, bytes(decode_buffer))
+            if length == 0:
+                break
+            if length > 0:
+                decode_buffer = decode_buffer[length:]
+            if len(decode_buffer) == 0:
+                break
+    _report("bytearray", count, time.perf_counter() - start)
+
+    # current implementation
+
+    count = 0
+    decoder = roq.codec.fix.Decoder()
+    decode_buffer = FrameBuffer()
+    start = time.perf_counter()
+    for data in chunks:
+        decode_buffer.append(data)
+        decode_buffer.dispatch(decoder, callback)
+    _report("frame_buffer", count, time.perf_counter() - start)
+
+
+def dispatch(messages: int):
+    """
+    Compare per-message dispatch cost of @typedispatch and the DispatchTable.
+    """
+
+    decoded = []
+
+    def callback(header, message):
+        decoded.append((header, message))
+
+    decode_buffer = FrameBuffer()
+    decode_buffer.append(_encode_stream(messages))
+    decode_buffer.dispatch(roq.codec.fix.Decoder(), callback)
+
+    session = MySession(
+        sender_comp_id="client",
+        target_comp_id="server",
+        username="username",
+        password="password",
+    )
+
+    start = time.perf_counter()
+    for header, message in decoded:
+        session._callback(header, message)  # pylint: disable=protected-access
+    _report("typedispatch", len(decoded), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for header, message in decoded:
+        session._dispatch(header, message)  # pylint: disable=protected-access
+    _report("dispatch_table", len(decoded), time.perf_counter() - start)
+
+
+class _Transport:
+    """
+    Loopback transport (the peer responds immediately).
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.messages = 0
+
+    def write(self, data):  # pylint: disable=unused-argument
+        """
+        Count the message, the response is received immediately.
+        """
+
+        self.messages += 1
+        self.session.last_received = self.session.timer_wheel.tick
+
+    def close(self):
+        """
+        Nothing to close.
+        """
+
+
+class _CallLaterSession(MySession):
+    """
+    One loop.call_later handle per session.
+    """
+
+    def _schedule_timer(self, ticks):
+        if self.timer is not None:
+            self.timer.cancel()
+        delay = ticks * self.timer_wheel.resolution
+        self.timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+
+def timers(sessions: int, heart_bt_int: float, duration: float):
+    """
+    Heartbeat management for idle sessions.
+    """
+
+    async def run(session_class):
+        loop = asyncio.get_running_loop()
+        timer_wheel = TimerWheel(loop)
+        timer_wheel.schedule(2 * duration, lambda: None)  # keep the clock ticking
+        transports = []
+        for i in range(sessions):
+            session = session_class(
+                sender_comp_id=f"client_{i}",
+                target_comp_id="server",
+                username="username",
+                password="password",
+                timer_wheel=timer_wheel,
+            )
+            transport = _Transport(session)
+            session.prepare()
+            session.connection_made(transport)
+            session._start_heartbeat(heart_bt_int)  # pylint: disable=protected-access
+            transports.append(transport)
+        start = time.process_time()
+        await asyncio.sleep(duration)
+        elapsed = time.process_time() - start
+        timer_wheel.close()
+        messages = sum(transport.messages for transport in transports)
+        print(
+            f"{session_class.__name__:<24} sessions={sessions:<6} messages={messages:<10} "
+            f"cpu={elapsed:.3f}s ({100.0 * elapsed / duration:.2f}%)"
+        )
+
+    asyncio.run(run(MySession))
+    asyncio.run(run(_CallLaterSession))
+
+
+class _Acceptor(asyncio.Protocol):
+    """
+    Minimal fix server: responds to Logon and TestRequest.
+    """
+
+    transports = []
+
+    def __init__(self):
+        self.transport = None
+        self.encoder = None
+        self.decoder = roq.codec.fix.Decoder()
+        self.decode_buffer = FrameBuffer()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.transports.append(transport)
+
+    def data_received(self, data):
+        self.decode_buffer.append(data)
+        self.decode_buffer.dispatch(self.decoder, self._callback)
+
+    def _callback(self, header, message):
+        if isinstance(message, roq.codec.fix.TestRequest):
+            response = roq.codec.fix.Heartbeat(
+                test_req_id=message.test_req_id,
+            )
+        elif isinstance(message, roq.codec.fix.Logon):
+            self.encoder = roq.codec.fix.Encoder(
+                sender_comp_id="server",
+                target_comp_id=header.sender_comp_id,
+            )
+            response = roq.codec.fix.Logon(
+                heart_bt_int=timedelta(seconds=30),
+                username="",
+                password="",
+                encrypt_method=roq.fix.EncryptMethod.NONE,
+            )
+        else:
+            return
+        self.transport.write(self.encoder.encode(response, datetime.now()))
+
+
+class _PingSession(Client):
+    """
+    Keeps one TestRequest outstanding and measures round-trip latency.
+    """
+
+    latencies = []
+
+    def connection_made(self, transport):
+        super().connection_made(transport)
+        logon = roq.codec.fix.Logon(
+            heart_bt_int=timedelta(seconds=30),
+            username=self.username,
+            password=self.password,
+            encrypt_method=roq.fix.EncryptMethod.NONE,
+        )
+        self._send(logon)
+
+    def _ping(self):
+        test_request = roq.codec.fix.TestRequest(
+            test_req_id=str(time.perf_counter_ns()),
+        )
+        self._send(test_request)
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        logon: roq.codec.fix.Logon,
+    ):
+        self._start_heartbeat(logon.heart_bt_int)
+        self._ping()
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        heartbeat: roq.codec.fix.Heartbeat,
+    ):
+        if len(heartbeat.test_req_id) > 0:
+            self.latencies.append(time.perf_counter_ns() - int(heartbeat.test_req_id))
+            self._ping()
+
+
+def _percentile(values, percentile: float):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile / 100.0))]
+
+
+def engine(sessions: list, duration: float):
+    """
+    Aggregate throughput and latency when many sessions share one event loop.
+    """
+
+    async def run(count, path):
+        loop = asyncio.get_running_loop()
+        server = await loop.create_unix_server(_Acceptor, path=path)
+        _PingSession.latencies = []
+        instance = Engine(
+            loop,
+            _PingSession,
+            [
+                {
+                    "network_address": path,
+                    "sender_comp_id": f"client_{i}",
+                    "target_comp_id": "server",
+                    "username": "username",
+                    "password": "password",
+                }
+                for i in range(count)
+            ],
+            stats_interval=0,
+        )
+        task = asyncio.ensure_future(instance.run())
+        await asyncio.sleep(duration)
+        messages = sum(stats.messages_received for stats in instance.stats.values())
+        latencies = list(_PingSession.latencies)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        server.close()
+        for transport in _Acceptor.transports:
+            transport.close()
+        _Acceptor.transports = []
+        await asyncio.sleep(0.1)
+        print(
+            f"sessions={count:<6} messages={messages:<10} rate={messages / duration:,.0f} msg/s "
+            f"p50={_percentile(latencies, 50) / 1000.0:.1f}us "
+            f"p99={_percentile(latencies, 99) / 1000.0:.1f}us"
+        )
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i, count in enumerate(sessions):
+            asyncio.run(run(count, os.path.join(directory, f"fix-{i}.sock")))
+
+
+def _new_order_single():
+    return roq.codec.fix.NewOrderSingle(
+        cl_ord_id="cl_ord_id_1",
+        account="A1",
+        symbol="BTC-PERPETUAL",
+        security_exchange="deribit",
+        side=roq.fix.Side.BUY,
+        transact_time=datetime.now(),
+        order_qty=1,
+        ord_type=roq.fix.OrdType.LIMIT,
+        price=10000,
+        time_in_force=roq.fix.TimeInForce.GTC,
+    )
+
+
+def encoding(messages: int):
+    """
+    Encoding throughput using datetime.now() and the cached session clock.
+    """
+
+    encoder = roq.codec.fix.Encoder(
+        sender_comp_id="client",
+        target_comp_id="server",
+    )
+    new_order_single = _new_order_single()
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        encoder.encode(new_order_single, datetime.now())
+    _report("datetime.now", messages, time.perf_counter() - start)
+
+    clock = SessionClock()
+    start = time.perf_counter()
+    for _ in range(messages):
+        encoder.encode(new_order_single, clock.now())
+    _report("session_clock", messages, time.perf_counter() - start)
+    print(f"{'':<24} refreshes={clock.refreshes}")
+
+
+def templates(messages: int):
+    """
+    Encode orders using the encoder and using a pre-encoded template (also followed by a cancel).
+    """
+
+    session = Client(
+        sender_comp_id="client",
+        target_comp_id="server",
+        username="username",
+        password="password",
+        clock=SessionClock(),
+    )
+
+    start = time.perf_counter()
+    for i in range(messages):
+        new_order_single = roq.codec.fix.NewOrderSingle(
+            cl_ord_id=f"cl_ord_id_{i}",
+            account="A1",
+            symbol="BTC-PERPETUAL",
+            security_exchange="deribit",
+            side=roq.fix.Side.BUY,
+            transact_time=datetime.now(),
+            order_qty=1,
+            ord_type=roq.fix.OrdType.LIMIT,
+            price=10000 + i % 100,
+            time_in_force=roq.fix.TimeInForce.GTC,
+        )
+        session._encode(new_order_single)  # pylint: disable=protected-access
+    _report("encoder", messages, time.perf_counter() - start)
+
+    template = session._get_order_template(  # pylint: disable=protected-access
+        "A1",
+        "deribit",
+        "BTC-PERPETUAL",
+        roq.fix.Side.BUY,
+    )
+    encode_order = session._encode_order  # pylint: disable=protected-access
+    start = time.perf_counter()
+    for i in range(messages):
+        encode_order(template, f"cl_ord_id_{i}", 10000 + i % 100, 1)
+    _report("template", messages, time.perf_counter() - start)
+
+    # note! includes the cost of the encoder's messages following template orders
+    # (MsgSeqNum is patched)
+    encode = session._encode  # pylint: disable=protected-access
+    start = time.perf_counter()
+    for i in range(messages):
+        encode_order(template, f"cl_ord_id_{i}", 10000 + i % 100, 1)
+        order_cancel_request = roq.codec.fix.OrderCancelRequest(
+            cl_ord_id=f"cancel_{i}",
+            orig_cl_ord_id=f"cl_ord_id_{i}",
+            account="A1",
+            symbol="BTC-PERPETUAL",
+            security_exchange="deribit",
+            side=roq.fix.Side.BUY,
+            transact_time=datetime.now(),
+        )
+        encode(order_cancel_request)
+    _report("template+cancel", messages, time.perf_counter() - start)
+
+
+def _incremental_stream(messages: int, entries: int, levels: int):
+    """
+    Random walk of price level updates around a moving mid price.
+    """
+
+    rng = random.Random(1)
+    bid, offer = roq.fix.MDEntryType.BID, roq.fix.MDEntryType.OFFER
+    mid = 10000
+    stream = []
+    for _ in range(messages):
+        move = rng.choice((-1, 0, 0, 1))
+        mid += move
+        no_md_entries = []
+        if move != 0:  # remove the level which would otherwise cross
+            no_md_entries.append(
+                roq.codec.fix.MDInc(
+                    md_update_action=roq.fix.MDUpdateAction.DELETE,
+                    md_entry_type=offer if move > 0 else bid,
+                    symbol="BTC-PERPETUAL",
+                    md_entry_px=float(mid),
+                    md_entry_size=0.0,
+                )
+            )
+        for _ in range(entries):
+            offset = 1 + int(rng.expovariate(3.0 / levels))
+            is_bid = rng.random() < 0.5
+            delete = rng.random() < 0.3
+            action = roq.fix.MDUpdateAction.DELETE if delete else roq.fix.MDUpdateAction.CHANGE
+            no_md_entries.append(
+                roq.codec.fix.MDInc(
+                    md_update_action=action,
+                    md_entry_type=bid if is_bid else offer,
+                    symbol="BTC-PERPETUAL",
+                    md_entry_px=float(mid - offset if is_bid else mid + offset),
+                    md_entry_size=0.0 if delete else float(rng.randint(1, 100)),
+                )
+            )
+        stream.append(roq.codec.fix.MarketDataIncrementalRefresh(no_md_entries=no_md_entries))
+    return stream
+
+
+def book(messages: int, entries: int, levels: int, depth: int):
+    """
+    Apply a stream of incremental refreshes and query the top of the book.
+    """
+
+    stream = _incremental_stream(messages, entries, levels)
+    books = Books()
+
+    start = time.perf_counter()
+    for market_data_incremental_refresh in stream:
+        books.incremental(market_data_incremental_refresh)
+    updates = sum(len(message.no_md_entries) for message in stream)
+    _report("incremental", updates, time.perf_counter() - start)
+
+    instrument = books.get("BTC-PERPETUAL")
+    prices = array.array("d", bytes(8 * depth))
+    sizes = array.array("d", bytes(8 * depth))
+    start = time.perf_counter()
+    for _ in range(messages):
+        instrument.bids.top(depth, prices, sizes)
+        instrument.asks.top(depth, prices, sizes)
+    _report("top", 2 * messages, time.perf_counter() - start)
+    print(f"{'':<24} bids={len(instrument.bids)} asks={len(instrument.asks)} {instrument}")
+
+
+class _Sink(asyncio.Protocol):
+    """
+    Counts received bytes.
+    """
+
+    def __init__(self, expected: int, done):
+        self.expected = expected
+        self.received = 0
+        self.done = done
+
+    def data_received(self, data):
+        self.received += len(data)
+        if self.received >= self.expected and not self.done.done():
+            self.done.set_result(None)
+
+
+class _CountingTransport:
+    """
+    Counts the writes made through a transport.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.writes = 0
+
+    def write(self, data):
+        """
+        Count and forward a write.
+        """
+
+        self.writes += 1
+        self.transport.write(data)
+
+    def writelines(self, list_of_data):
+        """
+        Count and forward a write of several buffers.
+        """
+
+        self.writes += 1
+        self.transport.writelines(list_of_data)
+
+    def is_closing(self):
+        """
+        State of the underlying transport.
+        """
+
+        return self.transport.is_closing()
+
+
+def coalescing(orders: int, burst: int, max_batch: int):
+    """
+    Orders per second when sending bursts of orders, with and without coalescing.
+    """
+
+    async def run(name, coalesce):
+        loop = asyncio.get_running_loop()
+        session = Client(
+            sender_comp_id="client",
+            target_comp_id="server",
+            username="username",
+            password="password",
+            send_scheduler=SendScheduler(loop, max_batch) if coalesce else None,
+        )
+        new_order_single = _new_order_single()
+        expected = orders * len(session.encoder.encode(new_order_single, datetime.now()))
+        local, remote = socket.socketpair()
+        done = loop.create_future()
+        sink = _Sink(expected, done)
+        sink_transport, _ = await loop.create_unix_connection(lambda: sink, sock=remote)
+        transport, _ = await loop.create_unix_connection(lambda: session, sock=local)
+        counting = _CountingTransport(transport)
+        session.transport = counting
+        start = time.perf_counter()
+        for _ in range(orders // burst):
+            for _ in range(burst):
+                session._send(new_order_single)  # pylint: disable=protected-access
+            await asyncio.sleep(0)
+        await asyncio.wait_for(done, 60.0)
+        elapsed = time.perf_counter() - start
+        transport.close()
+        sink_transport.close()
+        print(
+            f"{name:<24} orders={orders:<10} burst={burst:<6} writes={counting.writes:<10} "
+            f"elapsed={elapsed:.3f}s rate={orders / elapsed:,.0f} orders/s"
+        )
+
+    orders -= orders % burst
+    asyncio.run(run("write", False))
+    asyncio.run(run("coalesce", True))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="FIX Session (BENCHMARK)",
+        description="Micro-benchmarks for the FIX session layer",
+    )
+
+    subparsers = parser.add_subparsers(
+        dest="benchmark",
+        required=True,
+    )
+
+    parser_framing = subparsers.add_parser(
+        "framing",
+        help="decode messages from a stream of reads",
+    )
+    parser_framing.add_argument(
+        "--messages",
+        type=int,
+        required=False,
+        default=100000,
+        help="number of messages",
+    )
+    parser_framing.add_argument(
+        "--chunk_size",
+        type=int,
+        required=False,
+        default=65536,
+        help="number of bytes per read",
+    )
+
+    parser_dispatch = subparsers.add_parser(
+        "dispatch",
+        help="route decoded messages to the session callbacks",
+    )
+    parser_dispatch.add_argument(
+        "--messages",
+        type=int,
+        required=False,
+        default=100000,
+        help="number of messages",
+    )
+
+    parser_timers = subparsers.add_parser(
+        "timers",
+        help="heartbeat management for idle sessions",
+    )
+    parser_timers.add_argument(
+        "--sessions",
+        type=int,
+        required=False,
+        default=1000,
+        help="number of sessions",
+    )
+    parser_timers.add_argument(
+        "--heart_bt_int",
+        type=float,
+        required=False,
+        default=1.0,
+        help="heartbeat interval (seconds)",
+    )
+    parser_timers.add_argument(
+        "--duration",
+        type=float,
+        required=False,
+        default=10.0,
+        help="duration (seconds)",
+    )
+
+    parser_engine = subparsers.add_parser(
+        "engine",
+        help="many sessions sharing one event loop",
+    )
+    parser_engine.add_argument(
+        "--sessions",
+        type=int,
+        nargs="+",
+        required=False,
+        default=[1, 10, 100, 500],
+        help="number of sessions (one run per value)",
+    )
+    parser_engine.add_argument(
+        "--duration",
+        type=float,
+        required=False,
+        default=10.0,
+        help="duration (seconds) per run",
+    )
+
+    parser_encoding = subparsers.add_parser(
+        "encoding",
+        help="encode orders using datetime.now() and the cached session clock",
+    )
+    parser_encoding.add_argument(
+        "--messages",
+        type=int,
+        required=False,
+        default=100000,
+        help="number of messages",
+    )
+
+    parser_templates = subparsers.add_parser(
+        "templates",
+        help="encode orders using the encoder and using a pre-encoded template",
+    )
+    parser_templates.add_argument(
+        "--messages",
+        type=int,
+        required=False,
+        default=100000,
+        help="number of messages",
+    )
+
+    parser_book = subparsers.add_parser(
+        "book",
+        help="maintain a price-level book from incremental refreshes",
+    )
+    parser_book.add_argument(
+        "--messages",
+        type=int,
+        required=False,
+        default=100000,
+        help="number of messages",
+    )
+    parser_book.add_argument(
+        "--entries",
+        type=int,
+        required=False,
+        default=4,
+        help="number of updates per message",
+    )
+    parser_book.add_argument(
+        "--levels",
+        type=int,
+        required=False,
+        default=100,
+        help="typical number of price levels per side",
+    )
+    parser_book.add_argument(
+        "--depth",
+        type=int,
+        required=False,
+        default=10,
+        help="number of levels returned by the top of book query",
+    )
+
+    parser_coalescing = subparsers.add_parser(
+        "coalescing",
+        help="send bursts of orders with and without write coalescing",
+    )
+    parser_coalescing.add_argument(
+        "--orders",
+        type=int,
+        required=False,
+        default=100000,
+        help="number of orders",
+    )
+    parser_coalescing.add_argument(
+        "--burst",
+        type=int,
+        required=False,
+        default=10,
+        help="number of orders sent per loop iteration",
+    )
+    parser_coalescing.add_argument(
+        "--max_batch",
+        type=int,
+        required=False,
+        default=0,
+        help="flush when this many orders have been queued (0 means no limit)",
+    )
+
+    args = parser.parse_args()
+
+    benchmark = globals()[args.benchmark]
+
+    del args.benchmark
+
+    benchmark(**vars(args))
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Price-level order books maintained from market data refresh messages
+"""
+
+import array
+import bisect
+
+import roq
+
+
+class Levels:
+    """
+    One side of a price-level book.
+
+    Prices and sizes are kept in preallocated arrays sorted by price (ascending).
+    The best bid is the last element and the best ask is the first element.
+    Levels are located by binary search and inserted/removed by moving the
+    tail of the arrays (memmove). Capacity doubles when full.
+    """
+
+    def __init__(self, is_bid: bool, capacity: int = 256):
+        """
+        Constructor.
+        """
+
+        self.is_bid = is_bid
+        self.count = 0
+        self.prices = None
+        self.sizes = None
+        self.prices_view = None
+        self.sizes_view = None
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        prices = array.array("d", bytes(8 * capacity))
+        sizes = array.array("d", bytes(8 * capacity))
+        if self.count:
+            memoryview(prices)[: self.count] = memoryview(self.prices)[: self.count]
+            memoryview(sizes)[: self.count] = memoryview(self.sizes)[: self.count]
+        self.prices = prices
+        self.sizes = sizes
+        self.prices_view = memoryview(prices)
+        self.sizes_view = memoryview(sizes)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        """
+        Remove all levels.
+        """
+
+        self.count = 0
+
+    def update(self, price: float, size: float):
+        """
+        Set the size of a price level (zero size removes the level).
+        """
+
+        count = self.count
+        prices = self.prices
+        index = bisect.bisect_left(prices, price, 0, count)
+        if index < count and prices[index] == price:
+            if size > 0.0:
+                self.sizes[index] = size
+            else:
+                self.prices_view[index : count - 1] = self.prices_view[index + 1 : count]
+                self.sizes_view[index : count - 1] = self.sizes_view[index + 1 : count]
+                self.count = count - 1
+            return
+        if size <= 0.0:
+            return
+        if count == len(prices):
+            self._allocate(2 * count)
+            prices = self.prices
+        self.prices_view[index + 1 : count + 1] = self.prices_view[index:count]
+        self.sizes_view[index + 1 : count + 1] = self.sizes_view[index:count]
+        prices[index] = price
+        self.sizes[index] = size
+        self.count = count + 1
+
+    def top(self, depth: int, prices, sizes) -> int:
+        """
+        Copy (at most) depth levels, best first, into the (preallocated) output arrays.
+        The outputs must support the buffer protocol (e.g. array.array("d")).
+        Returns the number of levels copied.
+        """
+
+        depth = min(depth, self.count, len(prices))
+        if depth == 0:
+            return 0
+        with memoryview(prices) as prices_out, memoryview(sizes) as sizes_out:
+            if self.is_bid:
+                begin = self.count - depth
+                prices_out[:depth] = self.prices_view[begin : self.count][::-1]
+                sizes_out[:depth] = self.sizes_view[begin : self.count][::-1]
+            else:
+                prices_out[:depth] = self.prices_view[:depth]
+                sizes_out[:depth] = self.sizes_view[:depth]
+        return depth
+
+    def best(self):
+        """
+        Best (price, size) or None.
+        """
+
+        if self.count == 0:
+            return None
+        index = self.count - 1 if self.is_bid else 0
+        return self.prices[index], self.sizes[index]
+
+
+class Book:
+    """
+    Price-level book for an instrument.
+    """
+
+    def __init__(self, symbol: str, capacity: int = 256):
+        """
+        Constructor.
+        """
+
+        self.symbol = symbol
+        self.bids = Levels(True, capacity)
+        self.asks = Levels(False, capacity)
+
+    def __repr__(self):
+        return f"symbol={self.symbol}, bid={self.bids.best()}, ask={self.asks.best()}"
+
+
+class Books:
+    """
+    Books (by symbol) maintained from MarketDataSnapshotFullRefresh and
+    MarketDataIncrementalRefresh messages.
+    Only bids and offers are maintained (other entry types are ignored).
+    """
+
+    def __init__(self, capacity: int = 256):
+        """
+        Constructor.
+        """
+
+        self.capacity = capacity
+        self.books = {}
+        self.bid = roq.fix.MDEntryType.BID
+        self.offer = roq.fix.MDEntryType.OFFER
+        self.delete = roq.fix.MDUpdateAction.DELETE
+
+    def get(self, symbol: str) -> Book:
+        """
+        Book (created on first use).
+        """
+
+        book = self.books.get(symbol)
+        if book is None:
+            book = Book(symbol, self.capacity)
+            self.books[symbol] = book
+        return book
+
+    def snapshot(self, market_data_snapshot_full_refresh) -> Book:
+        """
+        Replace all levels.
+        """
+
+        book = self.get(market_data_snapshot_full_refresh.symbol)
+        book.bids.clear()
+        book.asks.clear()
+        for entry in market_data_snapshot_full_refresh.no_md_entries:
+            if entry.md_entry_type == self.bid:
+                book.bids.update(entry.md_entry_px, entry.md_entry_size)
+            elif entry.md_entry_type == self.offer:
+                book.asks.update(entry.md_entry_px, entry.md_entry_size)
+        return book
+
+    def incremental(self, market_data_incremental_refresh):
+        """
+        Apply updates (possibly for several symbols).
+        """
+
+        book = None
+        for entry in market_data_incremental_refresh.no_md_entries:
+            if book is None or book.symbol != entry.symbol:
+                book = self.get(entry.symbol)
+            if entry.md_entry_type == self.bid:
+                levels = book.bids
+            elif entry.md_entry_type == self.offer:
+                levels = book.asks
+            else:
+                continue
+            size = 0.0 if entry.md_update_action == self.delete else entry.md_entry_size
+            levels.update(entry.md_entry_px, size)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Session bootstrap planner
+"""
+
+import logging
+import time
+
+
+class Bootstrap:
+    """
+    Declarative startup plan.
+
+    Each step is a request identified by its request ID (e.g. security_req_id)
+    and the request IDs it depends on. All steps without (outstanding)
+    dependencies are sent as soon as the plan is started. A step is sent when
+    all its dependencies have completed, i.e. a response carrying the request
+    ID was received.
+    """
+
+    def __init__(self, send):
+        """
+        Constructor.
+        """
+
+        self.send = send
+        self.factories = {}
+        self.waiting = {}
+        self.dependents = {}
+        self.sent = set()
+        self.completed = set()
+        self.started = None
+
+    def add(self, request_id: str, factory, depends_on=()):
+        """
+        Add a step.
+        The factory is called (without arguments) to create the request when it is due.
+        """
+
+        assert request_id not in self.factories, f"duplicate request_id={request_id}"
+        for dependency in depends_on:
+            assert dependency in self.factories, f"unknown dependency={dependency}"
+            self.dependents[dependency].append(request_id)
+        self.factories[request_id] = factory
+        self.waiting[request_id] = set(depends_on)
+        self.dependents[request_id] = []
+
+    def start(self):
+        """
+        Send all steps without dependencies.
+        """
+
+        self.started = time.monotonic()
+        for request_id, dependencies in self.waiting.items():
+            if not dependencies:
+                self._send(request_id)
+
+    def complete(self, request_id: str) -> bool:
+        """
+        A response was received.
+        Returns False if the request ID is not (or no longer) tracked.
+        """
+
+        if request_id not in self.sent or request_id in self.completed:
+            return False
+        self.completed.add(request_id)
+        for dependent in self.dependents[request_id]:
+            dependencies = self.waiting[dependent]
+            dependencies.discard(request_id)
+            if not dependencies:
+                self._send(dependent)
+        if self.done:
+            logging.info(
+                "Bootstrap completed (%.3fms)",
+                (time.monotonic() - self.started) * 1000.0,
+            )
+        return True
+
+    @property
+    def done(self) -> bool:
+        """
+        All steps have completed.
+        """
+
+        return len(self.completed) == len(self.factories)
+
+    def _send(self, request_id: str):
+        self.sent.add(request_id)
+        self.send(self.factories[request_id]())
@@ -8,6 +8,7 @@ Demonstrates how to maintain a FIX session using asyncio
 
 import asyncio
 import logging
+import time
 
 from datetime import datetime, timedelta
 
@@ -15,64 +16,573 @@ from fastcore.all import typedispatch
 
 import roq
 
+from .backoff import Backoff
+from .book import Books
+from .bootstrap import Bootstrap
+from .clock import SessionClock
+from .dispatch import DispatchTable
+from .framing import FrameBuffer
+from .journal import INBOUND, OUTBOUND, Journal
+from .latency import Latency
+from .orders import OrderStates
+from .refdata import open_refdata
+from .sender import SendScheduler
+from .stats import SessionStats
+from .store import open_store
+from .template import OrderTemplate
+from .throttle import OrderScheduler
+from .timer import TimerWheel
+from . import network, wire
+
 
-# TODO timer
-# TODO reconnect
 # TODO check asyncio is used properly
 
+# reasons for pausing the reading side of the transport
+PAUSED_BY_WRITING = 1
+PAUSED_BY_PROCESSING = 2
+
 
 class Client(asyncio.Protocol):
     """
     Manage FIX bi-directional connection.
     """
 
-    def __init__(self, sender_comp_id, target_comp_id, username, password):
+    def __init__(
+        self,
+        sender_comp_id,
+        target_comp_id,
+        username,
+        password,
+        journal=None,
+        timer_wheel=None,
+        send_scheduler=None,
+        stats=None,
+        latency=None,
+        store=None,
+        orders=None,
+        refdata=None,
+        clock=None,
+        order_rate: float = 0.0,
+        order_burst: int = 1,
+        order_templates: bool = False,
+        write_buffer_high: int = None,
+        write_buffer_low: int = None,
+        max_queued: int = 1 << 22,
+        max_processing: float = 0.0,
+    ):
         """
         Constructor.
         """
 
         self.transport = None
+        self.sender_comp_id = sender_comp_id
+        self.target_comp_id = target_comp_id
         self.encoder = roq.codec.fix.Encoder(
             sender_comp_id=sender_comp_id,
             target_comp_id=target_comp_id,
         )
         self.decoder = roq.codec.fix.Decoder()
-        self.decode_buffer = bytearray()
+        self.decode_buffer = FrameBuffer()
+        self.dispatch_table = DispatchTable.get(type(self))
+        self.handlers = self.dispatch_table.handlers
         self.username = username
         self.password = password
+        self.journal = journal
+        self.timer_wheel = timer_wheel
+        self.send_scheduler = send_scheduler
+        self.send_queue = []
+        self.stats = SessionStats() if stats is None else stats
+        self.latency = Latency() if latency is None else latency
+        self.store = store
+        self.orders = OrderStates() if orders is None else orders
+        self.books = Books()
+        self.refdata = refdata
+        self.clock = clock
+        self.order_rate = order_rate
+        self.order_burst = order_burst
+        self.order_templates = order_templates
+        self.order_scheduler = None
+        self.write_buffer_high = write_buffer_high
+        self.write_buffer_low = write_buffer_low
+        self.max_queued = max_queued
+        self.max_processing = max_processing
+        self.writing_paused = None
+        self.outbound = []
+        self.outbound_size = 0
+        self.reading_paused = None
+        self.paused_by = 0
+        self.next_msg_seq_num = 1
+        self.encoded = 0
+        self.expected_inbound = 1
+        self.inbound_ahead = None
+        self.templates = {}
+        self.timer = None
+        self.heartbeat_interval = 0
+        self.last_received = 0
+        self.last_sent = 0
+        self.test_request_sent = None
+        self.test_req_id = 0
+        self.started = None
+        self.closed = None
+        self.logged_on = False
+
+    def prepare(self):
+        """
+        Called before connecting, e.g. to pre-encode messages.
+        """
+
+        self.started = time.monotonic()
+        if self.clock is None:
+            self.clock = SessionClock.get(asyncio.get_running_loop())
+        if self.store is not None:
+            self.next_msg_seq_num = self.store.next_outbound
+            self.expected_inbound = self.store.next_inbound
 
     def connection_made(self, transport):
         self.transport = transport
+        if self.write_buffer_high is not None:
+            transport.set_write_buffer_limits(
+                high=self.write_buffer_high,
+                low=self.write_buffer_low,
+            )
+        if self.timer_wheel is None:
+            self.timer_wheel = TimerWheel.get(asyncio.get_running_loop())
+        if self.clock is None:
+            self.clock = SessionClock.get(asyncio.get_running_loop())
+        if self.order_rate > 0:
+            self.order_scheduler = OrderScheduler(
+                asyncio.get_running_loop(),
+                self._send,
+                self.order_rate,
+                self.order_burst,
+            )
+        self.closed = asyncio.get_running_loop().create_future()
+        self.stats.connects += 1
 
     def data_received(self, data):
-        logging.debug(
-            "[RECV] data=%s",
-            data.decode().replace(chr(1), "|"),
-        )
-        self.decode_buffer += data
-        while True:
-            length = self.decoder.dispatch(self._callback, bytes(self.decode_buffer))
-            if length == 0:  # need more data
-                break
-            if length > 0:  # a message was decoded
-                self.decode_buffer = self.decode_buffer[length:]
-            if len(self.decode_buffer) == 0:  # no more data
-                break
+        self.last_received = self.timer_wheel.tick
+        self.stats.bytes_received += len(data)
+        self._wire(INBOUND, data)
+        self.decode_buffer.append(data)
+        self._process()
 
     def connection_lost(self, exc):
-        pass
+        self.stats.disconnects += 1
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.order_scheduler is not None:
+            self.order_scheduler.close()
+        if self.writing_paused is not None:
+            self.stats.write_blocked += time.monotonic() - self.writing_paused
+            self.writing_paused = None
+        if self.reading_paused is not None:
+            self.stats.read_blocked += time.monotonic() - self.reading_paused
+            self.reading_paused = None
+        if not self.closed.done():
+            self.closed.set_result(exc)
+
+    def pause_writing(self):
+        """
+        The transport's write buffer is above the high water mark.
+        Messages are queued (bounded) and reading is paused until resumed.
+        """
+
+        self.writing_paused = time.monotonic()
+        self.stats.write_pauses += 1
+        self._pause_reading(PAUSED_BY_WRITING)
+
+    def resume_writing(self):
+        """
+        The transport's write buffer has drained below the low water mark.
+        """
+
+        self.stats.write_blocked += time.monotonic() - self.writing_paused
+        self.writing_paused = None
+        outbound, self.outbound = self.outbound, []
+        self.outbound_size = 0
+        if outbound:
+            self.transport.writelines(outbound)  # note! may pause writing again
+        self._resume_reading(PAUSED_BY_WRITING)
+
+    def _pause_reading(self, reason):
+        if not self.paused_by:
+            self.transport.pause_reading()
+            self.reading_paused = time.monotonic()
+            self.stats.read_pauses += 1
+        self.paused_by |= reason
+
+    def _resume_reading(self, reason):
+        self.paused_by &= ~reason
+        if self.paused_by or self.reading_paused is None:
+            return
+        self.stats.read_blocked += time.monotonic() - self.reading_paused
+        self.reading_paused = None
+        if not self.transport.is_closing():
+            self.transport.resume_reading()
+
+    def _process(self):
+        """
+        Decode and dispatch all complete messages.
+        If this took longer than max_processing, reading is paused for one loop iteration
+        (data remains in the kernel's buffer and the peer is eventually throttled).
+        """
+
+        decode_buffer = self.decode_buffer
+        if self.max_processing <= 0:
+            self.stats.messages_received += decode_buffer.dispatch(self.decoder, self._dispatch)
+            return
+        start = time.perf_counter()
+        self.stats.messages_received += decode_buffer.dispatch(self.decoder, self._dispatch)
+        if time.perf_counter() - start > self.max_processing and self.reading_paused is None:
+            self._pause_reading(PAUSED_BY_PROCESSING)
+            asyncio.get_running_loop().call_soon(self._resume_reading, PAUSED_BY_PROCESSING)
+
+    def _dispatch(self, header, message):
+        """
+        Route a decoded FIX message to the matching _callback overload.
+        """
+
+        if self.store is not None:
+            self._sequence_inbound(header.msg_seq_num)
+        self.latency.received(message)
+        handler = self.handlers.get(type(message))
+        if handler is None:
+            handler = self.dispatch_table.resolve(type(header), type(message))
+        handler(self, header, message)
 
     def _send(self, obj):
         """
         Encode and send a FIX message.
+        With order templates, a NewOrderSingle is rendered from a pre-encoded template
+        (only the template fields are sent, TransactTime is the sending time).
         """
 
-        message = self.encoder.encode(obj, datetime.now())
-        logging.debug(
-            "[SEND] data=%s",
-            message.decode().replace(chr(1), "|"),
+        if self.order_templates and type(obj) is roq.codec.fix.NewOrderSingle:
+            template = self._get_order_template(
+                obj.account,
+                obj.security_exchange,
+                obj.symbol,
+                obj.side,
+                obj.ord_type,
+                obj.time_in_force,
+            )
+            self._send_order(template, obj.cl_ord_id, obj.price, obj.order_qty)
+            return
+        self.latency.sent(obj)
+        msg_seq_num, message = self._encode(obj)
+        self._persist(msg_seq_num, message)
+        self._write(message)
+
+    def _submit(self, obj):
+        """
+        Send an order request.
+        With an order rate, requests are paced and prioritized (cancels first) and
+        stale requests are replaced while queued.
+        """
+
+        if self.order_scheduler is None:
+            self._send(obj)
+        else:
+            self.order_scheduler.submit(obj)
+
+    def _encode(self, obj):
+        """
+        Encode a FIX message.
+        Returns (msg_seq_num, message).
+        """
+
+        msg_seq_num = self.next_msg_seq_num
+        self.next_msg_seq_num = msg_seq_num + 1
+        self.encoded += 1
+        message = self.encoder.encode(obj, self.clock.now())
+        if msg_seq_num != self.encoded:
+            # note! the encoder numbers its own messages from 1
+            # (sessions continuing from the store, template orders)
+            message = wire.replace(message, 34, b"%d" % msg_seq_num)
+        return msg_seq_num, message
+
+    def _persist(self, msg_seq_num, message):
+        """
+        Store an outbound message (when it is written).
+        """
+
+        if self.store is not None:
+            self.store.append(msg_seq_num, message)
+
+    def _sequence_inbound(self, msg_seq_num):
+        """
+        Track the next expected inbound sequence number.
+        The store is only advanced while messages are contiguous, i.e. a gap not yet filled
+        (by resent messages) is requested again after a restart.
+        Messages received beyond a gap are remembered as a range.
+        """
+
+        expected = self.expected_inbound
+        if msg_seq_num == expected:
+            expected += 1
+            ahead = self.inbound_ahead
+            if ahead is not None and ahead[0] == expected:
+                expected = ahead[1] + 1
+                self.inbound_ahead = None
+            self.expected_inbound = expected
+            self.store.set_next_inbound(expected)
+        elif msg_seq_num > expected:
+            ahead = self.inbound_ahead
+            if ahead is not None and msg_seq_num == ahead[1] + 1:
+                self.inbound_ahead = (ahead[0], msg_seq_num)
+            else:
+                # note! an earlier range is requested again
+                self.inbound_ahead = (msg_seq_num, msg_seq_num)
+
+    def _synchronize(self, header, logon):
+        """
+        Called when the Logon has been acknowledged.
+        Restarts inbound sequence numbers (ResetSeqNumFlag) or requests messages missed while
+        disconnected.
+        """
+
+        if self.store is None:
+            return
+        if logon.reset_seq_num_flag:
+            logging.info("Inbound sequence numbers have been reset")
+            self.expected_inbound = header.msg_seq_num + 1
+            self.inbound_ahead = None
+            self.store.set_next_inbound(self.expected_inbound)
+            return
+        if header.msg_seq_num <= self.expected_inbound:
+            return
+        logging.warning(
+            "Inbound gap [%d, %d], requesting resend...",
+            self.expected_inbound,
+            header.msg_seq_num - 1,
+        )
+        self._send(
+            roq.codec.fix.ResendRequest(
+                begin_seq_no=self.expected_inbound,
+                end_seq_no=header.msg_seq_num - 1,
+            )
+        )
+
+    def _send_order(self, template, cl_ord_id, price, order_qty):
+        """
+        Send an order using a pre-encoded template.
+        """
+
+        self.latency.start("order", cl_ord_id)
+        self._write(self._encode_order(template, cl_ord_id, price, order_qty))
+
+    def _encode_order(self, template, cl_ord_id, price, order_qty):
+        """
+        Encode an order using a pre-encoded template.
+        """
+
+        msg_seq_num = self.next_msg_seq_num
+        self.next_msg_seq_num = msg_seq_num + 1
+        message = template.render(msg_seq_num, self.clock.now(), cl_ord_id, price, order_qty)
+        self._persist(msg_seq_num, message)
+        return message
+
+    def _get_order_template(
+        self,
+        account,
+        exchange,
+        symbol,
+        side,
+        ord_type=roq.fix.OrdType.LIMIT,
+        time_in_force=roq.fix.TimeInForce.GTC,
+    ):
+        """
+        Pre-encoded NewOrderSingle (created on first use).
+        """
+
+        key = (account, exchange, symbol, side, ord_type, time_in_force)
+        template = self.templates.get(key)
+        if template is None:
+            template = OrderTemplate(
+                self.sender_comp_id,
+                self.target_comp_id,
+                account,
+                exchange,
+                symbol,
+                side,
+                ord_type,
+                time_in_force,
+            )
+            self.templates[key] = template
+        return template
+
+    def _resend(self, begin_seq_no, end_seq_no):
+        """
+        Replay stored messages.
+        Session level messages are replaced by gap fills.
+        """
+
+        start = time.monotonic()
+        last = self.store.next_outbound - 1
+        if end_seq_no == 0 or end_seq_no > last:
+            end_seq_no = last
+        template = self.store.get(last)
+        if template is None:
+            logging.warning("Unable to resend, no messages have been stored")
+            return
+        gap = None
+        count = 0
+        for msg_seq_num in range(begin_seq_no, end_seq_no + 1):
+            message = self.store.get(msg_seq_num)
+            if message is None or wire.get(message, 35) in wire.ADMIN_MSG_TYPES:
+                if gap is None:
+                    gap = msg_seq_num
+                continue
+            if gap is not None:
+                self._write(wire.gap_fill(template, gap, msg_seq_num))
+                gap = None
+            self._write(wire.possible_duplicate(message))
+            count += 1
+        if gap is not None:
+            self._write(wire.gap_fill(template, gap, end_seq_no + 1))
+        logging.info(
+            "Resent %d message(s) [%d, %d] (%.3fms)",
+            count,
+            begin_seq_no,
+            end_seq_no,
+            (time.monotonic() - start) * 1000.0,
         )
-        self.transport.write(message)
+
+    def _update_refdata(self, instruments):
+        """
+        Persist new or changed reference data.
+        """
+
+        if self.refdata is None:
+            return
+        changes = 0
+        for instrument in instruments:
+            changes += self.refdata.update(instrument)
+        if changes:
+            self.refdata.flush()
+
+    def _write(self, message):
+        """
+        Send an encoded FIX message.
+        With a send scheduler, messages are coalesced (at most one write per loop iteration).
+        """
+
+        self._wire(OUTBOUND, message)
+        self.stats.messages_sent += 1
+        self.stats.bytes_sent += len(message)
+        if self.writing_paused is not None:
+            if self.send_queue:  # note! preserve order
+                self._queue(self.send_queue)
+                self.send_queue.clear()
+            self._queue((message,))
+        elif self.send_scheduler is None:
+            self.transport.write(message)
+        else:
+            self.send_scheduler.write(self, message)
+        self.last_sent = self.timer_wheel.tick
+
+    def _flush(self):
+        """
+        Write all queued messages (called by the send scheduler).
+        """
+
+        if self.writing_paused is not None:
+            self._queue(self.send_queue)
+        elif not self.transport.is_closing():
+            self.transport.writelines(self.send_queue)
+        self.send_queue.clear()
+
+    def _queue(self, messages):
+        """
+        Hold messages while writing is paused.
+        Messages can not be dropped (sequence numbers) so the connection is closed if the queue is
+        full.
+        """
+
+        for message in messages:
+            self.outbound.append(message)
+            self.outbound_size += len(message)
+        if self.outbound_size > self.max_queued and not self.transport.is_closing():
+            logging.warning(
+                "Outbound queue is full (%d bytes), disconnecting...",
+                self.outbound_size,
+            )
+            self.transport.abort()
+
+    def _wire(self, direction, data):
+        """
+        Journal and (optionally) log raw bytes.
+        Formatting is only done if debug logging is enabled.
+        """
+
+        if self.journal is not None:
+            self.journal.write(direction, data)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                "[%s] data=%s",
+                "RECV" if direction == INBOUND else "SEND",
+                bytes(data).decode().replace(chr(1), "|"),
+            )
+
+    def _start_heartbeat(self, heart_bt_int):
+        """
+        Start the heartbeat timer (after logon).
+        """
+
+        if isinstance(heart_bt_int, timedelta):
+            heart_bt_int = heart_bt_int.total_seconds()
+        self.logged_on = True
+        if heart_bt_int <= 0:
+            return
+        self.heartbeat_interval = self.timer_wheel.ticks(heart_bt_int)
+        self.last_received = self.timer_wheel.tick
+        self.last_sent = self.timer_wheel.tick
+        self.test_request_sent = None
+        self._schedule_timer(self.heartbeat_interval)
+
+    def _schedule_timer(self, ticks):
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = self.timer_wheel.schedule_ticks(ticks, self._on_timer)
+
+    def _on_timer(self):
+        """
+        Heartbeat timer.
+        Send heartbeat if nothing was sent within the interval.
+        Send test request if nothing was received within the interval (plus grace).
+        Disconnect if the test request was not answered within the interval.
+        """
+
+        self.timer = None
+        now = self.timer_wheel.tick
+        interval = self.heartbeat_interval
+        grace = max(1, interval // 5)
+        if self.test_request_sent is not None:
+            if self.last_received >= self.test_request_sent:
+                self.test_request_sent = None
+            elif now - self.test_request_sent >= interval:
+                logging.warning("Heartbeat timeout, disconnecting...")
+                self.transport.close()
+                return
+        if self.test_request_sent is None and now - self.last_received >= interval + grace:
+            self.test_req_id += 1
+            test_request = roq.codec.fix.TestRequest(
+                test_req_id=f"test_req_id_{self.test_req_id}",
+            )
+            self._send(test_request)
+            self.test_request_sent = now
+        if now - self.last_sent >= interval:
+            heartbeat = roq.codec.fix.Heartbeat(
+                test_req_id="",
+            )
+            self._send(heartbeat)
+        if self.test_request_sent is not None:
+            deadline = self.test_request_sent + interval
+        else:
+            deadline = self.last_received + interval + grace
+        deadline = min(deadline, self.last_sent + interval)
+        self._schedule_timer(deadline - now)
 
     @typedispatch
     def _callback(
@@ -85,6 +595,8 @@ class Client(asyncio.Protocol):
             logon,
             header,
         )
+        self._start_heartbeat(logon.heart_bt_int)
+        self._synchronize(header, logon)
 
     @typedispatch
     def _callback(
@@ -133,7 +645,10 @@ class Client(asyncio.Protocol):
             resend_request,
             header,
         )
-        logging.fatal("Unexpected: ResendRequest")
+        if self.store is None:
+            logging.fatal("Unexpected: ResendRequest")
+        else:
+            self._resend(resend_request.begin_seq_no, resend_request.end_seq_no)
 
     @typedispatch
     def _callback(
@@ -234,6 +749,7 @@ class Client(asyncio.Protocol):
             security_list,
             header,
         )
+        self._update_refdata(security_list.no_related_sym)
 
     @typedispatch
     def _callback(
@@ -259,6 +775,7 @@ class Client(asyncio.Protocol):
             security_definition,
             header,
         )
+        self._update_refdata((security_definition,))
 
     @typedispatch
     def _callback(
@@ -320,6 +837,7 @@ class Client(asyncio.Protocol):
             market_data_snapshot_full_refresh,
             header,
         )
+        self.books.snapshot(market_data_snapshot_full_refresh)
 
     @typedispatch
     def _callback(
@@ -332,6 +850,7 @@ class Client(asyncio.Protocol):
             market_data_incremental_refresh,
             header,
         )
+        self.books.incremental(market_data_incremental_refresh)
 
     @typedispatch
     def _callback(
@@ -440,6 +959,7 @@ class Client(asyncio.Protocol):
             execution_report,
             header,
         )
+        self.orders.apply(execution_report)
 
     @typedispatch
     def _callback(
@@ -502,20 +1022,180 @@ class Client(asyncio.Protocol):
         )
 
 
+class BufferedClient(
+    Client,
+    asyncio.BufferedProtocol,
+):
+    """
+    Manage FIX bi-directional connection.
+    The event loop reads directly into the (preallocated) receive buffer.
+    """
+
+    def get_buffer(self, sizehint):
+        return self.decode_buffer.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes):
+        self.last_received = self.timer_wheel.tick
+        self.stats.bytes_received += nbytes
+        self.decode_buffer.buffer_updated(nbytes)
+        if self.journal is not None or logging.getLogger().isEnabledFor(logging.DEBUG):
+            tail = self.decode_buffer.tail
+            with memoryview(self.decode_buffer.buffer)[tail - nbytes : tail] as data:
+                self._wire(INBOUND, data)
+        self._process()
+
+
 class MyMixin:
     """
     Client mixin implementing our workflow.
     """
 
-    def connection_made(self, transport):
-        self.transport = transport
+    exchange = "deribit"
+    symbols = ("BTC-PERPETUAL",)
+
+    def _create_bootstrap(self):
+        """
+        Startup plan.
+        Requests are sent as soon as their dependencies have completed.
+        """
+
+        bootstrap = Bootstrap(self._submit)
+        bootstrap.add(
+            "security_req_id_1",
+            lambda: roq.codec.fix.SecurityListRequest(
+                security_req_id="security_req_id_1",
+                security_list_request_type=roq.fix.SecurityListRequestType.ALL_SECURITIES,
+                subscription_request_type=roq.fix.SubscriptionRequestType.SNAPSHOT,
+            ),
+        )
+        request_type = roq.fix.SecurityRequestType.REQUEST_SECURITY_IDENTITY_AND_SPECIFICATIONS
+        for symbol in self.symbols:
+            bootstrap.add(
+                f"security_req_id_{symbol}",
+                lambda symbol=symbol: roq.codec.fix.SecurityDefinitionRequest(
+                    security_req_id=f"security_req_id_{symbol}",
+                    security_request_type=request_type,
+                    symbol=symbol,
+                    security_exchange=self.exchange,
+                    subscription_request_type=roq.fix.SubscriptionRequestType.SNAPSHOT,
+                ),
+            )
+            bootstrap.add(
+                f"security_status_req_id_{symbol}",
+                lambda symbol=symbol: roq.codec.fix.SecurityStatusRequest(
+                    security_status_req_id=f"security_status_req_id_{symbol}",
+                    symbol=symbol,
+                    security_exchange=self.exchange,
+                    subscription_request_type=roq.fix.SubscriptionRequestType.SNAPSHOT,
+                    trading_session_id=self.exchange,
+                ),
+            )
+        bootstrap.add(
+            "md_req_id_1",
+            lambda: roq.codec.fix.MarketDataRequest(
+                md_req_id="md_req_id_1",
+                subscription_request_type=roq.fix.SubscriptionRequestType.SNAPSHOT_UPDATES,
+                market_depth=5,
+                md_update_type=roq.fix.MDUpdateType.INCREMENTAL_REFRESH,
+                aggregated_book=True,
+                no_md_entry_types=[
+                    roq.fix.MDEntryType.BID,
+                    roq.fix.MDEntryType.OFFER,
+                ],
+                no_related_sym=[
+                    roq.codec.fix.InstrmtMDReq(
+                        symbol=symbol,
+                        security_exchange=self.exchange,
+                    )
+                    for symbol in self.symbols
+                ],
+            ),
+        )
+        bootstrap.add(
+            "ord_status_req_id_1",
+            lambda: roq.codec.fix.OrderStatusRequest(
+                ord_status_req_id="ord_status_req_id_1",
+            ),
+        )
+        bootstrap.add(
+            "mass_status_req_id_1",
+            lambda: roq.codec.fix.OrderMassStatusRequest(
+                mass_status_req_id="mass_status_req_id_1",
+                mass_status_req_type=roq.fix.MassStatusReqType.ORDERS,
+            ),
+        )
+        # TODO not yet functional
+        bootstrap.add(
+            "trad_ses_req_id_1",
+            lambda: roq.codec.fix.TradingSessionStatusRequest(
+                trad_ses_req_id="trad_ses_req_id_1",
+                trading_session_id=self.exchange,
+                subscription_request_type=roq.fix.SubscriptionRequestType.SNAPSHOT,
+            ),
+        )
+        # note! we must know the instrument and all existing orders before trading
+        # (cached reference data is refreshed in the background)
+        depends_on = ["mass_status_req_id_1"]
+        if self.refdata is None or self.refdata.get(self.exchange, self.symbols[0]) is None:
+            depends_on.append(f"security_req_id_{self.symbols[0]}")
+        bootstrap.add(
+            "cl_ord_id_1",
+            lambda: roq.codec.fix.NewOrderSingle(
+                cl_ord_id="cl_ord_id_1",
+                account="A1",
+                symbol=self.symbols[0],
+                security_exchange=self.exchange,
+                side=roq.fix.Side.BUY,
+                transact_time=datetime.now(),
+                order_qty=1,
+                ord_type=roq.fix.OrdType.LIMIT,
+                price=10000,
+                time_in_force=roq.fix.TimeInForce.GTC,
+            ),
+            depends_on=depends_on,
+        )
+        return bootstrap
+
+    def _first_market_data(self):
+        """
+        Report time from connecting to the first market data.
+        """
+
+        if self.first_market_data is None:
+            self.first_market_data = time.monotonic() - self.started
+            logging.info(
+                "Time to first market data: %.3fms",
+                self.first_market_data * 1000.0,
+            )
+
+    def prepare(self):
+        """
+        Pre-encode the Logon.
+        """
+
+        super().prepare()
         logon = roq.codec.fix.Logon(
             heart_bt_int=timedelta(seconds=30),
+            reset_seq_num_flag=self.store is not None and self.next_msg_seq_num == 1,
             username=self.username,
             password=self.password,
             encrypt_method=roq.fix.EncryptMethod.NONE,
         )
-        self._send(logon)
+        # note! stored when written (a failed connect consumes nothing)
+        self.logon = self._encode(logon)
+        self.first_market_data = None
+        self.bootstrap = self._create_bootstrap()
+
+    def connection_made(self, transport):
+        """
+        Send the Logon.
+        """
+
+        super().connection_made(transport)
+        msg_seq_num, message = self.logon
+        message = wire.replace(message, 52, wire.sending_time())  # note! encoded before connecting
+        self._persist(msg_seq_num, message)
+        self._write(message)
         logging.info("Sending logon...")
 
     @typedispatch
@@ -529,13 +1209,13 @@ class MyMixin:
             logon,
             header,
         )
-        logging.info("Logon was successful")
-        security_list_request = roq.codec.fix.SecurityListRequest(
-            security_req_id="security_req_id_1",
-            security_list_request_type=roq.fix.SecurityListRequestType.ALL_SECURITIES,
-            subscription_request_type=roq.fix.SubscriptionRequestType.SNAPSHOT,
+        logging.info(
+            "Logon was successful (%.3fms)",
+            (time.monotonic() - self.started) * 1000.0,
         )
-        self._send(security_list_request)
+        self._start_heartbeat(logon.heart_bt_int)
+        self._synchronize(header, logon)
+        self.bootstrap.start()
 
     @typedispatch
     def _callback(
@@ -613,6 +1293,7 @@ class MyMixin:
             trading_session_status,
             header,
         )
+        self.bootstrap.complete(trading_session_status.trad_ses_req_id)
 
     @typedispatch
     def _callback(
@@ -625,14 +1306,8 @@ class MyMixin:
             security_list,
             header,
         )
-        security_definition_request = roq.codec.fix.SecurityDefinitionRequest(
-            security_req_id="security_req_id_2",
-            security_request_type=roq.fix.SecurityRequestType.REQUEST_SECURITY_IDENTITY_AND_SPECIFICATIONS,
-            symbol="BTC-PERPETUAL",
-            security_exchange="deribit",
-            subscription_request_type=roq.fix.SubscriptionRequestType.SNAPSHOT,
-        )
-        self._send(security_definition_request)
+        self._update_refdata(security_list.no_related_sym)
+        self.bootstrap.complete(security_list.security_req_id)
 
     @typedispatch
     def _callback(
@@ -645,32 +1320,8 @@ class MyMixin:
             security_definition,
             header,
         )
-        security_status_request = roq.codec.fix.SecurityStatusRequest(
-            security_status_req_id="security_status_req_id_1",
-            symbol="BTC-PERPETUAL",
-            security_exchange="deribit",
-            subscription_request_type=roq.fix.SubscriptionRequestType.SNAPSHOT,
-            trading_session_id="deribit",
-        )
-        self._send(security_status_request)
-        market_data_request = roq.codec.fix.MarketDataRequest(
-            md_req_id="md_req_id_1",
-            subscription_request_type=roq.fix.SubscriptionRequestType.SNAPSHOT_UPDATES,
-            market_depth=5,
-            md_update_type=roq.fix.MDUpdateType.INCREMENTAL_REFRESH,
-            aggregated_book=True,
-            no_md_entry_types=[
-                roq.fix.MDEntryType.BID,
-                roq.fix.MDEntryType.OFFER,
-            ],
-            no_related_sym=[
-                roq.codec.fix.InstrmtMDReq(
-                    symbol="BTC-PERPETUAL",
-                    security_exchange="deribit",
-                ),
-            ],
-        )
-        self._send(market_data_request)
+        self._update_refdata((security_definition,))
+        self.bootstrap.complete(security_definition.security_req_id)
 
     @typedispatch
     def _callback(
@@ -683,10 +1334,7 @@ class MyMixin:
             security_status,
             header,
         )
-        order_status_request = roq.codec.fix.OrderStatusRequest(
-            ord_status_req_id="ord_status_req_id_1",
-        )
-        self._send(order_status_request)
+        self.bootstrap.complete(security_status.security_status_req_id)
 
     @typedispatch
     def _callback(
@@ -711,6 +1359,9 @@ class MyMixin:
             market_data_snapshot_full_refresh,
             header,
         )
+        self.books.snapshot(market_data_snapshot_full_refresh)
+        self._first_market_data()
+        self.bootstrap.complete(market_data_snapshot_full_refresh.md_req_id)
 
     @typedispatch
     def _callback(
@@ -723,6 +1374,8 @@ class MyMixin:
             market_data_incremental_refresh,
             header,
         )
+        self.books.incremental(market_data_incremental_refresh)
+        self._first_market_data()
 
     @typedispatch
     def _callback(
@@ -759,34 +1412,13 @@ class MyMixin:
             execution_report,
             header,
         )
+        self.orders.apply(execution_report)
         if len(execution_report.ord_status_req_id) > 0:
-            order_mass_status_request = roq.codec.fix.OrderMassStatusRequest(
-                mass_status_req_id="mass_status_req_id_1",
-                mass_status_req_type=roq.fix.MassStatusReqType.ORDERS,
-            )
-            self._send(order_mass_status_request)
-        if len(execution_report.mass_status_req_id) > 0:
-            new_order_single = roq.codec.fix.NewOrderSingle(
-                cl_ord_id="cl_ord_id_1",
-                account="A1",
-                symbol="BTC-PERPETUAL",
-                security_exchange="deribit",
-                side=roq.fix.Side.BUY,
-                transact_time=datetime.now(),
-                order_qty=1,
-                ord_type=roq.fix.OrdType.LIMIT,
-                price=10000,
-                time_in_force=roq.fix.TimeInForce.GTC,
-            )
-            self._send(new_order_single)
+            self.bootstrap.complete(execution_report.ord_status_req_id)
+        elif len(execution_report.mass_status_req_id) > 0:
+            self.bootstrap.complete(execution_report.mass_status_req_id)
         else:
-            # TODO not yet functional
-            trading_session_status_request = roq.codec.fix.TradingSessionStatusRequest(
-                trad_ses_req_id="trad_ses_req_id_1",
-                trading_session_id="deribit",
-                subscription_request_type=roq.fix.SubscriptionRequestType.SNAPSHOT,
-            )
-            self._send(trading_session_status_request)
+            self.bootstrap.complete(execution_report.cl_ord_id)
 
     @typedispatch
     def _callback(
@@ -825,27 +1457,37 @@ class MyMixin:
         )
 
 
-def create_connection(
+async def maintain_connection(
     loop,
+    session_class,
     network_address: str,
-    sender_comp_id: str,
-    target_comp_id: str,
-    username: str,
-    password: str,
+    backoff: Backoff,
+    **kwargs,
 ):
     """
     Creates a bi-directional connection.
+    Reconnects (with backoff) when the connection is lost.
     """
 
-    return loop.create_unix_connection(
-        lambda: MySession(
-            sender_comp_id=sender_comp_id,
-            target_comp_id=target_comp_id,
-            username=username,
-            password=password,
-        ),
-        path=network_address,
-    )
+    while True:
+        session = session_class(**kwargs)
+        session.prepare()
+        try:
+            await network.connect(
+                loop,
+                lambda: session,  # pylint: disable=cell-var-from-loop
+                network_address,
+            )
+        except OSError as err:
+            logging.warning("Failed to connect: %s", err)
+        else:
+            await session.closed
+            logging.warning("Disconnected")
+            if session.logged_on:
+                backoff.reset()
+        delay = backoff.next()
+        logging.info("Reconnecting in %.3fs...", delay)
+        await asyncio.sleep(delay)
 
 
 class MySession(
@@ -856,14 +1498,31 @@ class MySession(
     Our workflow.
     """
 
-
-    @staticmethod
+    @classmethod
     def main(
+        cls,
         network_address: str,
         sender_comp_id: str,
         target_comp_id: str,
         username: str,
         password: str,
+        journal: str = None,
+        reconnect_delay: float = 0.1,
+        reconnect_delay_max: float = 30.0,
+        store_dir: str = None,
+        reset_seq_num: bool = False,
+        refdata_dir: str = None,
+        coalesce: bool = False,
+        max_batch: int = 0,
+        max_delay: float = 0.0,
+        order_rate: float = 0.0,
+        order_burst: int = 1,
+        order_templates: bool = False,
+        write_buffer_high: int = None,
+        write_buffer_low: int = None,
+        max_queued: int = 1 << 22,
+        max_processing: float = 0.0,
+        stats_interval: float = 60.0,
     ):
         """
         Main function.
@@ -875,17 +1534,73 @@ class MySession(
 
         # loop.set_debug(True)
 
-        task = create_connection(
+        if journal is not None:
+            journal = Journal(journal)
+
+        store = None
+        if store_dir is not None:
+            store = open_store(store_dir, sender_comp_id, target_comp_id, reset=reset_seq_num)
+
+        orders = OrderStates()  # note! survives reconnects
+
+        refdata = None if refdata_dir is None else open_refdata(refdata_dir, target_comp_id)
+
+        send_scheduler = SendScheduler(loop, max_batch, max_delay) if coalesce else None
+
+        stats = SessionStats()
+
+        latency = Latency()
+
+        timer_wheel = TimerWheel.get(loop)
+
+        def log_stats():
+            logging.info("[STATS] %s", stats)
+            latency.log(f"sender_comp_id={sender_comp_id}")
+            timer_wheel.schedule(stats_interval, log_stats)
+
+        if stats_interval > 0:
+            timer_wheel.schedule(stats_interval, log_stats)
+
+        task = maintain_connection(
             loop,
+            cls,
             network_address,
-            sender_comp_id,
-            target_comp_id,
-            username,
-            password,
-        )
+            Backoff(reconnect_delay, reconnect_delay_max),
+            sender_comp_id=sender_comp_id,
+            target_comp_id=target_comp_id,
+            username=username,
+            password=password,
+            journal=journal,
+            send_scheduler=send_scheduler,
+            stats=stats,
+            latency=latency,
+            store=store,
+            orders=orders,
+            refdata=refdata,
+            order_rate=order_rate,
+            order_burst=order_burst,
+            order_templates=order_templates,
+            write_buffer_high=write_buffer_high,
+            write_buffer_low=write_buffer_low,
+            max_queued=max_queued,
+            max_processing=max_processing,
+        )
+
+        try:
+            loop.run_until_complete(task)
+        finally:
+            if journal is not None:
+                journal.close()
+            if store is not None:
+                store.close()
 
-        loop.run_until_complete(task)
+        loop.close()
 
-        loop.run_forever()
 
-        loop.close()
+class MyBufferedSession(
+    MySession,
+    BufferedClient,
+):
+    """
+    Our workflow (using a BufferedProtocol).
+    """
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Cached clock used for SendingTime
+"""
+
+import time
+import weakref
+
+from datetime import datetime
+
+
+class SessionClock:
+    """
+    Wall clock shared by all sessions on an event loop.
+
+    The timestamp is cached and only refreshed when the monotonic clock has
+    advanced by (at least) resolution seconds, i.e. a burst of messages is
+    encoded using a single datetime object.
+    Both clocks can be injected (e.g. for deterministic tests).
+    """
+
+    _clocks = weakref.WeakKeyDictionary()
+
+    def __init__(
+        self,
+        resolution: float = 0.001,
+        monotonic=time.monotonic,
+        wall=datetime.now,
+    ):
+        """
+        Constructor.
+        """
+
+        self.resolution = resolution
+        self.monotonic = monotonic
+        self.wall = wall
+        self.updated = None
+        self.cached = None
+        self.refreshes = 0
+
+    @classmethod
+    def get(cls, loop):
+        """
+        Shared clock for an event loop.
+        """
+
+        clock = cls._clocks.get(loop)
+        if clock is None:
+            clock = cls()
+            cls._clocks[loop] = clock
+        return clock
+
+    def now(self) -> datetime:
+        """
+        Current (cached) time.
+        """
+
+        now = self.monotonic()
+        if self.updated is None or now - self.updated >= self.resolution:
+            self.updated = now
+            self.cached = self.wall()
+            self.refreshes += 1
+        return self.cached
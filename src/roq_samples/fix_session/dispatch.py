@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Message dispatch for FIX sessions
+"""
+
+
+def _ignore(self, header, message):  # pylint: disable=unused-argument
+    """
+    Default handler (no matching overload).
+    """
+
+
+class DispatchTable:
+    """
+    Maps message type to a handler.
+
+    Handlers are the @typedispatch overloads of a method (default: _callback)
+    found along the MRO of a session class.
+    The first class defining an overload for a message type wins, i.e. a mixin
+    overrides the base client.
+    Resolution happens once per message type, afterwards it is a dict lookup.
+    """
+
+    _tables = {}
+
+    def __init__(self, cls, name: str = "_callback"):
+        """
+        Constructor.
+        """
+
+        self.dispatchers = [vars(base)[name] for base in cls.__mro__ if name in vars(base)]
+        self.handlers = {}
+
+    @classmethod
+    def get(cls, session_class):
+        """
+        Shared table for a session class.
+        """
+
+        table = cls._tables.get(session_class)
+        if table is None:
+            table = cls(session_class)
+            cls._tables[session_class] = table
+        return table
+
+    def resolve(self, header_type, message_type):
+        """
+        Find (and cache) the handler for a message type.
+        """
+
+        handler = self.handlers.get(message_type)
+        if handler is None:
+            handler = _ignore
+            for dispatcher in self.dispatchers:
+                func = dispatcher[header_type, message_type]
+                if func is not None:
+                    handler = func
+                    break
+            self.handlers[message_type] = handler
+        return handler
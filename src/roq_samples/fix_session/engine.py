@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Demonstrates how to maintain many FIX sessions using a single asyncio event loop
+"""
+
+import asyncio
+import json
+import logging
+
+from .backoff import Backoff
+from .client import MySession, maintain_connection
+from .clock import SessionClock
+from .journal import Journal
+from .latency import Latency
+from .orders import OrderStates
+from .refdata import open_refdata
+from .sender import SendScheduler
+from .stats import SessionStats
+from .store import open_store
+from .timer import TimerWheel
+
+
+class Engine:
+    """
+    Runs many sessions on one event loop.
+
+    All sessions share the timer wheel, the send scheduler and the clock.
+    Statistics, latencies and order states are maintained per session (and survive reconnects).
+    """
+
+    def __init__(
+        self,
+        loop,
+        session_class,
+        sessions: list,
+        journal=None,
+        reconnect_delay: float = 0.1,
+        reconnect_delay_max: float = 30.0,
+        stats_interval: float = 60.0,
+        store_dir: str = None,
+        reset_seq_num: bool = False,
+        refdata_dir: str = None,
+        max_batch: int = 0,
+        max_delay: float = 0.0,
+        order_rate: float = 0.0,
+        order_burst: int = 1,
+        order_templates: bool = False,
+        write_buffer_high: int = None,
+        write_buffer_low: int = None,
+        max_queued: int = 1 << 22,
+        max_processing: float = 0.0,
+    ):
+        """
+        Constructor.
+        """
+
+        self.loop = loop
+        self.session_class = session_class
+        self.configs = sessions
+        self.journal = journal
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_delay_max = reconnect_delay_max
+        self.stats_interval = stats_interval
+        self.order_rate = order_rate
+        self.order_burst = order_burst
+        self.order_templates = order_templates
+        self.write_buffer_high = write_buffer_high
+        self.write_buffer_low = write_buffer_low
+        self.max_queued = max_queued
+        self.max_processing = max_processing
+        self.timer_wheel = TimerWheel.get(loop)
+        self.clock = SessionClock.get(loop)
+        self.send_scheduler = SendScheduler.get(loop)
+        self.send_scheduler.max_batch = max_batch
+        self.send_scheduler.max_delay = max_delay
+        self.stats = {config["sender_comp_id"]: SessionStats() for config in sessions}
+        assert len(self.stats) == len(sessions), "sender_comp_id must be unique"
+        self.latency = {config["sender_comp_id"]: Latency() for config in sessions}
+        self.orders = {config["sender_comp_id"]: OrderStates() for config in sessions}
+        self.stores = {
+            config["sender_comp_id"]: (
+                None
+                if store_dir is None
+                else open_store(
+                    store_dir,
+                    config["sender_comp_id"],
+                    config["target_comp_id"],
+                    reset=reset_seq_num,
+                )
+            )
+            for config in sessions
+        }
+        # note! shared by sessions with the same counterparty
+        self.refdata = {}
+        if refdata_dir is not None:
+            for config in sessions:
+                target_comp_id = config["target_comp_id"]
+                if target_comp_id not in self.refdata:
+                    self.refdata[target_comp_id] = open_refdata(refdata_dir, target_comp_id)
+
+    async def run(self):
+        """
+        Maintain all sessions.
+        """
+
+        if self.stats_interval > 0:
+            self.timer_wheel.schedule(self.stats_interval, self._log_stats)
+        await asyncio.gather(
+            *(
+                maintain_connection(
+                    self.loop,
+                    self.session_class,
+                    config["network_address"],
+                    Backoff(self.reconnect_delay, self.reconnect_delay_max),
+                    sender_comp_id=config["sender_comp_id"],
+                    target_comp_id=config["target_comp_id"],
+                    username=config["username"],
+                    password=config.get("password"),
+                    journal=self.journal,
+                    timer_wheel=self.timer_wheel,
+                    send_scheduler=self.send_scheduler,
+                    clock=self.clock,
+                    order_rate=self.order_rate,
+                    order_burst=self.order_burst,
+                    order_templates=self.order_templates,
+                    write_buffer_high=self.write_buffer_high,
+                    write_buffer_low=self.write_buffer_low,
+                    max_queued=self.max_queued,
+                    max_processing=self.max_processing,
+                    stats=self.stats[config["sender_comp_id"]],
+                    latency=self.latency[config["sender_comp_id"]],
+                    store=self.stores[config["sender_comp_id"]],
+                    orders=self.orders[config["sender_comp_id"]],
+                    refdata=self.refdata.get(config["target_comp_id"]),
+                )
+                for config in self.configs
+            )
+        )
+
+    def close(self):
+        """
+        Close all stores.
+        """
+
+        for store in self.stores.values():
+            if store is not None:
+                store.close()
+
+    def _log_stats(self):
+        for sender_comp_id, stats in self.stats.items():
+            logging.info("[STATS] sender_comp_id=%s, %s", sender_comp_id, stats)
+            self.latency[sender_comp_id].log(f"sender_comp_id={sender_comp_id}")
+        self.timer_wheel.schedule(self.stats_interval, self._log_stats)
+
+    @staticmethod
+    def main(
+        sessions: str,
+        journal: str = None,
+        reconnect_delay: float = 0.1,
+        reconnect_delay_max: float = 30.0,
+        stats_interval: float = 60.0,
+        store_dir: str = None,
+        reset_seq_num: bool = False,
+        refdata_dir: str = None,
+        max_batch: int = 0,
+        max_delay: float = 0.0,
+        order_rate: float = 0.0,
+        order_burst: int = 1,
+        order_templates: bool = False,
+        write_buffer_high: int = None,
+        write_buffer_low: int = None,
+        max_queued: int = 1 << 22,
+        max_processing: float = 0.0,
+        session_class=MySession,
+    ):
+        """
+        Main function.
+        The sessions file is a JSON list of objects with network_address,
+        sender_comp_id, target_comp_id, username and (optionally) password.
+        """
+
+        with open(sessions, "r", encoding="utf-8") as file:
+            configs = json.load(file)
+
+        loop = asyncio.new_event_loop()
+
+        asyncio.set_event_loop(loop)
+
+        if journal is not None:
+            journal = Journal(journal)
+
+        engine = Engine(
+            loop,
+            session_class,
+            configs,
+            journal=journal,
+            reconnect_delay=reconnect_delay,
+            reconnect_delay_max=reconnect_delay_max,
+            stats_interval=stats_interval,
+            store_dir=store_dir,
+            reset_seq_num=reset_seq_num,
+            refdata_dir=refdata_dir,
+            max_batch=max_batch,
+            max_delay=max_delay,
+            order_rate=order_rate,
+            order_burst=order_burst,
+            order_templates=order_templates,
+            write_buffer_high=write_buffer_high,
+            write_buffer_low=write_buffer_low,
+            max_queued=max_queued,
+            max_processing=max_processing,
+        )
+
+        try:
+            loop.run_until_complete(engine.run())
+        finally:
+            engine.close()
+            if journal is not None:
+                journal.close()
+
+        loop.close()
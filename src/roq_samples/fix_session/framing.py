@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Incremental framing of a FIX byte stream
+"""
+
+
+class FrameBuffer:
+    """
+    Reusable receive buffer.
+
+    Bytes are appended at the write offset (tail) and consumed from the read
+    offset (head). The decoder is given a memoryview of the unconsumed region
+    so decoding a burst of messages never copies the buffer.
+    The consumed prefix is only discarded (compacted) when it exceeds a
+    threshold or when more space is needed.
+    The buffer is preallocated and only grows if a single message exceeds the
+    capacity, i.e. it is used as a ring where wrap-around is done by compaction.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 65536,
+        compact_threshold: int = None,
+        read_size: int = 16384,
+    ):
+        """
+        Constructor.
+        """
+
+        self.buffer = bytearray(capacity)
+        self.head = 0
+        self.tail = 0
+        self.compact_threshold = capacity // 2 if compact_threshold is None else compact_threshold
+        self.read_size = read_size
+
+    def __len__(self):
+        return self.tail - self.head
+
+    def append(self, data):
+        """
+        Copy data to the end of the buffer.
+        """
+
+        length = len(data)
+        self.reserve(length)
+        self.buffer[self.tail : self.tail + length] = data
+        self.tail += length
+
+    def reserve(self, length: int):
+        """
+        Ensure there is room for length bytes after the write offset.
+        """
+
+        if self.tail + length <= len(self.buffer):
+            return
+        self.compact()
+        if self.tail + length <= len(self.buffer):
+            return
+        # note! fails with BufferError if a memoryview is still exported
+        self.buffer.extend(bytes(max(length, len(self.buffer))))
+
+    def get_buffer(self, size_hint: int = -1):
+        """
+        Writable region after the write offset.
+        Used when the event loop reads directly into the buffer (BufferedProtocol).
+        """
+
+        self.reserve(max(size_hint, self.read_size))
+        return memoryview(self.buffer)[self.tail :]
+
+    def buffer_updated(self, length: int):
+        """
+        Advance the write offset after bytes were written to the region returned by get_buffer.
+        """
+
+        self.tail += length
+
+    def compact(self):
+        """
+        Move unconsumed bytes to the front of the buffer.
+        """
+
+        if self.head == 0:
+            return
+        length = self.tail - self.head
+        if length > 0:
+            with memoryview(self.buffer) as view:
+                view[:length] = view[self.head : self.tail]
+        self.head = 0
+        self.tail = length
+
+    def dispatch(self, decoder, callback) -> int:
+        """
+        Decode all complete messages.
+        Returns the number of messages decoded.
+        """
+
+        count = 0
+        with memoryview(self.buffer) as view:
+            while self.head < self.tail:
+                with view[self.head : self.tail] as frame:
+                    length = decoder.dispatch(callback, frame)
+                if length <= 0:  # need more data
+                    break
+                self.head += length
+                count += 1
+        if self.head == self.tail:  # no more data
+            self.head = 0
+            self.tail = 0
+        elif self.head >= self.compact_threshold:
+            self.compact()
+        return count
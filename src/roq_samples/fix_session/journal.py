@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Binary journal of raw FIX messages
+"""
+
+import logging
+import struct
+import threading
+import time
+
+
+# timestamp (nanoseconds since epoch), direction, length
+HEADER = struct.Struct("<qBI")
+
+INBOUND = 0
+OUTBOUND = 1
+
+
+class Journal:
+    """
+    Records raw inbound and outbound bytes.
+
+    The event loop (single producer) copies records into a preallocated ring
+    buffer. A background thread (single consumer) flushes the ring buffer to
+    disk. The producer never blocks: records are dropped (and counted) if the
+    ring buffer is full.
+
+    Head and tail are absolute (monotonic) offsets. Each is only ever updated
+    by one thread which makes a lock unnecessary.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = 1 << 22,
+        flush_interval: float = 0.1,
+    ):
+        """
+        Constructor.
+        """
+
+        self.buffer = bytearray(capacity)
+        self.capacity = capacity
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.flush_interval = flush_interval
+        self.file = open(path, "ab")  # pylint: disable=consider-using-with
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(
+            target=self._run,
+            name="journal",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def write(self, direction: int, data):
+        """
+        Append a record.
+        """
+
+        length = HEADER.size + len(data)
+        used = self.tail - self.head
+        if used + length > self.capacity:
+            self.dropped += 1
+            return
+        position = self._copy(self.tail, HEADER.pack(time.time_ns(), direction, len(data)))
+        self._copy(position, data)
+        self.tail += length
+        if used + length >= self.capacity // 2:
+            self.wakeup.set()
+
+    def close(self):
+        """
+        Flush outstanding records and stop the writer thread.
+        """
+
+        self.stopped = True
+        self.wakeup.set()
+        self.thread.join()
+        self.file.close()
+        if self.dropped > 0:
+            logging.warning("Journal dropped %d record(s)", self.dropped)
+
+    def _copy(self, offset: int, data) -> int:
+        """
+        Copy data into the ring buffer (with wrap-around).
+        """
+
+        length = len(data)
+        start = offset % self.capacity
+        first = min(length, self.capacity - start)
+        self.buffer[start : start + first] = data[:first]
+        if first < length:
+            self.buffer[: length - first] = data[first:]
+        return offset + length
+
+    def _run(self):
+        """
+        Writer thread.
+        """
+
+        while not self.stopped:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        """
+        Write all records between head and tail.
+        """
+
+        head, tail = self.head, self.tail
+        if head == tail:
+            return
+        start = head % self.capacity
+        end = start + (tail - head)
+        with memoryview(self.buffer) as view:
+            if end <= self.capacity:
+                self.file.write(view[start:end])
+            else:
+                self.file.write(view[start:])
+                self.file.write(view[: end - self.capacity])
+        self.file.flush()
+        self.head = tail
+
+
+def read(path: str):
+    """
+    Iterate the records of a journal file.
+    Yields (timestamp, direction, data).
+    """
+
+    with open(path, "rb") as file:
+        data = file.read()
+    offset = 0
+    while offset + HEADER.size <= len(data):
+        timestamp, direction, length = HEADER.unpack_from(data, offset)
+        offset += HEADER.size
+        yield timestamp, direction, data[offset : offset + length]
+        offset += length
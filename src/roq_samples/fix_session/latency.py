@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Round-trip latency of request/response pairs
+"""
+
+import array
+import logging
+import time
+
+import roq
+
+
+class Histogram:
+    """
+    Fixed memory log-linear histogram (HDR style).
+
+    Values below 2**bits are counted exactly. Larger values are bucketed by
+    their (bits - 1) most significant bits, i.e. the relative error is less
+    than 2**(1 - bits). Values above the maximum are clamped.
+    """
+
+    def __init__(self, bits: int = 8, max_value: int = 1 << 37):
+        """
+        Constructor.
+        """
+
+        self.bits = bits
+        self.half = 1 << (bits - 1)
+        self.max_value = max_value
+        self.counts = array.array("Q", bytes(8 * (self._index(max_value) + 1)))
+        self.count = 0
+        self.min = 0
+        self.max = 0
+        self.total = 0
+
+    def _index(self, value: int) -> int:
+        """
+        Bucket of a value.
+        """
+
+        shift = value.bit_length() - self.bits
+        if shift <= 0:
+            return value
+        return shift * self.half + (value >> shift)
+
+    def _value(self, index: int) -> int:
+        """
+        Lowest value of a bucket.
+        """
+
+        if index < 2 * self.half:
+            return index
+        shift = (index >> (self.bits - 1)) - 1
+        return (index - shift * self.half) << shift
+
+    def record(self, value: int):
+        """
+        Count a value.
+        """
+
+        value = min(max(value, 0), self.max_value)
+        self.counts[self._index(value)] += 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def reset(self):
+        """
+        Remove all values.
+        """
+
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.min = 0
+        self.max = 0
+        self.total = 0
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Value at percentile (0-100).
+        """
+
+        if self.count == 0:
+            return 0
+        target = max(1, int(self.count * percentile / 100.0 + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def __repr__(self):
+        if self.count == 0:
+            return "count=0"
+        p50, p90, p99, p999 = (self.percentile(percentile) for percentile in (50, 90, 99, 99.9))
+        return (
+            f"count={self.count}, min={self.min / 1000.0:.1f}us, p50={p50 / 1000.0:.1f}us, "
+            f"p90={p90 / 1000.0:.1f}us, p99={p99 / 1000.0:.1f}us, p99.9={p999 / 1000.0:.1f}us, "
+            f"max={self.max / 1000.0:.1f}us, mean={self.total / self.count / 1000.0:.1f}us"
+        )
+
+
+class Latency:
+    """
+    Matches requests with their first response and records the round-trip time (nanoseconds).
+
+    * NewOrderSingle -> ExecutionReport (by ClOrdID)
+    * TestRequest -> Heartbeat (by TestReqID)
+    * MarketDataRequest -> MarketDataSnapshotFullRefresh (by MDReqID)
+
+    At most max_pending requests are remembered per type (oldest are forgotten).
+    """
+
+    def __init__(self, max_pending: int = 10000):
+        """
+        Constructor.
+        """
+
+        self.max_pending = max_pending
+        self.requests = {
+            roq.codec.fix.NewOrderSingle: ("order", "cl_ord_id"),
+            roq.codec.fix.TestRequest: ("test_request", "test_req_id"),
+            roq.codec.fix.MarketDataRequest: ("market_data", "md_req_id"),
+        }
+        self.responses = {
+            roq.codec.fix.ExecutionReport: ("order", "cl_ord_id"),
+            roq.codec.fix.Heartbeat: ("test_request", "test_req_id"),
+            roq.codec.fix.MarketDataSnapshotFullRefresh: ("market_data", "md_req_id"),
+        }
+        self.histograms = {name: Histogram() for name, _ in self.requests.values()}
+        self.pending = {name: {} for name in self.histograms}
+
+    def sent(self, obj):
+        """
+        Called when a message is sent.
+        """
+
+        request = self.requests.get(type(obj))
+        if request is not None:
+            name, field = request
+            self.start(name, getattr(obj, field))
+
+    def start(self, name: str, request_id: str):
+        """
+        Remember the time a request was sent.
+        """
+
+        pending = self.pending[name]
+        if len(pending) >= self.max_pending:
+            del pending[next(iter(pending))]
+        pending[request_id] = time.perf_counter_ns()
+
+    def received(self, obj):
+        """
+        Called when a message is received.
+        """
+
+        response = self.responses.get(type(obj))
+        if response is None:
+            return
+        name, field = response
+        start = self.pending[name].pop(getattr(obj, field), None)
+        if start is not None:
+            self.histograms[name].record(time.perf_counter_ns() - start)
+
+    def percentile(self, name: str, percentile: float) -> int:
+        """
+        Round-trip time (nanoseconds) at percentile (0-100).
+        """
+
+        return self.histograms[name].percentile(percentile)
+
+    def log(self, label: str):
+        """
+        Log all histograms having values.
+        """
+
+        for name, histogram in self.histograms.items():
+            if histogram.count > 0:
+                logging.info("[LATENCY] %s, type=%s, %s", label, name, histogram)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Network addresses (unix domain socket path or host:port)
+"""
+
+
+def split(network_address: str):
+    """
+    Returns (host, port) for a TCP address or None for a path.
+    """
+
+    if "/" in network_address or ":" not in network_address:
+        return None
+    host, port = network_address.rsplit(":", 1)
+    return host, int(port)
+
+
+async def connect(loop, protocol_factory, network_address: str):
+    """
+    Create a connection.
+    """
+
+    address = split(network_address)
+    if address is None:
+        return await loop.create_unix_connection(protocol_factory, path=network_address)
+    host, port = address
+    return await loop.create_connection(protocol_factory, host=host, port=port)
+
+
+async def listen(loop, protocol_factory, network_address: str):
+    """
+    Create a server.
+    """
+
+    address = split(network_address)
+    if address is None:
+        return await loop.create_unix_server(protocol_factory, path=network_address)
+    host, port = address
+    return await loop.create_server(protocol_factory, host=host, port=port)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Order state maintained from execution reports
+"""
+
+import collections
+import logging
+
+import roq
+
+
+# note! used by status responses for unknown orders
+UNKNOWN_ORDER_ID = "NONE"
+
+
+def _order_id(execution_report) -> str:
+    """
+    OrderID (empty if not known).
+    """
+
+    order_id = execution_report.order_id
+    return "" if order_id == UNKNOWN_ORDER_ID else order_id
+
+
+class Order:
+    """
+    Order state.
+    """
+
+    __slots__ = (
+        "cl_ord_id",
+        "order_id",
+        "symbol",
+        "side",
+        "ord_status",
+        "order_qty",
+        "price",
+        "cum_qty",
+        "leaves_qty",
+        "avg_px",
+    )
+
+    def __init__(self, cl_ord_id: str, order_id: str, symbol: str, side):
+        """
+        Constructor.
+        """
+
+        self.cl_ord_id = cl_ord_id
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.ord_status = None
+        self.order_qty = 0.0
+        self.price = 0.0
+        self.cum_qty = 0.0
+        self.leaves_qty = 0.0
+        self.avg_px = 0.0
+
+    def __repr__(self):
+        return ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__)
+
+
+class OrderStates:
+    """
+    Live orders indexed by ClOrdID and by OrderID.
+
+    Execution reports are applied incrementally. A replace moves the order to
+    its new ClOrdID. Reports identifying no order (neither ClOrdID nor OrderID,
+    e.g. status responses for unknown orders) are ignored. Orders reaching a
+    terminal status are moved to a bounded history (oldest evicted first) so
+    late reports can still be resolved.
+    """
+
+    def __init__(self, history: int = 10000):
+        """
+        Constructor.
+        """
+
+        self.live = {}
+        self.by_order_id = {}
+        self.history = collections.OrderedDict()
+        self.history_size = history
+        self.terminal = frozenset(
+            (
+                roq.fix.OrdStatus.FILLED,
+                roq.fix.OrdStatus.CANCELED,
+                roq.fix.OrdStatus.REJECTED,
+                roq.fix.OrdStatus.EXPIRED,
+                roq.fix.OrdStatus.DONE_FOR_DAY,
+            )
+        )
+
+    def __len__(self):
+        return len(self.live)
+
+    def get(self, cl_ord_id: str) -> Order:
+        """
+        Order (live or from history) or None.
+        """
+
+        order = self.live.get(cl_ord_id)
+        if order is None:
+            order = self.history.get(cl_ord_id)
+        return order
+
+    def get_by_order_id(self, order_id: str) -> Order:
+        """
+        Live order or None.
+        """
+
+        return self.by_order_id.get(order_id)
+
+    def apply(self, execution_report) -> Order:
+        """
+        Update order state.
+        Returns None if the report does not identify an order.
+        """
+
+        order_id = _order_id(execution_report)
+        cl_ord_id = execution_report.cl_ord_id or order_id
+        if len(cl_ord_id) == 0:
+            logging.debug("Execution report without cl_ord_id or order_id")
+            return None
+        order = self.live.get(cl_ord_id)
+        if order is None:
+            order = self._find(execution_report, order_id)
+        if order is None:
+            if cl_ord_id in self.history:
+                logging.debug("Late execution report for cl_ord_id=%s", cl_ord_id)
+                return self.history[cl_ord_id]
+            order = Order(cl_ord_id, order_id, execution_report.symbol, execution_report.side)
+            self.live[cl_ord_id] = order
+        if len(order_id) > 0 and order.order_id != order_id:
+            self.by_order_id.pop(order.order_id, None)
+            order.order_id = order_id
+        if len(order.order_id) > 0:
+            self.by_order_id[order.order_id] = order
+        order.ord_status = execution_report.ord_status
+        order.order_qty = execution_report.order_qty
+        order.price = execution_report.price
+        order.cum_qty = execution_report.cum_qty
+        order.leaves_qty = execution_report.leaves_qty
+        order.avg_px = execution_report.avg_px
+        if order.ord_status in self.terminal:
+            self._retire(order)
+        return order
+
+    def _find(self, execution_report, order_id):
+        """
+        Locate an order which has been replaced (new ClOrdID) or is only known by OrderID.
+        """
+
+        order = None
+        orig_cl_ord_id = execution_report.orig_cl_ord_id
+        if len(orig_cl_ord_id) > 0:
+            order = self.live.get(orig_cl_ord_id)
+        if order is None and len(order_id) > 0:
+            order = self.by_order_id.get(order_id)
+        if order is None:
+            return None
+        if len(execution_report.cl_ord_id) > 0 and order.cl_ord_id != execution_report.cl_ord_id:
+            del self.live[order.cl_ord_id]
+            order.cl_ord_id = execution_report.cl_ord_id
+            self.live[order.cl_ord_id] = order
+        return order
+
+    def _retire(self, order):
+        del self.live[order.cl_ord_id]
+        self.by_order_id.pop(order.order_id, None)
+        self.history[order.cl_ord_id] = order
+        if len(self.history) > self.history_size:
+            self.history.popitem(last=False)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Persistent reference data
+"""
+
+import contextlib
+import fcntl
+import logging
+import math
+import os
+import struct
+import time
+
+# magic, version
+HEADER = struct.Struct("<8sI")
+
+# length of symbol, security_exchange and currency,
+# min_price_increment, contract_multiplier, min_trade_vol
+RECORD = struct.Struct("<HHH3d")
+
+MAGIC = b"ROQFIXRD"
+VERSION = 1
+
+
+class Instrument:
+    """
+    Reference data for an instrument.
+    """
+
+    __slots__ = (
+        "symbol",
+        "security_exchange",
+        "currency",
+        "min_price_increment",
+        "contract_multiplier",
+        "min_trade_vol",
+    )
+
+    def __init__(
+        self,
+        symbol: str,
+        security_exchange: str,
+        currency: str = "",
+        min_price_increment: float = math.nan,
+        contract_multiplier: float = math.nan,
+        min_trade_vol: float = math.nan,
+    ):
+        """
+        Constructor.
+        """
+
+        self.symbol = symbol
+        self.security_exchange = security_exchange
+        self.currency = currency
+        self.min_price_increment = min_price_increment
+        self.contract_multiplier = contract_multiplier
+        self.min_trade_vol = min_trade_vol
+
+    @classmethod
+    def create(cls, obj):
+        """
+        From a SecurityDefinition or a SecurityList entry (missing fields are left undefined).
+        """
+
+        return cls(
+            obj.symbol,
+            obj.security_exchange,
+            getattr(obj, "currency", ""),
+            getattr(obj, "min_price_increment", math.nan),
+            getattr(obj, "contract_multiplier", math.nan),
+            getattr(obj, "min_trade_vol", math.nan),
+        )
+
+    def key(self):
+        """
+        Instruments are identified by exchange and symbol.
+        """
+
+        return self.security_exchange, self.symbol
+
+    def merge(self, other):
+        """
+        Returns a copy updated with the defined fields of other.
+        """
+
+        def choose(value, update):
+            if isinstance(update, float) and math.isnan(update):
+                return value
+            return update or value
+
+        return Instrument(
+            self.symbol,
+            self.security_exchange,
+            choose(self.currency, other.currency),
+            choose(self.min_price_increment, other.min_price_increment),
+            choose(self.contract_multiplier, other.contract_multiplier),
+            choose(self.min_trade_vol, other.min_trade_vol),
+        )
+
+    def encode(self) -> bytes:
+        """
+        Binary record.
+        """
+
+        symbol = self.symbol.encode()
+        security_exchange = self.security_exchange.encode()
+        currency = self.currency.encode()
+        return (
+            RECORD.pack(
+                len(symbol),
+                len(security_exchange),
+                len(currency),
+                self.min_price_increment,
+                self.contract_multiplier,
+                self.min_trade_vol,
+            )
+            + symbol
+            + security_exchange
+            + currency
+        )
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        # note! nan compares equal to nan (undefined is unchanged)
+        def undefined(value):
+            return isinstance(value, float) and math.isnan(value)
+
+        values = zip(self._values(), other._values())
+        return all(a == b or undefined(a) and undefined(b) for a, b in values)
+
+    def __repr__(self):
+        return ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__)
+
+
+class ReferenceData:
+    """
+    Instruments persisted to a compact binary file.
+
+    The file is an append-only log of records (the last record for an
+    instrument wins). Only instruments which are new or have changed are
+    appended and the file is rewritten when it has grown to twice the number
+    of instruments.
+
+    The file may be shared by several processes (e.g. supervisor workers
+    using the same counterparty): writes are serialized by an exclusive lock
+    and the file is re-read before being rewritten, i.e. changes written by
+    other processes are kept.
+    """
+
+    def __init__(self, path: str):
+        """
+        Constructor.
+        """
+
+        self.path = path
+        self.instruments = {}
+        self.records = 0
+        self.pending = []
+        if os.path.exists(path):
+            self._load()
+
+    def __len__(self):
+        return len(self.instruments)
+
+    def __contains__(self, key):
+        return key in self.instruments
+
+    def get(self, security_exchange: str, symbol: str) -> Instrument:
+        """
+        Instrument or None.
+        """
+
+        return self.instruments.get((security_exchange, symbol))
+
+    def update(self, obj) -> bool:
+        """
+        Apply a SecurityDefinition or a SecurityList entry.
+        Returns True if the instrument is new or has changed.
+        """
+
+        instrument = Instrument.create(obj)
+        previous = self.instruments.get(instrument.key())
+        if previous is not None:
+            instrument = previous.merge(instrument)
+            if instrument == previous:
+                return False
+        self.instruments[instrument.key()] = instrument
+        self.pending.append(instrument)
+        return True
+
+    def flush(self):
+        """
+        Write pending changes.
+        """
+
+        if not self.pending:
+            return
+        with self._lock():
+            if self.records + len(self.pending) > max(2 * len(self.instruments), 1024):
+                self._compact()
+            else:
+                with open(self.path, "ab") as file:
+                    if file.tell() == 0:
+                        file.write(HEADER.pack(MAGIC, VERSION))
+                    file.write(b"".join(instrument.encode() for instrument in self.pending))
+                self.records += len(self.pending)
+        logging.debug("Reference data: %d change(s) written to %s", len(self.pending), self.path)
+        self.pending.clear()
+
+    @contextlib.contextmanager
+    def _lock(self):
+        # note! a separate file, the data file is replaced when compacted
+        with open(f"{self.path}.lock", "wb") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def _load(self):
+        start = time.monotonic()
+        self.instruments, self.records = self._read()
+        logging.info(
+            "Reference data: loaded %d instrument(s) from %s (%.3fms)",
+            len(self.instruments),
+            self.path,
+            (time.monotonic() - start) * 1000.0,
+        )
+
+    def _read(self):
+        instruments = {}
+        records = 0
+        with open(self.path, "rb") as file:
+            data = file.read()
+        if len(data) < HEADER.size:
+            return instruments, records
+        magic, version = HEADER.unpack_from(data, 0)
+        assert magic == MAGIC and version == VERSION, f"unexpected format of {self.path}"
+        offset = HEADER.size
+        while offset + RECORD.size <= len(data):
+            fields = RECORD.unpack_from(data, offset)
+            symbol_length, exchange_length, currency_length, *values = fields
+            begin = offset + RECORD.size
+            end = begin + symbol_length + exchange_length + currency_length
+            if end > len(data):  # note! incomplete (e.g. interrupted) write
+                break
+            symbol = data[begin : begin + symbol_length].decode()
+            begin += symbol_length
+            security_exchange = data[begin : begin + exchange_length].decode()
+            begin += exchange_length
+            currency = data[begin:end].decode()
+            instrument = Instrument(symbol, security_exchange, currency, *values)
+            instruments[instrument.key()] = instrument
+            records += 1
+            offset = end
+        return instruments, records
+
+    def _compact(self):
+        # note! other processes may have written changes since the file was loaded
+        if os.path.exists(self.path):
+            self.instruments, _ = self._read()
+            for instrument in self.pending:
+                self.instruments[instrument.key()] = instrument
+        path = f"{self.path}.tmp"
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION))
+            file.write(b"".join(instrument.encode() for instrument in self.instruments.values()))
+        os.replace(path, self.path)
+        self.records = len(self.instruments)
+
+
+def open_refdata(directory: str, target_comp_id: str) -> ReferenceData:
+    """
+    Reference data for a counterparty (one file per target comp id).
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    return ReferenceData(os.path.join(directory, f"{target_comp_id}.refdata"))
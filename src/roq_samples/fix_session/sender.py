@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Outbound write scheduling
+"""
+
+import weakref
+
+
+class SendScheduler:
+    """
+    Coalesces writes from all sessions on an event loop.
+
+    Sessions queue encoded messages. The queues of all sessions are flushed
+    once per loop iteration (a single loop.call_soon), i.e. each session does
+    at most one write per loop iteration.
+
+    The flush happens earlier if a session has queued max_batch messages or
+    if the oldest queued message has waited max_delay seconds (a long running
+    callback would otherwise hold back everything it sends).
+    Zero disables the limit.
+    """
+
+    _schedulers = weakref.WeakKeyDictionary()
+
+    def __init__(self, loop, max_batch: int = 0, max_delay: float = 0.0):
+        """
+        Constructor.
+        """
+
+        self.loop = loop
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = []
+        self.handle = None
+        self.first_queued = 0.0
+        self.writes = 0
+
+    @classmethod
+    def get(cls, loop):
+        """
+        Shared send scheduler for an event loop.
+        """
+
+        scheduler = cls._schedulers.get(loop)
+        if scheduler is None:
+            scheduler = cls(loop)
+            cls._schedulers[loop] = scheduler
+        return scheduler
+
+    def write(self, session, message):
+        """
+        Queue an encoded message.
+        """
+
+        if not session.send_queue:
+            self.pending.append(session)
+        session.send_queue.append(message)
+        if self.handle is None:
+            self.handle = self.loop.call_soon(self.flush)
+            if self.max_delay > 0:
+                self.first_queued = self.loop.time()
+        if 0 < self.max_batch <= len(session.send_queue):
+            self.flush()
+        elif self.max_delay > 0 and self.loop.time() - self.first_queued >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        """
+        Flush all sessions with queued messages.
+        """
+
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        pending, self.pending = self.pending, []
+        self.writes += len(pending)
+        for session in pending:
+            session._flush()  # pylint: disable=protected-access
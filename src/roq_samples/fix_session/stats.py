@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Session statistics
+"""
+
+
+class SessionStats:
+    """
+    Counters for a session.
+    Survives reconnects.
+    """
+
+    __slots__ = (
+        "connects",
+        "disconnects",
+        "messages_received",
+        "messages_sent",
+        "bytes_received",
+        "bytes_sent",
+        "write_pauses",
+        "write_blocked",
+        "read_pauses",
+        "read_blocked",
+    )
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+
+        self.connects = 0
+        self.disconnects = 0
+        self.messages_received = 0
+        self.messages_sent = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.write_pauses = 0
+        self.write_blocked = 0.0
+        self.read_pauses = 0
+        self.read_blocked = 0.0
+
+    def asdict(self) -> dict:
+        """
+        Counters by name.
+        """
+
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Persistent sequence numbers and outbound messages
+"""
+
+import mmap
+import os
+import struct
+
+
+# magic, version, next outbound, next inbound
+HEADER = struct.Struct("<8sIxxxxQQ")
+
+# msg_seq_num, length
+RECORD = struct.Struct("<QI")
+
+MAGIC = b"ROQFIXSS"
+VERSION = 1
+
+
+class SequenceStore:
+    """
+    Append-only memory-mapped file.
+
+    The header holds the next outbound and inbound sequence numbers.
+    Outbound messages are appended (as encoded) and indexed by MsgSeqNum,
+    i.e. a resend request is served directly from the mapping.
+    The file grows by doubling (the mapping is re-created) until the session is reset.
+    """
+
+    def __init__(self, path: str, capacity: int = 1 << 24):
+        """
+        Constructor.
+        """
+
+        self.path = path
+        self.capacity = capacity
+        exists = os.path.exists(path) and os.path.getsize(path) >= HEADER.size
+        self.file = open(path, "r+b" if exists else "w+b")  # pylint: disable=consider-using-with
+        size = max(capacity, os.path.getsize(path))
+        self.file.truncate(size)
+        self.mmap = mmap.mmap(self.file.fileno(), size)
+        self.index = {}
+        if exists:
+            magic, version, self.next_outbound, self.next_inbound = HEADER.unpack_from(self.mmap, 0)
+            assert magic == MAGIC and version == VERSION, f"unexpected format of {path}"
+            self.tail = self._scan()
+        else:
+            self.next_outbound = 1
+            self.next_inbound = 1
+            self.tail = HEADER.size
+            self._update()
+
+    def _scan(self) -> int:
+        """
+        Rebuild the index.
+        Returns the write offset.
+        """
+
+        offset = HEADER.size
+        size = len(self.mmap)
+        while offset + RECORD.size <= size:
+            msg_seq_num, length = RECORD.unpack_from(self.mmap, offset)
+            if msg_seq_num == 0:  # end of data
+                break
+            self.index[msg_seq_num] = offset
+            offset += RECORD.size + length
+        return offset
+
+    def _update(self):
+        HEADER.pack_into(self.mmap, 0, MAGIC, VERSION, self.next_outbound, self.next_inbound)
+
+    def _reserve(self, length: int):
+        size = len(self.mmap)
+        if self.tail + length + RECORD.size <= size:  # note! room for the end marker
+            return
+        while self.tail + length + RECORD.size > size:
+            size *= 2
+        self.mmap.close()
+        self.file.truncate(size)
+        self.mmap = mmap.mmap(self.file.fileno(), size)
+
+    def append(self, msg_seq_num: int, message):
+        """
+        Store an outbound message.
+        """
+
+        length = RECORD.size + len(message)
+        self._reserve(length)
+        offset = self.tail
+        self.mmap[offset + RECORD.size : offset + length] = message
+        RECORD.pack_into(self.mmap, offset + length, 0, 0)  # end marker
+        RECORD.pack_into(self.mmap, offset, msg_seq_num, len(message))
+        self.index[msg_seq_num] = offset
+        self.tail += length
+        self.next_outbound = msg_seq_num + 1
+        self._update()
+
+    def set_next_inbound(self, msg_seq_num: int):
+        """
+        Next expected inbound sequence number.
+        """
+
+        self.next_inbound = msg_seq_num
+        self._update()
+
+    def get(self, msg_seq_num: int):
+        """
+        Stored outbound message or None.
+        """
+
+        offset = self.index.get(msg_seq_num)
+        if offset is None:
+            return None
+        _, length = RECORD.unpack_from(self.mmap, offset)
+        begin = offset + RECORD.size
+        return self.mmap[begin : begin + length]
+
+    def reset(self):
+        """
+        Forget all messages and restart sequence numbers from 1 (a new FIX session).
+        The file is shrunk to its initial capacity.
+        """
+
+        if len(self.mmap) > self.capacity:
+            self.mmap.close()
+            self.file.truncate(self.capacity)
+            self.mmap = mmap.mmap(self.file.fileno(), self.capacity)
+        self.mmap[HEADER.size : HEADER.size + RECORD.size] = bytes(RECORD.size)
+        self.index.clear()
+        self.tail = HEADER.size
+        self.next_outbound = 1
+        self.next_inbound = 1
+        self._update()
+
+    def flush(self):
+        """
+        Write changes to disk.
+        """
+
+        self.mmap.flush()
+
+    def close(self):
+        """
+        Write changes to disk and release the file.
+        """
+
+        self.mmap.flush()
+        self.mmap.close()
+        self.file.close()
+
+
+def open_store(
+    directory: str,
+    sender_comp_id: str,
+    target_comp_id: str,
+    reset: bool = False,
+) -> SequenceStore:
+    """
+    Store for a session (one file per comp id pair).
+    With reset, a new FIX session is started (e.g. at the start of day).
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    store = SequenceStore(os.path.join(directory, f"{sender_comp_id}-{target_comp_id}.store"))
+    if reset:
+        store.reset()
+    return store
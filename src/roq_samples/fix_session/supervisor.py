@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Demonstrates how to spread FIX sessions across worker processes
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import zlib
+
+from .backoff import Backoff
+from .client import MyBufferedSession, MySession
+from .engine import Engine
+from .journal import Journal
+from .stats import SessionStats
+
+
+def shard(sender_comp_id: str, workers: int) -> int:
+    """
+    Stable assignment of a session to a worker.
+    """
+
+    return zlib.crc32(sender_comp_id.encode()) % workers
+
+
+class WorkerEngine(Engine):
+    """
+    Engine reporting aggregated statistics to the supervisor.
+    """
+
+    def __init__(self, *args, worker: int, metrics_address: str, **kwargs):
+        """
+        Constructor.
+        """
+
+        super().__init__(*args, **kwargs)
+        self.worker = worker
+        self.metrics_address = metrics_address
+        self.metrics = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.metrics.setblocking(False)
+
+    def _log_stats(self):
+        totals = SessionStats()
+        for stats in self.stats.values():
+            for name in SessionStats.__slots__:
+                setattr(totals, name, getattr(totals, name) + getattr(stats, name))
+        for sender_comp_id, latency in self.latency.items():
+            latency.log(f"worker={self.worker}, sender_comp_id={sender_comp_id}")
+        report = {
+            "worker": self.worker,
+            "pid": os.getpid(),
+            "sessions": len(self.stats),
+            "stats": totals.asdict(),
+        }
+        try:
+            self.metrics.sendto(json.dumps(report).encode(), self.metrics_address)
+        except OSError as err:
+            logging.warning("Unable to report metrics: %s", err)
+        self.timer_wheel.schedule(self.stats_interval, self._log_stats)
+
+
+def _worker(
+    worker: int,
+    configs: list,
+    metrics_address: str,
+    loglevel: str,
+    buffered: bool = False,
+    journal: str = None,
+    **kwargs,
+):
+    """
+    Worker process.
+    """
+
+    logging.basicConfig(level=loglevel)
+
+    logging.info("Worker %d started with %d session(s)", worker, len(configs))
+
+    loop = asyncio.new_event_loop()
+
+    asyncio.set_event_loop(loop)
+
+    if journal is not None:
+        journal = Journal(f"{journal}.{worker}")
+
+    engine = WorkerEngine(
+        loop,
+        MyBufferedSession if buffered else MySession,
+        configs,
+        worker=worker,
+        metrics_address=metrics_address,
+        journal=journal,
+        **kwargs,
+    )
+
+    try:
+        loop.run_until_complete(engine.run())
+    finally:
+        engine.close()
+        if journal is not None:
+            journal.close()
+
+    loop.close()
+
+
+class Metrics(asyncio.DatagramProtocol):
+    """
+    Receives worker reports.
+    """
+
+    def __init__(self, reports: dict):
+        """
+        Constructor.
+        """
+
+        self.reports = reports
+
+    def datagram_received(self, data, addr):
+        report = json.loads(data)
+        self.reports[report["worker"]] = report
+
+
+class Supervisor:
+    """
+    Starts worker processes, restarts crashed workers and combines metrics.
+    """
+
+    def __init__(
+        self,
+        loop,
+        sessions: list,
+        workers: int,
+        metrics_address: str,
+        stats_interval: float = 60.0,
+        reset_seq_num: bool = False,
+        **kwargs,
+    ):
+        """
+        Constructor.
+        """
+
+        self.loop = loop
+        self.workers = workers
+        self.metrics_address = metrics_address
+        self.stats_interval = stats_interval
+        self.reset_seq_num = reset_seq_num
+        self.kwargs = kwargs
+        self.shards = [[] for _ in range(workers)]
+        for config in sessions:
+            self.shards[shard(config["sender_comp_id"], workers)].append(config)
+        self.context = multiprocessing.get_context("spawn")
+        self.processes = [None] * workers
+        self.backoff = [Backoff(1.0, 60.0) for _ in range(workers)]
+        self.restart_at = [0.0] * workers
+        self.reports = {}
+
+    async def run(self):
+        """
+        Supervise all workers.
+        """
+
+        if os.path.exists(self.metrics_address):
+            os.unlink(self.metrics_address)
+        await self.loop.create_datagram_endpoint(
+            lambda: Metrics(self.reports),
+            local_addr=self.metrics_address,
+            family=socket.AF_UNIX,
+        )
+        for worker in range(self.workers):
+            self._start(worker)
+        elapsed = 0.0
+        while True:
+            await asyncio.sleep(1.0)
+            self._check()
+            elapsed += 1.0
+            if self.stats_interval > 0 and elapsed >= self.stats_interval:
+                elapsed = 0.0
+                self._log_stats()
+
+    def _start(self, worker: int):
+        if not self.shards[worker]:
+            return
+        process = self.context.Process(
+            target=_worker,
+            name=f"worker-{worker}",
+            args=(worker, self.shards[worker], self.metrics_address),
+            kwargs=dict(
+                stats_interval=self.stats_interval,
+                # note! a restarted worker continues the session
+                reset_seq_num=self.reset_seq_num and self.processes[worker] is None,
+                **self.kwargs,
+            ),
+            daemon=True,
+        )
+        process.start()
+        self.processes[worker] = process
+
+    def _check(self):
+        """
+        Restart (with backoff) workers that have exited.
+        """
+
+        now = self.loop.time()
+        for worker, process in enumerate(self.processes):
+            if process is None:
+                continue
+            if process.is_alive():
+                if worker in self.reports:
+                    self.backoff[worker].reset()
+                continue
+            if self.restart_at[worker] == 0.0:
+                delay = self.backoff[worker].next()
+                logging.warning(
+                    "Worker %d exited (exitcode=%s), restarting in %.3fs...",
+                    worker,
+                    process.exitcode,
+                    delay,
+                )
+                self.restart_at[worker] = now + delay
+                self.reports.pop(worker, None)
+            elif now >= self.restart_at[worker]:
+                self.restart_at[worker] = 0.0
+                self._start(worker)
+
+    def _log_stats(self):
+        totals = SessionStats()
+        sessions = 0
+        for worker, report in sorted(self.reports.items()):
+            logging.info(
+                "[STATS] worker=%d, pid=%d, sessions=%d, %s",
+                worker,
+                report["pid"],
+                report["sessions"],
+                report["stats"],
+            )
+            sessions += report["sessions"]
+            for name in SessionStats.__slots__:
+                setattr(totals, name, getattr(totals, name) + report["stats"][name])
+        logging.info("[STATS] workers=%d, sessions=%d, %s", len(self.reports), sessions, totals)
+
+    @staticmethod
+    def main(
+        sessions: str,
+        workers: int,
+        metrics_address: str = None,
+        **kwargs,
+    ):
+        """
+        Main function.
+        """
+
+        with open(sessions, "r", encoding="utf-8") as file:
+            configs = json.load(file)
+
+        loop = asyncio.new_event_loop()
+
+        asyncio.set_event_loop(loop)
+
+        with tempfile.TemporaryDirectory() as directory:
+            if metrics_address is None:
+                metrics_address = os.path.join(directory, "metrics.sock")
+
+            supervisor = Supervisor(
+                loop,
+                configs,
+                workers,
+                metrics_address,
+                loglevel=logging.getLevelName(logging.getLogger().getEffectiveLevel()),
+                **kwargs,
+            )
+
+            try:
+                loop.run_until_complete(supervisor.run())
+            finally:
+                for process in supervisor.processes:
+                    if process is not None and process.is_alive():
+                        process.terminate()
+
+        loop.close()
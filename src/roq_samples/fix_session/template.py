@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Pre-encoded order messages
+"""
+
+from datetime import datetime
+
+import roq
+
+from . import wire
+
+
+# space reserved in front of the body for BeginString and BodyLength
+HEAD_ROOM = 32
+
+# fields patched for every order
+MSG_SEQ_NUM = 34
+SENDING_TIME = 52
+CL_ORD_ID = 11
+PRICE = 44
+ORDER_QTY = 38
+TRANSACT_TIME = 60
+
+
+def decimal(value) -> bytes:
+    """
+    Format a price or quantity (no exponent, no trailing zeros).
+    """
+
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, int):
+        return b"%d" % value
+    return (b"%.12f" % value).rstrip(b"0").rstrip(b".")
+
+
+class OrderTemplate:
+    """
+    NewOrderSingle encoded once for an (account, symbol, side).
+
+    The encoded message is split into static segments and the fields which
+    change between orders. Rendering copies segments and values into a
+    reusable buffer and the checksum of the static segments is precomputed,
+    i.e. only the patched values are summed.
+    """
+
+    def __init__(
+        self,
+        sender_comp_id: str,
+        target_comp_id: str,
+        account: str,
+        exchange: str,
+        symbol: str,
+        side,
+        ord_type=roq.fix.OrdType.LIMIT,
+        time_in_force=roq.fix.TimeInForce.GTC,
+    ):
+        """
+        Constructor.
+        """
+
+        # note! separate encoder, the session's sequence numbers are not affected
+        encoder = roq.codec.fix.Encoder(
+            sender_comp_id=sender_comp_id,
+            target_comp_id=target_comp_id,
+        )
+        new_order_single = roq.codec.fix.NewOrderSingle(
+            cl_ord_id="0",
+            account=account,
+            symbol=symbol,
+            security_exchange=exchange,
+            side=side,
+            transact_time=datetime.now(),
+            order_qty=1,
+            ord_type=ord_type,
+            price=1,
+            time_in_force=time_in_force,
+        )
+        message = encoder.encode(new_order_single, datetime.now())
+        begin_string, body = wire.split(message)
+        locations = []
+        for tag in (MSG_SEQ_NUM, SENDING_TIME, CL_ORD_ID, PRICE, ORDER_QTY, TRANSACT_TIME):
+            location = wire.find(body, tag)
+            if location is not None:
+                locations.append((location, tag))
+        locations.sort()
+        self.tags = []
+        self.segments = []
+        offset = 0
+        for (begin, end), tag in locations:
+            self.segments.append(bytes(body[offset:begin]))
+            self.tags.append(tag)
+            offset = end
+        self.segments.append(bytes(body[offset:]))
+        self.prefix = b"8=" + begin_string + wire.SOH + b"9="
+        self.checksum = sum(self.prefix) + sum(wire.SOH)
+        self.checksum += sum(sum(segment) for segment in self.segments)
+        self.length = sum(len(segment) for segment in self.segments)
+        self.buffer = bytearray(HEAD_ROOM + 2 * len(message))
+        self.sending_time = None
+        self.sending_time_encoded = None
+
+    def render(
+        self,
+        msg_seq_num: int,
+        sending_time: datetime,
+        cl_ord_id,
+        price,
+        order_qty,
+    ) -> bytes:
+        """
+        Encode an order.
+        """
+
+        if sending_time is not self.sending_time:  # note! the session clock returns a cached object
+            self.sending_time = sending_time
+            self.sending_time_encoded = wire.sending_time(sending_time)
+        values = {
+            MSG_SEQ_NUM: b"%d" % msg_seq_num,
+            SENDING_TIME: self.sending_time_encoded,
+            CL_ORD_ID: cl_ord_id.encode() if isinstance(cl_ord_id, str) else cl_ord_id,
+            PRICE: decimal(price),
+            ORDER_QTY: decimal(order_qty),
+            TRANSACT_TIME: self.sending_time_encoded,
+        }
+        length = self.length
+        checksum = self.checksum
+        for tag in self.tags:
+            value = values[tag]
+            length += len(value)
+            checksum += sum(value)
+        if HEAD_ROOM + length + 7 > len(self.buffer):
+            self.buffer.extend(bytes(HEAD_ROOM + length + 7 - len(self.buffer)))
+        buffer = self.buffer
+        offset = HEAD_ROOM
+        for segment, tag in zip(self.segments, self.tags):
+            end = offset + len(segment)
+            buffer[offset:end] = segment
+            value = values[tag]
+            offset = end + len(value)
+            buffer[end:offset] = value
+        segment = self.segments[-1]
+        end = offset + len(segment)
+        buffer[offset:end] = segment
+        body_length = b"%d" % length
+        checksum += sum(body_length)
+        begin = HEAD_ROOM - len(self.prefix) - len(body_length) - 1
+        buffer[begin : begin + len(self.prefix)] = self.prefix
+        buffer[HEAD_ROOM - len(body_length) - 1 : HEAD_ROOM - 1] = body_length
+        buffer[HEAD_ROOM - 1] = 1
+        buffer[end : end + 7] = b"10=%03d\x01" % (checksum % 256)
+        # note! copied, the transport may hold on to the data
+        return bytes(buffer[begin : end + 7])
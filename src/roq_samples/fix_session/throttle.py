@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Rate limited order flow
+"""
+
+import heapq
+import logging
+import time
+
+import roq
+
+
+# priorities (lower is sent first)
+CANCEL = 0
+AMEND = 1
+NEW = 2
+
+
+class TokenBucket:
+    """
+    Token bucket (rate tokens per second, at most burst tokens).
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock=time.monotonic):
+        """
+        Constructor.
+        """
+
+        assert rate > 0, "rate must be positive"
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.tokens = float(self.burst)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> bool:
+        """
+        Consume a token (if available).
+        """
+
+        self._refill()
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    def delay(self) -> float:
+        """
+        Seconds until the next token is available.
+        """
+
+        self._refill()
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+
+class Entry:
+    """
+    Queued order request.
+    A queued amend is also indexed by its own ClOrdID (alias), i.e. later requests may refer to it.
+    """
+
+    __slots__ = ("priority", "key", "alias", "message")
+
+    def __init__(self, priority: int, key: str, alias: str, message):
+        """
+        Constructor.
+        """
+
+        self.priority = priority
+        self.key = key
+        self.alias = alias
+        self.message = message
+
+
+def _amend(new_order_single, order_cancel_replace_request):
+    """
+    Apply an amend to an order which has not yet been sent.
+    The order is sent using the amend's ClOrdID (later requests refer to it).
+    """
+
+    return roq.codec.fix.NewOrderSingle(
+        cl_ord_id=order_cancel_replace_request.cl_ord_id,
+        account=new_order_single.account,
+        symbol=new_order_single.symbol,
+        security_exchange=new_order_single.security_exchange,
+        side=new_order_single.side,
+        transact_time=order_cancel_replace_request.transact_time,
+        order_qty=order_cancel_replace_request.order_qty,
+        ord_type=order_cancel_replace_request.ord_type,
+        price=order_cancel_replace_request.price,
+        time_in_force=new_order_single.time_in_force,
+    )
+
+
+def _cancel(order_cancel_request, orig_cl_ord_id: str):
+    """
+    Cancel referring to the order known by the exchange (the amend it referred to was never sent).
+    """
+
+    return roq.codec.fix.OrderCancelRequest(
+        cl_ord_id=order_cancel_request.cl_ord_id,
+        orig_cl_ord_id=orig_cl_ord_id,
+        account=order_cancel_request.account,
+        symbol=order_cancel_request.symbol,
+        security_exchange=order_cancel_request.security_exchange,
+        side=order_cancel_request.side,
+        transact_time=order_cancel_request.transact_time,
+    )
+
+
+def _replace(order_cancel_replace_request, orig_cl_ord_id: str):
+    """
+    Amend referring to the order known by the exchange (the amend it referred to was never sent).
+    """
+
+    return roq.codec.fix.OrderCancelReplaceRequest(
+        cl_ord_id=order_cancel_replace_request.cl_ord_id,
+        orig_cl_ord_id=orig_cl_ord_id,
+        account=order_cancel_replace_request.account,
+        symbol=order_cancel_replace_request.symbol,
+        security_exchange=order_cancel_replace_request.security_exchange,
+        side=order_cancel_replace_request.side,
+        transact_time=order_cancel_replace_request.transact_time,
+        order_qty=order_cancel_replace_request.order_qty,
+        ord_type=order_cancel_replace_request.ord_type,
+        price=order_cancel_replace_request.price,
+        time_in_force=order_cancel_replace_request.time_in_force,
+    )
+
+
+class OrderScheduler:
+    """
+    Paces order requests using a token bucket.
+
+    Requests are sent immediately while tokens are available. Otherwise they
+    are queued and sent by priority (cancels, then amends, then new orders).
+    Requests are keyed by the ClOrdID of the order they refer to (OrigClOrdID
+    for amends and cancels) and at most one request per order is queued:
+
+    * an amend replaces a queued amend (or is merged into a queued new order, which is then
+      sent, and keyed, using the amend's ClOrdID)
+    * a cancel removes a queued new order (nothing is sent) or replaces a queued amend
+    * an amend for a queued cancel is dropped
+
+    Requests referring to a queued amend (by its ClOrdID) are re-targeted to the
+    order known by the exchange (the queued amend is never sent).
+
+    Other messages are sent directly.
+    """
+
+    def __init__(self, loop, send, rate: float, burst: int = 1):
+        """
+        Constructor.
+        """
+
+        self.loop = loop
+        self.send = send
+        self.bucket = TokenBucket(rate, burst, loop.time)
+        self.priorities = {
+            roq.codec.fix.OrderCancelRequest: CANCEL,
+            roq.codec.fix.OrderCancelReplaceRequest: AMEND,
+            roq.codec.fix.NewOrderSingle: NEW,
+        }
+        self.heap = []
+        self.queued = {}
+        self.sequence = 0
+        self.handle = None
+        self.sent = 0
+        self.replaced = 0
+        self.dropped = 0
+
+    def submit(self, message):
+        """
+        Send (or queue) a request.
+        """
+
+        priority = self.priorities.get(type(message))
+        if priority is None:
+            self.send(message)
+            return
+        key = message.cl_ord_id if priority == NEW else message.orig_cl_ord_id
+        entry = self.queued.get(key)
+        if entry is not None:
+            self._replace(entry, priority, message)
+            return
+        if not self.heap and self.bucket.take():
+            self.sent += 1
+            self.send(message)
+            return
+        entry = Entry(priority, key, message.cl_ord_id if priority == AMEND else None, message)
+        self._index(entry)
+        self._push(entry)
+
+    def close(self):
+        """
+        Discard all queued requests.
+        """
+
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        queued = sum(1 for _, _, entry in self.heap if entry.message is not None)
+        if queued:
+            logging.warning("Discarding %d queued order request(s)", queued)
+        self.heap.clear()
+        self.queued.clear()
+        logging.info(
+            "[ORDERS] sent=%d, replaced=%d, dropped=%d",
+            self.sent,
+            self.replaced,
+            self.dropped,
+        )
+
+    def _replace(self, entry, priority, message):
+        if priority == NEW:
+            logging.warning("Duplicate cl_ord_id=%s", message.cl_ord_id)
+            self.dropped += 1
+        elif entry.priority == CANCEL:
+            self.dropped += 1
+        elif priority == CANCEL and entry.priority == NEW:
+            entry.message = None  # note! lazily removed from the heap
+            self._remove(entry)
+            self.dropped += 2
+        elif priority == CANCEL:
+            if message.orig_cl_ord_id != entry.key:
+                message = _cancel(message, entry.key)
+            entry.message = None
+            self._remove(entry)
+            self.replaced += 1
+            entry = Entry(priority, entry.key, None, message)
+            self._index(entry)
+            self._push(entry)
+        elif entry.priority == NEW:
+            entry.message = _amend(entry.message, message)
+            self.replaced += 1
+            # note! later requests refer to the amend's ClOrdID
+            del self.queued[entry.key]
+            entry.key = message.cl_ord_id
+            self.queued[entry.key] = entry
+        else:
+            if message.orig_cl_ord_id != entry.key:
+                message = _replace(message, entry.key)
+            del self.queued[entry.alias]
+            entry.alias = message.cl_ord_id
+            self.queued[entry.alias] = entry
+            entry.message = message
+            self.replaced += 1
+
+    def _index(self, entry):
+        self.queued[entry.key] = entry
+        if entry.alias is not None:
+            self.queued[entry.alias] = entry
+
+    def _remove(self, entry):
+        del self.queued[entry.key]
+        if entry.alias is not None:
+            self.queued.pop(entry.alias, None)
+
+    def _push(self, entry):
+        self.sequence += 1
+        heapq.heappush(self.heap, (entry.priority, self.sequence, entry))
+        if self.handle is None:
+            self.handle = self.loop.call_at(self.loop.time() + self.bucket.delay(), self._drain)
+
+    def _drain(self):
+        self.handle = None
+        heap = self.heap
+        while heap:
+            entry = heap[0][2]
+            if entry.message is None:
+                heapq.heappop(heap)
+                continue
+            if not self.bucket.take():
+                self.handle = self.loop.call_at(self.loop.time() + self.bucket.delay(), self._drain)
+                return
+            heapq.heappop(heap)
+            self._remove(entry)
+            self.sent += 1
+            self.send(entry.message)
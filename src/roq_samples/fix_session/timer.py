@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Hashed timer wheel
+"""
+
+import math
+import weakref
+
+
+class Timer:
+    """
+    Timer handle.
+    """
+
+    __slots__ = ("expiry", "callback", "cancelled")
+
+    def __init__(self, expiry: int, callback):
+        """
+        Constructor.
+        """
+
+        self.expiry = expiry
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Cancel (the timer is lazily removed from the wheel).
+        """
+
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel shared by all sessions on an event loop.
+
+    Time is measured in ticks (of resolution seconds) since the wheel was
+    created. Timers are hashed into slots by expiry tick and the wheel only
+    uses a single loop.call_at handle (and only while timers are pending).
+    """
+
+    _wheels = weakref.WeakKeyDictionary()
+
+    def __init__(
+        self,
+        loop,
+        resolution: float = 0.1,
+        slots: int = 512,
+    ):
+        """
+        Constructor.
+        """
+
+        self.loop = loop
+        self.resolution = resolution
+        self.wheel = [[] for _ in range(slots)]
+        self.origin = loop.time()
+        self.tick = 0
+        self.pending = 0
+        self.handle = None
+        self.in_tick = False
+
+    @classmethod
+    def get(cls, loop):
+        """
+        Shared timer wheel for an event loop.
+        """
+
+        wheel = cls._wheels.get(loop)
+        if wheel is None:
+            wheel = cls(loop)
+            cls._wheels[loop] = wheel
+        return wheel
+
+    def ticks(self, seconds: float) -> int:
+        """
+        Convert seconds to (at least one) tick.
+        """
+
+        return max(1, math.ceil(seconds / self.resolution))
+
+    def schedule(self, delay: float, callback) -> Timer:
+        """
+        Call callback (no arguments) after delay seconds.
+        """
+
+        return self.schedule_ticks(self.ticks(delay), callback)
+
+    def schedule_ticks(self, ticks: int, callback) -> Timer:
+        """
+        Call callback (no arguments) after a number of ticks.
+        """
+
+        idle = self.handle is None and not self.in_tick
+        if idle:  # catch up with the current time
+            self.tick = max(self.tick, int((self.loop.time() - self.origin) / self.resolution))
+        timer = Timer(self.tick + max(1, ticks), callback)
+        self.wheel[timer.expiry % len(self.wheel)].append(timer)
+        self.pending += 1
+        if idle:
+            self._arm()
+        return timer
+
+    def close(self):
+        """
+        Stop ticking.
+        """
+
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+    def _arm(self):
+        self.handle = self.loop.call_at(
+            self.origin + (self.tick + 1) * self.resolution,
+            self._on_tick,
+        )
+
+    def _on_tick(self):
+        """
+        Advance to the current time and fire all expired timers.
+        Timers scheduled by callbacks are relative to the tick being processed
+        (the wheel is not idle until all ticks up to the current time have been processed).
+        """
+
+        self.handle = None
+        self.in_tick = True
+        try:
+            now = int((self.loop.time() - self.origin) / self.resolution)
+            size = len(self.wheel)
+            while self.tick < now and self.pending > 0:
+                self.tick += 1
+                index = self.tick % size
+                slot = self.wheel[index]
+                if not slot:
+                    continue
+                remaining = []
+                expired = []
+                for timer in slot:
+                    if timer.cancelled:
+                        self.pending -= 1
+                    elif timer.expiry <= self.tick:
+                        expired.append(timer)
+                    else:
+                        remaining.append(timer)
+                self.wheel[index] = remaining
+                for timer in expired:
+                    self.pending -= 1
+                    timer.callback()
+        finally:
+            self.in_tick = False
+        self.tick = max(self.tick, now)
+        if self.pending > 0 and self.handle is None:
+            self._arm()
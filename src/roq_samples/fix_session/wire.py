@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Helpers operating directly on encoded FIX messages
+"""
+
+from datetime import datetime, timezone
+
+SOH = b"\x01"
+
+# session level messages (never resent, replaced by a gap fill)
+ADMIN_MSG_TYPES = frozenset((b"0", b"1", b"2", b"3", b"4", b"5", b"A"))
+
+
+def find(message, tag: int, start: int = 0):
+    """
+    Locate the value of a field.
+    Returns (begin, end) offsets of the value or None.
+    """
+
+    needle = SOH + str(tag).encode() + b"="
+    if message.startswith(needle[1:]):
+        begin = len(needle) - 1
+    else:
+        index = message.find(needle, start)
+        if index < 0:
+            return None
+        begin = index + len(needle)
+    end = message.find(SOH, begin)
+    return begin, end
+
+
+def get(message, tag: int) -> bytes:
+    """
+    Value of a field (or None).
+    """
+
+    location = find(message, tag)
+    if location is None:
+        return None
+    begin, end = location
+    return bytes(message[begin:end])
+
+
+def checksum(data) -> bytes:
+    """
+    Checksum field value.
+    """
+
+    return b"%03d" % (sum(data) % 256)
+
+
+def finalize(begin_string: bytes, body) -> bytes:
+    """
+    Add BeginString, BodyLength and CheckSum to a message body.
+    The body starts with MsgType (35) and ends with SOH.
+    """
+
+    head = b"8=" + begin_string + SOH + b"9=" + str(len(body)).encode() + SOH
+    message = head + body
+    return message + b"10=" + checksum(message) + SOH
+
+
+def split(message):
+    """
+    Returns (begin_string, body), i.e. the inverse of finalize.
+    """
+
+    begin_string = get(message, 8)
+    _, end = find(message, 9)
+    trailer = message.rfind(SOH + b"10=")
+    return begin_string, message[end + 1 : trailer + 1]
+
+
+def replace(message, tag: int, value: bytes) -> bytes:
+    """
+    Replace the value of a header field (following BodyLength).
+    BodyLength and CheckSum are updated incrementally, i.e. only the changed values are summed.
+    """
+
+    begin, end = find(message, tag)
+    length_begin, length_end = find(message, 9)
+    assert begin > length_end, "only fields following BodyLength can be replaced"
+    previous = message[begin:end]
+    length = message[length_begin:length_end]
+    body_length = b"%d" % (int(length) + len(value) - len(previous))
+    # note! the trailer is always 10=nnn<SOH>
+    checksum = int(message[-4:-1]) - sum(previous) + sum(value) - sum(length) + sum(body_length)
+    return b"".join(
+        (
+            message[:length_begin],
+            body_length,
+            message[length_end:begin],
+            value,
+            message[end:-4],
+            b"%03d" % (checksum % 256),
+            SOH,
+        )
+    )
+
+
+def sending_time(now: datetime = None) -> bytes:
+    """
+    UTCTimestamp (milliseconds).
+    A naive datetime is assumed to be local time (as for the encoder).
+    """
+
+    now = datetime.now(timezone.utc) if now is None else now.astimezone(timezone.utc)
+    return now.strftime("%Y%m%d-%H:%M:%S.%f")[:-3].encode()
+
+
+def possible_duplicate(message) -> bytes:
+    """
+    Prepare a stored message for resend.
+    Sets PossDupFlag (43), moves SendingTime (52) to OrigSendingTime (122) and
+    updates SendingTime, BodyLength and CheckSum.
+    """
+
+    begin_string, body = split(message)
+    begin, end = find(body, 52)
+    original = bytes(body[begin:end])
+    body = (
+        bytes(body[: begin - 3])
+        + b"43=Y"
+        + SOH
+        + b"52="
+        + sending_time()
+        + SOH
+        + b"122="
+        + original
+        + bytes(body[end:])
+    )
+    return finalize(begin_string, body)
+
+
+def gap_fill(template, msg_seq_num: int, new_seq_no: int) -> bytes:
+    """
+    Create a SequenceReset (GapFill) using the header of a stored message.
+    """
+
+    begin_string = get(template, 8)
+    body = (
+        b"35=4"
+        + SOH
+        + b"49="
+        + get(template, 49)
+        + SOH
+        + b"56="
+        + get(template, 56)
+        + SOH
+        + b"34="
+        + str(msg_seq_num).encode()
+        + SOH
+        + b"43=Y"
+        + SOH
+        + b"52="
+        + sending_time()
+        + SOH
+        + b"123=Y"
+        + SOH
+        + b"36="
+        + str(new_seq_no).encode()
+        + SOH
+    )
+    return finalize(begin_string, body)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+from . import Simulator
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="FIX Simulator (TEST)",
+        description="Local FIX acceptor generating market data and fills (for testing fix_session)",
+    )
+
+    parser.add_argument(
+        "--loglevel",
+        type=str,
+        required=False,
+        default="info",
+        help="logging level",
+    )
+
+    parser.add_argument(
+        "--network_address",
+        type=str,
+        required=True,
+        help="network address to listen on (host:port or path)",
+    )
+    parser.add_argument(
+        "--comp_id",
+        type=str,
+        required=False,
+        default="simulator",
+        help="component identifier (the target_comp_id of the client)",
+    )
+    parser.add_argument(
+        "--exchange",
+        type=str,
+        required=False,
+        default="deribit",
+        help="exchange",
+    )
+    parser.add_argument(
+        "--symbols",
+        type=str,
+        nargs="+",
+        required=False,
+        default=["BTC-PERPETUAL"],
+        help="symbols",
+    )
+    parser.add_argument(
+        "--market_data_rate",
+        type=float,
+        required=False,
+        default=10.0,
+        help="market data updates per second (per subscription, 0 disables updates)",
+    )
+    parser.add_argument(
+        "--fill_rate",
+        type=float,
+        required=False,
+        default=1.0,
+        help="fills per second (open orders are filled oldest first, 0 disables fills)",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        required=False,
+        default=5,
+        help="number of price levels (per side)",
+    )
+
+    args = parser.parse_args()
+
+    import logging
+
+    logging.basicConfig(level=args.loglevel.upper())
+
+    del args.loglevel
+
+    Simulator.main(**vars(args))
@@ -0,0 +1,544 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Local FIX acceptor generating market data and fills
+"""
+
+import asyncio
+import collections
+import logging
+import os
+import random
+
+from datetime import datetime
+
+from fastcore.all import typedispatch
+
+import roq
+
+from ..fix_session.dispatch import DispatchTable
+from ..fix_session.framing import FrameBuffer
+from ..fix_session import network
+
+
+class Order:
+    """
+    Simulated order.
+    """
+
+    __slots__ = ("cl_ord_id", "order_id", "account", "symbol", "side", "order_qty", "price")
+
+    def __init__(self, cl_ord_id, order_id, account, symbol, side, order_qty, price):
+        """
+        Constructor.
+        """
+
+        self.cl_ord_id = cl_ord_id
+        self.order_id = order_id
+        self.account = account
+        self.symbol = symbol
+        self.side = side
+        self.order_qty = order_qty
+        self.price = price
+
+
+class Acceptor(asyncio.Protocol):
+    """
+    Simulated FIX session (acceptor side).
+    """
+
+    def __init__(self, simulator):
+        """
+        Constructor.
+        """
+
+        self.simulator = simulator
+        self.transport = None
+        self.encoder = None
+        self.decoder = roq.codec.fix.Decoder()
+        self.decode_buffer = FrameBuffer()
+        self.dispatch_table = DispatchTable.get(type(self))
+        self.handlers = self.dispatch_table.handlers
+        self.orders = {}
+        self.open_orders = collections.deque()
+        self.subscriptions = {}
+        self.market_data = None
+        self.md_batch = 0
+        self.fills = None
+        self.fill_batch = 0
+        self.exec_id = 0
+
+    def connection_made(self, transport):
+        logging.info("Connected")
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        logging.info("Disconnected")
+        for handle in (self.market_data, self.fills):
+            if handle is not None:
+                handle.cancel()
+
+    def data_received(self, data):
+        self.decode_buffer.append(data)
+        self.decode_buffer.dispatch(self.decoder, self._dispatch)
+
+    def _dispatch(self, header, message):
+        handler = self.handlers.get(type(message))
+        if handler is None:
+            handler = self.dispatch_table.resolve(type(header), type(message))
+        handler(self, header, message)
+
+    def _send(self, obj):
+        if self.encoder is None or self.transport.is_closing():
+            return
+        self.transport.write(self.encoder.encode(obj, datetime.now()))
+
+    def _start_market_data(self):
+        interval, self.md_batch = self.simulator.pacing(self.simulator.market_data_rate)
+        if interval > 0 and self.market_data is None:
+            loop = asyncio.get_running_loop()
+            self.market_data = loop.call_later(interval, self._on_market_data, interval)
+
+    def _on_market_data(self, interval):
+        loop = asyncio.get_running_loop()
+        self.market_data = loop.call_later(interval, self._on_market_data, interval)
+        for _ in range(self.md_batch):
+            for md_req_id, symbols in self.subscriptions.items():
+                symbol = random.choice(symbols)
+                self._send(
+                    roq.codec.fix.MarketDataIncrementalRefresh(
+                        md_req_id=md_req_id,
+                        no_md_entries=[self.simulator.update(symbol)],
+                    )
+                )
+
+    def _start_fills(self):
+        interval, self.fill_batch = self.simulator.pacing(self.simulator.fill_rate)
+        if interval > 0 and self.fills is None:
+            self.fills = asyncio.get_running_loop().call_later(interval, self._on_fills, interval)
+
+    def _on_fills(self, interval):
+        self.fills = asyncio.get_running_loop().call_later(interval, self._on_fills, interval)
+        for _ in range(self.fill_batch):
+            if not self.open_orders:
+                return
+            order = self.orders.pop(self.open_orders.popleft(), None)
+            if order is not None:
+                self._execution_report(
+                    order,
+                    roq.fix.ExecType.TRADE,
+                    roq.fix.OrdStatus.FILLED,
+                    last_qty=order.order_qty,
+                    last_px=order.price,
+                    leaves_qty=0.0,
+                    cum_qty=order.order_qty,
+                    avg_px=order.price,
+                )
+
+    def _execution_report(self, order, exec_type, ord_status, **kwargs):
+        self.exec_id += 1
+        fields = {
+            "order_id": order.order_id,
+            "cl_ord_id": order.cl_ord_id,
+            "exec_id": str(self.exec_id),
+            "exec_type": exec_type,
+            "ord_status": ord_status,
+            "account": order.account,
+            "symbol": order.symbol,
+            "security_exchange": self.simulator.exchange,
+            "side": order.side,
+            "order_qty": order.order_qty,
+            "price": order.price,
+            "leaves_qty": order.order_qty,
+            "cum_qty": 0.0,
+            "avg_px": 0.0,
+            "transact_time": datetime.now(),
+        }
+        fields.update(kwargs)
+        self._send(roq.codec.fix.ExecutionReport(**fields))
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        logon: roq.codec.fix.Logon,
+    ):
+        logging.info("Logon from sender_comp_id=%s", header.sender_comp_id)
+        self.encoder = roq.codec.fix.Encoder(
+            sender_comp_id=self.simulator.comp_id,
+            target_comp_id=header.sender_comp_id,
+        )
+        self._send(
+            roq.codec.fix.Logon(
+                heart_bt_int=logon.heart_bt_int,
+                username="",
+                password="",
+                encrypt_method=roq.fix.EncryptMethod.NONE,
+            )
+        )
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        logout: roq.codec.fix.Logout,
+    ):
+        self._send(
+            roq.codec.fix.Logout(
+                text="",
+            )
+        )
+        self.transport.close()
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        test_request: roq.codec.fix.TestRequest,
+    ):
+        self._send(
+            roq.codec.fix.Heartbeat(
+                test_req_id=test_request.test_req_id,
+            )
+        )
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        security_list_request: roq.codec.fix.SecurityListRequest,
+    ):
+        self._send(
+            roq.codec.fix.SecurityList(
+                security_req_id=security_list_request.security_req_id,
+                security_response_id=security_list_request.security_req_id,
+                no_related_sym=[
+                    roq.codec.fix.SecListGrp(
+                        symbol=symbol,
+                        security_exchange=self.simulator.exchange,
+                        min_price_increment=self.simulator.tick_size,
+                    )
+                    for symbol in self.simulator.symbols
+                ],
+            )
+        )
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        security_definition_request: roq.codec.fix.SecurityDefinitionRequest,
+    ):
+        self._send(
+            roq.codec.fix.SecurityDefinition(
+                security_req_id=security_definition_request.security_req_id,
+                security_response_id=security_definition_request.security_req_id,
+                symbol=security_definition_request.symbol,
+                security_exchange=self.simulator.exchange,
+                min_price_increment=self.simulator.tick_size,
+            )
+        )
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        security_status_request: roq.codec.fix.SecurityStatusRequest,
+    ):
+        self._send(
+            roq.codec.fix.SecurityStatus(
+                security_status_req_id=security_status_request.security_status_req_id,
+                symbol=security_status_request.symbol,
+                security_exchange=self.simulator.exchange,
+                trading_session_id=self.simulator.exchange,
+            )
+        )
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        trading_session_status_request: roq.codec.fix.TradingSessionStatusRequest,
+    ):
+        self._send(
+            roq.codec.fix.TradingSessionStatus(
+                trad_ses_req_id=trading_session_status_request.trad_ses_req_id,
+                trading_session_id=trading_session_status_request.trading_session_id,
+                trad_ses_status=roq.fix.TradSesStatus.OPEN,
+            )
+        )
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        market_data_request: roq.codec.fix.MarketDataRequest,
+    ):
+        symbols = [instrument.symbol for instrument in market_data_request.no_related_sym]
+        for symbol in symbols:
+            self._send(
+                roq.codec.fix.MarketDataSnapshotFullRefresh(
+                    md_req_id=market_data_request.md_req_id,
+                    symbol=symbol,
+                    security_exchange=self.simulator.exchange,
+                    no_md_entries=self.simulator.snapshot(symbol),
+                )
+            )
+        if symbols:
+            self.subscriptions[market_data_request.md_req_id] = symbols
+            self._start_market_data()
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        order_status_request: roq.codec.fix.OrderStatusRequest,
+    ):
+        # note! no orders survive a connection
+        self._send(
+            roq.codec.fix.ExecutionReport(
+                ord_status_req_id=order_status_request.ord_status_req_id,
+                order_id="NONE",
+                cl_ord_id=order_status_request.cl_ord_id,
+                exec_id="0",
+                exec_type=roq.fix.ExecType.ORDER_STATUS,
+                ord_status=roq.fix.OrdStatus.REJECTED,
+                ord_rej_reason=roq.fix.OrdRejReason.UNKNOWN_ORDER,
+                symbol=order_status_request.symbol,
+                side=order_status_request.side,
+            )
+        )
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        order_mass_status_request: roq.codec.fix.OrderMassStatusRequest,
+    ):
+        self._send(
+            roq.codec.fix.ExecutionReport(
+                mass_status_req_id=order_mass_status_request.mass_status_req_id,
+                tot_num_reports=0,
+                last_rpt_requested=True,
+                order_id="NONE",
+                cl_ord_id="",
+                exec_id="0",
+                exec_type=roq.fix.ExecType.ORDER_STATUS,
+                ord_status=roq.fix.OrdStatus.REJECTED,
+            )
+        )
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        new_order_single: roq.codec.fix.NewOrderSingle,
+    ):
+        order = Order(
+            new_order_single.cl_ord_id,
+            self.simulator.next_order_id(),
+            new_order_single.account,
+            new_order_single.symbol,
+            new_order_single.side,
+            new_order_single.order_qty,
+            new_order_single.price,
+        )
+        self.orders[order.cl_ord_id] = order
+        self.open_orders.append(order.cl_ord_id)
+        self._execution_report(order, roq.fix.ExecType.NEW, roq.fix.OrdStatus.NEW)
+        self._start_fills()
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        order_cancel_request: roq.codec.fix.OrderCancelRequest,
+    ):
+        order = self.orders.pop(order_cancel_request.orig_cl_ord_id, None)
+        if order is None:
+            self._cancel_reject(order_cancel_request, roq.fix.CxlRejResponseTo.ORDER_CANCEL_REQUEST)
+            return
+        orig_cl_ord_id = order.cl_ord_id
+        order.cl_ord_id = order_cancel_request.cl_ord_id
+        self._execution_report(
+            order,
+            roq.fix.ExecType.CANCELED,
+            roq.fix.OrdStatus.CANCELED,
+            orig_cl_ord_id=orig_cl_ord_id,
+            leaves_qty=0.0,
+        )
+
+    @typedispatch
+    def _callback(
+        self,
+        header: roq.codec.fix.Header,
+        order_cancel_replace_request: roq.codec.fix.OrderCancelReplaceRequest,
+    ):
+        order = self.orders.pop(order_cancel_replace_request.orig_cl_ord_id, None)
+        if order is None:
+            self._cancel_reject(
+                order_cancel_replace_request,
+                roq.fix.CxlRejResponseTo.ORDER_CANCEL_REPLACE_REQUEST,
+            )
+            return
+        orig_cl_ord_id = order.cl_ord_id
+        order.cl_ord_id = order_cancel_replace_request.cl_ord_id
+        order.order_qty = order_cancel_replace_request.order_qty
+        order.price = order_cancel_replace_request.price
+        self.orders[order.cl_ord_id] = order
+        self.open_orders.append(order.cl_ord_id)  # note! the stale entry is skipped
+        self._execution_report(
+            order,
+            roq.fix.ExecType.REPLACED,
+            roq.fix.OrdStatus.REPLACED,
+            orig_cl_ord_id=orig_cl_ord_id,
+        )
+
+    def _cancel_reject(self, request, cxl_rej_response_to):
+        self._send(
+            roq.codec.fix.OrderCancelReject(
+                cl_ord_id=request.cl_ord_id,
+                orig_cl_ord_id=request.orig_cl_ord_id,
+                order_id="NONE",
+                ord_status=roq.fix.OrdStatus.REJECTED,
+                cxl_rej_response_to=cxl_rej_response_to,
+                cxl_rej_reason=roq.fix.CxlRejReason.UNKNOWN_ORDER,
+            )
+        )
+
+
+class Simulator:
+    """
+    Local FIX acceptor (a stand-in for a fix-bridge).
+
+    Responds to logon, reference data, order status and order requests.
+    Market data (price level updates around a fixed mid price) is published
+    at market_data_rate updates per second (per subscription) and open
+    orders are filled (oldest first) at fill_rate fills per second.
+    """
+
+    def __init__(
+        self,
+        comp_id: str = "simulator",
+        exchange: str = "deribit",
+        symbols=("BTC-PERPETUAL",),
+        market_data_rate: float = 10.0,
+        fill_rate: float = 1.0,
+        depth: int = 5,
+        tick_size: float = 0.5,
+        seed: int = None,
+    ):
+        """
+        Constructor.
+        """
+
+        self.comp_id = comp_id
+        self.exchange = exchange
+        self.symbols = tuple(symbols)
+        self.market_data_rate = market_data_rate
+        self.fill_rate = fill_rate
+        self.depth = depth
+        self.tick_size = tick_size
+        self.random = random.Random(seed)
+        self.mid = {symbol: 10000.0 * (index + 1) for index, symbol in enumerate(self.symbols)}
+        self.order_id = 0
+
+    def __call__(self):
+        return Acceptor(self)
+
+    @staticmethod
+    def pacing(rate: float):
+        """
+        Returns (interval, batch) for a rate.
+        Timers are not scheduled more often than every millisecond.
+        """
+
+        if rate <= 0:
+            return 0.0, 0
+        interval = max(1.0 / rate, 0.001)
+        return interval, max(1, round(rate * interval))
+
+    def next_order_id(self) -> str:
+        """
+        Unique order identifier.
+        """
+
+        self.order_id += 1
+        return str(self.order_id)
+
+    def snapshot(self, symbol: str) -> list:
+        """
+        Market data snapshot (depth levels on each side).
+        """
+
+        mid = self.mid.get(symbol, 10000.0)
+        entries = []
+        for level in range(1, self.depth + 1):
+            for md_entry_type, price in (
+                (roq.fix.MDEntryType.BID, mid - level * self.tick_size),
+                (roq.fix.MDEntryType.OFFER, mid + level * self.tick_size),
+            ):
+                entries.append(
+                    roq.codec.fix.MDFull(
+                        md_entry_type=md_entry_type,
+                        md_entry_px=price,
+                        md_entry_size=float(self.random.randint(1, 100)),
+                    )
+                )
+        return entries
+
+    def update(self, symbol: str):
+        """
+        Random market data update.
+        """
+
+        mid = self.mid.get(symbol, 10000.0)
+        level = self.random.randint(1, self.depth)
+        is_bid = self.random.random() < 0.5
+        return roq.codec.fix.MDInc(
+            md_update_action=roq.fix.MDUpdateAction.CHANGE,
+            md_entry_type=roq.fix.MDEntryType.BID if is_bid else roq.fix.MDEntryType.OFFER,
+            symbol=symbol,
+            security_exchange=self.exchange,
+            md_entry_px=mid - level * self.tick_size if is_bid else mid + level * self.tick_size,
+            md_entry_size=float(self.random.randint(1, 100)),
+        )
+
+    async def run(self, network_address: str):
+        """
+        Accept connections until cancelled.
+        """
+
+        if network.split(network_address) is None and os.path.exists(network_address):
+            os.unlink(network_address)
+        server = await network.listen(asyncio.get_running_loop(), self, network_address)
+        logging.info("Listening on %s", network_address)
+        async with server:
+            await server.serve_forever()
+
+    @staticmethod
+    def main(
+        network_address: str,
+        comp_id: str,
+        exchange: str,
+        symbols: list,
+        market_data_rate: float,
+        fill_rate: float,
+        depth: int,
+    ):
+        """
+        Main function.
+        """
+
+        simulator = Simulator(
+            comp_id=comp_id,
+            exchange=exchange,
+            symbols=symbols,
+            market_data_rate=market_data_rate,
+            fill_rate=fill_rate,
+            depth=depth,
+        )
+
+        asyncio.run(simulator.run(network_address))
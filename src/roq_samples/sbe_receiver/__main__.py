@@ -52,6 +52,51 @@ if __name__ == "__main__":
         required=True,
         help="multicast port",
     )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        required=False,
+        default=0,
+        help="drain sockets in batches of (at most) this many datagrams (0 means one per callback)",
+    )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help="receive and sequence datagrams using a dedicated thread per channel",
+    )
+    parser.add_argument(
+        "--queue_size",
+        type=int,
+        required=False,
+        default=1024,
+        help="maximum number of batches queued by a receive thread (batches are dropped when full)",
+    )
+    parser.add_argument(
+        "--metrics_interval",
+        type=float,
+        required=False,
+        default=10.0,
+        help="interval (seconds) between logging of thread and conflation metrics (0 disables)",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        required=False,
+        default=2,
+        help="number of price levels published",
+    )
+    parser.add_argument(
+        "--conflate",
+        action="store_true",
+        help="publish updated order books once per loop iteration (or --publish_interval)",
+    )
+    parser.add_argument(
+        "--publish_interval",
+        type=float,
+        required=False,
+        default=0.0,
+        help="minimum interval between publications of a book (seconds, 0 means each iteration)",
+    )
 
     args = parser.parse_args()
 
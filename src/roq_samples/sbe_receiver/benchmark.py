@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+
+Micro-benchmarks for the SBE receiver
+"""
+
+import asyncio
+import multiprocessing
+import socket
+import struct
+import time
+
+from .sbe_receiver import BatchReader, Incremental, Shared
+
+
+# control, object type, session id, sequence number,
+# fragment, fragment max, object id, last sequence number
+UDP_HEADER = struct.Struct("<BBHIBBHI")
+
+# every n'th datagram is sent after the following one, i.e. buffered by the re-order buffer
+OUT_OF_ORDER = 64
+
+
+def _send(port: int, rate: int, duration: float, sent):
+    """
+    Send sequenced datagrams at (approximately) rate packets per second.
+    """
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    address = ("127.0.0.1", port)
+    per_tick = max(1, rate // 1000)
+    tick = per_tick / rate
+    sequence_number = 0
+    held = None
+    start = time.perf_counter()
+    deadline = start
+    while deadline - start < duration:
+        for _ in range(per_tick):
+            sequence_number += 1
+            # note! an unfragmented message with an empty (SBE) payload
+            packet = UDP_HEADER.pack(0, 0, 1, sequence_number, 0, 0, 1, sequence_number)
+            if sequence_number % OUT_OF_ORDER == 0:
+                held = packet
+                continue
+            sock.sendto(packet, address)
+            if held is not None:
+                sock.sendto(held, address)
+                held = None
+        deadline += tick
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    if held is not None:
+        sock.sendto(held, address)
+    sock.close()
+    sent.value = sequence_number
+
+
+class _Receiver(Incremental):
+    """
+    Counts the datagrams parsed (in sequence) by the receiver.
+    """
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+
+        super().__init__(Shared())
+        self.received = 0
+
+    def connection_lost(self, exc):
+        """
+        Transport closed.
+        """
+
+    def _parse(self, data):
+        self.received += 1
+        super()._parse(data)
+
+
+def _socket(receive_buffer_size: int):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    if receive_buffer_size > 0:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer_size)
+    sock.bind(("127.0.0.1", 0))
+    return sock
+
+
+def ingestion(rates: list, duration: float, batch_size: int, receive_buffer_size: int):
+    """
+    Packets per second received without drops, one datagram per callback (asyncio) versus batched.
+    Datagrams are sequenced (re-order buffer) and parsed by the receiver, the SBE payload is empty.
+    """
+
+    async def run(rate, batched):
+        loop = asyncio.get_running_loop()
+        sock = _socket(receive_buffer_size)
+        receiver = _Receiver()
+        if batched:
+            reader = BatchReader(sock, receiver, batch_size=batch_size, max_packet_size=2048)
+            loop.add_reader(sock, reader.read_ready)
+        else:
+            transport, _ = await loop.create_datagram_endpoint(lambda: receiver, sock=sock)
+        sent = multiprocessing.Value("Q", 0)
+        sender = multiprocessing.Process(
+            target=_send,
+            args=(sock.getsockname()[1], rate, duration, sent),
+        )
+        start = time.perf_counter()
+        sender.start()
+        await loop.run_in_executor(None, sender.join)
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.1)  # note! drain
+        if batched:
+            loop.remove_reader(sock)
+            sock.close()
+        else:
+            transport.close()
+        return receiver.received, sent.value, elapsed
+
+    for name, batched in (("datagram", False), ("batched", True)):
+        best = 0
+        for rate in sorted(rates):
+            received, sent, elapsed = asyncio.run(run(rate, batched))
+            dropped = sent - received
+            print(
+                f"{name:<24} rate={rate:<10} sent={sent:<10} received={received:<10} "
+                f"dropped={dropped:<10} actual={sent / elapsed:,.0f} pkt/s"
+            )
+            if dropped == 0:
+                best = max(best, rate)
+        print(f"{name:<24} max rate without drops={best:,} pkt/s")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="SBE Receiver (BENCHMARK)",
+        description="Micro-benchmarks for the SBE receiver",
+    )
+
+    subparsers = parser.add_subparsers(
+        dest="benchmark",
+        required=True,
+    )
+
+    parser_ingestion = subparsers.add_parser(
+        "ingestion",
+        help="receive datagrams at increasing rates, one per callback and batched",
+    )
+    parser_ingestion.add_argument(
+        "--rates",
+        type=int,
+        nargs="+",
+        required=False,
+        default=[10000, 25000, 50000, 100000, 200000],
+        help="packets per second",
+    )
+    parser_ingestion.add_argument(
+        "--duration",
+        type=float,
+        required=False,
+        default=2.0,
+        help="duration (seconds) per rate",
+    )
+    parser_ingestion.add_argument(
+        "--batch_size",
+        type=int,
+        required=False,
+        default=64,
+        help="maximum number of datagrams per batch",
+    )
+    parser_ingestion.add_argument(
+        "--receive_buffer_size",
+        type=int,
+        required=False,
+        default=0,
+        help="socket receive buffer size (bytes, 0 means system default)",
+    )
+
+    args = parser.parse_args()
+
+    benchmark = globals()[args.benchmark]
+
+    del args.benchmark
+
+    benchmark(**vars(args))
@@ -7,9 +7,11 @@ Demonstrates how to decode a SBE multicast feed using asyncio
 """
 
 import asyncio
+import collections
 import logging
 import struct
 import socket
+import threading
 
 from fastcore.all import typedispatch
 
@@ -28,12 +30,19 @@ class Instrument:
         self,
         exchange: str,
         symbol: str,
+        instrument_id: int = 0,
+        depth: int = 2,
+        conflation=None,
     ):
         """
         Constructor.
         """
         self.exchange = exchange
         self.symbol = symbol
+        self.instrument_id = instrument_id
+        self.depth = depth
+        self.conflation = conflation
+        self.dirty = False
         self.sequencer = roq.market.mbp.Sequencer()
         self.market_by_price = roq.market.mbp.MarketByPrice(
             exchange=self.exchange,
@@ -72,7 +81,17 @@ class Instrument:
         """
 
         self.market_by_price.apply(market_by_price_update)
-        depth = self.market_by_price.extract(2)
+        if self.conflation is None:
+            self.publish()
+        else:
+            self.conflation.mark(self)
+
+    def publish(self):
+        """
+        Extract and publish (log) the top levels of the order book.
+        """
+
+        depth = self.market_by_price.extract(self.depth)
         logging.info(
             "DEPTH: exchange=%s, symbol=%s, depth=%s",
             self.exchange,
@@ -94,17 +113,88 @@ class Instrument:
         self.market_by_price.clear()
 
 
+class Conflation:
+    """
+    Conflated publication of order books.
+
+    Instruments are marked dirty when updated and each dirty instrument is
+    published once per event loop iteration (interval is zero) or at most
+    once per interval (seconds), no matter how many updates were applied.
+    """
+
+    def __init__(self, loop, interval: float = 0.0):
+        """
+        Constructor.
+        """
+
+        self.loop = loop
+        self.interval = interval
+        self.dirty = []
+        self.handle = None
+        self.updates = 0
+        self.publications = 0
+
+    def mark(self, instrument: Instrument):
+        """
+        Instrument has been updated (schedules publication).
+        """
+
+        self.updates += 1
+        if instrument.dirty:
+            return
+        instrument.dirty = True
+        self.dirty.append(instrument)
+        if self.handle is None:
+            if self.interval > 0:
+                self.handle = self.loop.call_later(self.interval, self.publish)
+            else:
+                self.handle = self.loop.call_soon(self.publish)
+
+    def publish(self):
+        """
+        Publish all dirty instruments.
+        """
+
+        self.handle = None
+        dirty, self.dirty = self.dirty, []
+        for instrument in dirty:
+            instrument.dirty = False
+            instrument.publish()
+        self.publications += len(dirty)
+
+    def log(self):
+        """
+        Log metrics.
+        """
+
+        logging.info(
+            "[METRICS] conflation: updates=%d, publications=%d",
+            self.updates,
+            self.publications,
+        )
+
+
 class Shared:
     """
     Lookup table for shared objects.
+
+    Instruments are assigned dense integer identifiers (in order of first
+    sight) and are stored in a list indexed by identifier. The object_id of
+    the UDP header (assumed to identify the instrument) is mapped to the
+    instrument, i.e. the (exchange, symbol) lookup is only used the first
+    time an object_id is seen (or if it is reused for another instrument).
     """
 
-    def __init__(self):
+    def __init__(self, depth: int = 2, conflation: Conflation = None):
         """
         Constructor.
         """
 
-        self.instruments = {}
+        self.depth = depth
+        self.conflation = conflation
+        self.instruments = []
+        self.instrument_ids = {}
+        self.by_object_id = {}
 
     def update(
         self,
@@ -115,21 +205,52 @@ class Shared:
         Find instrument and apply update.
         """
 
-        self._get_instrument(market_by_price_update).apply(
+        object_id = header.object_id
+        instrument = self.by_object_id.get(object_id)
+        if instrument is None or instrument.symbol != market_by_price_update.symbol:
+            instrument = self._map_object_id(object_id, market_by_price_update)
+        instrument.apply(
             market_by_price_update,
             header,
         )
 
+    def _map_object_id(self, object_id: int, obj):
+        """
+        Helper function to (re-)map an object_id to an instrument.
+        """
+        instrument = self._get_instrument(obj)
+        previous = self.by_object_id.get(object_id)
+        if previous is not None:
+            logging.warning(
+                "object_id=%d has been reused: exchange=%s, symbol=%s (was exchange=%s, symbol=%s)",
+                object_id,
+                instrument.exchange,
+                instrument.symbol,
+                previous.exchange,
+                previous.symbol,
+            )
+        self.by_object_id[object_id] = instrument
+        return instrument
+
     def _get_instrument(self, obj):
         """
         Helper function to find or create instrument.
         """
         key = (obj.exchange, obj.symbol)
-        instrument = self.instruments.get(key)
-        if instrument is None:
-            instrument = Instrument(obj.exchange, obj.symbol)
-            self.instruments[key] = instrument
-        return instrument
+        instrument_id = self.instrument_ids.get(key)
+        if instrument_id is None:
+            instrument_id = len(self.instruments)
+            self.instruments.append(
+                Instrument(
+                    obj.exchange,
+                    obj.symbol,
+                    instrument_id,
+                    depth=self.depth,
+                    conflation=self.conflation,
+                )
+            )
+            self.instrument_ids[key] = instrument_id
+        return self.instruments[instrument_id]
 
 
 class Receiver:
@@ -141,7 +262,7 @@ class Receiver:
     Decode SBE messages.
     """
 
-    def __init__(self, shared: Shared):
+    def __init__(self, shared: Shared, capacity: int = 1 << 16):
         """
         Constructor.
         """
@@ -149,7 +270,8 @@ class Receiver:
         self.transport = None
         self.reorder_buffer = roq.io.net.ReorderBuffer()
         self.decoder = roq.codec.sbe.Decoder()
-        self.decode_buffer = bytearray()
+        self.decode_buffer = bytearray(capacity)  # note! only used to assemble fragmented messages
+        self.decode_length = 0
         self.shared = shared
         self.header = None
 
@@ -168,21 +290,41 @@ class Receiver:
             reset=self._reset,
         )
 
+    def datagrams_received(self, datagrams):
+        """
+        Batch of datagrams (from a BatchReader).
+        """
+
+        dispatch = self.reorder_buffer.dispatch
+        get_sequence_number = roq.codec.udp.Header.get_sequence_number
+        parse = self._parse
+        reset = self._reset
+        for data in datagrams:
+            dispatch(
+                data=data,
+                sequence_number=get_sequence_number(data),
+                parse=parse,
+                reset=reset,
+            )
+
     def _parse(self, data):
         """
         Callback from the re-order buffer.
         Datagrams are ordered by sequence number.
+        Unfragmented messages are decoded directly from the datagram (no copy).
+        Fragments are copied (once) to the decode buffer.
         """
 
         self.header = roq.codec.udp.Header(data)
         last = self.header.fragment == self.header.fragment_max
-        payload = data[SIZE_OF_UDP_HEADER:]
+        payload = memoryview(data)[SIZE_OF_UDP_HEADER:]
         if last:
-            if len(self.decode_buffer) > 0:
-                self.decode_buffer += payload
-                length = self.decoder.dispatch(self._callback, self.decode_buffer)
-                assert length == len(self.decode_buffer), "internal error"
-                self.decode_buffer = bytearray()
+            if self.decode_length > 0:
+                self._append(payload)
+                with memoryview(self.decode_buffer)[: self.decode_length] as message:
+                    length = self.decoder.dispatch(self._callback, message)
+                assert length == self.decode_length, "internal error"
+                self.decode_length = 0
             elif self.header.fragment == 0:
                 length = self.decoder.dispatch(self._callback, payload)
                 assert length == len(payload), "internal error"
@@ -192,21 +334,48 @@ class Receiver:
                 pass
         else:
             if self.header.fragment == 0:
-                assert len(self.decode_buffer) == 0, "internal error"
-                self.decode_buffer = payload
-            elif len(self.decode_buffer) > 0:
-                self.decode_buffer += payload
+                assert self.decode_length == 0, "internal error"
+                self._append(payload)
+            elif self.decode_length > 0:
+                self._append(payload)
             else:
                 # NOTE
                 #   After packet loss and we have re-joined in the middle of a fragmented message.
                 pass
 
+    def _append(self, payload):
+        """
+        Copy a fragment to the decode buffer (capacity doubles when full).
+        """
+
+        begin = self.decode_length
+        end = begin + len(payload)
+        capacity = len(self.decode_buffer)
+        if end > capacity:
+            self.decode_buffer.extend(bytes(max(end, 2 * capacity) - capacity))
+        self.decode_buffer[begin:end] = payload
+        self.decode_length = end
+
+    def datagrams_sequenced(self, datagrams, reset: bool):
+        """
+        Batch of datagrams already ordered by sequence number (from a ReceiveThread).
+        Packet loss has been detected before this batch if reset is True.
+        """
+
+        if reset:
+            self._reset()
+        parse = self._parse
+        for data in datagrams:
+            parse(data)
+
     def _reset(self):
         """
         Callback from re-order buffer.
         Packet loss has been detected if this handler is called.
         """
 
+        self.decode_length = 0  # note! discard a partially assembled message
+
     @typedispatch
     def _callback(
         self,
@@ -316,6 +485,213 @@ class Receiver:
         )
 
 
+class BatchReader:
+    """
+    Drains a (non-blocking) datagram socket when readable.
+
+    Datagrams are received into a preallocated buffer (using recvmsg_into
+    until the socket would block or the batch is full) and the batch is then
+    passed to the receiver in one call.
+    Each datagram is copied from the buffer (only its length) because the
+    re-order buffer keeps datagrams received out of order until the gap has
+    been filled.
+    """
+
+    def __init__(
+        self,
+        sock,
+        receiver,
+        batch_size: int = 64,
+        max_packet_size: int = 65536,
+    ):
+        """
+        Constructor.
+        """
+
+        assert batch_size > 0, "batch_size must be positive"
+        self.sock = sock
+        self.receiver = receiver
+        self.batch_size = batch_size
+        self.buffer = bytearray(max_packet_size)
+        self.buffers = [memoryview(self.buffer)]
+        self.batch = []
+        self.batches = 0
+        self.datagrams = 0
+        self.truncated = 0
+        self.sock.setblocking(False)
+
+    def read_ready(self):
+        """
+        Callback from the event loop (socket is readable).
+        """
+
+        recvmsg_into = self.sock.recvmsg_into
+        buffers = self.buffers
+        (view,) = buffers
+        batch = self.batch
+        while len(batch) < self.batch_size:
+            try:
+                length, _, flags, _ = recvmsg_into(buffers)
+            except (BlockingIOError, InterruptedError):
+                break
+            if flags & socket.MSG_TRUNC:
+                self.truncated += 1
+                continue
+            batch.append(bytes(view[:length]))  # note! the buffer is reused
+        if not batch:
+            return
+        self.batches += 1
+        self.datagrams += len(batch)
+        try:
+            self.receiver.datagrams_received(batch)
+        finally:
+            batch.clear()
+
+
+class ReceiveThread(threading.Thread):
+    """
+    Receives and sequences datagrams for a channel on a dedicated thread.
+
+    Batches of sequenced datagrams are handed to the receiver (on the event
+    loop thread) through a bounded single-producer single-consumer queue.
+    A batch is dropped (and counted) when the queue is full and the receiver
+    is reset before the next batch is processed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sock,
+        receiver,
+        loop,
+        queue_size: int = 1024,
+        batch_size: int = 64,
+        max_packet_size: int = 65536,
+    ):
+        """
+        Constructor.
+        """
+
+        super().__init__(name=name, daemon=True)
+        self.sock = sock
+        self.receiver = receiver
+        self.loop = loop
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_packet_size = max_packet_size
+        self.reorder_buffer = roq.io.net.ReorderBuffer()
+        self.queue = collections.deque()  # note! append and popleft are atomic
+        self.batch = []
+        self.reset = False
+        self.notified = False
+        self.running = True
+        self.received = 0
+        self.dropped = 0
+        self.batches = 0
+        self.max_depth = 0
+
+    def stop(self):
+        """
+        Request the thread to exit (join to wait for it).
+        """
+
+        self.running = False
+        try:
+            self.sock.shutdown(socket.SHUT_RD)  # note! wakes up a blocking recv
+        except OSError:
+            pass
+
+    def run(self):
+        sock = self.sock
+        sock.setblocking(True)
+        recv = sock.recv
+        while self.running:
+            try:
+                data = recv(self.max_packet_size)
+                while data:
+                    self._sequence(data)
+                    if len(self.batch) >= self.batch_size:
+                        break
+                    data = recv(self.max_packet_size, socket.MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError as err:
+                if self.running:
+                    logging.error("%s: %s", self.name, err)
+                break
+            self._push()
+
+    def _sequence(self, data):
+        self.received += 1
+        self.reorder_buffer.dispatch(
+            data=data,
+            sequence_number=roq.codec.udp.Header.get_sequence_number(data),
+            parse=self._parse,
+            reset=self._reset,
+        )
+
+    def _parse(self, data):
+        """
+        Callback from the re-order buffer.
+        """
+
+        self.batch.append(data)
+
+    def _reset(self):
+        """
+        Callback from the re-order buffer (packet loss).
+        """
+
+        self._push()
+        self.reset = True
+
+    def _push(self):
+        """
+        Producer (receive thread).
+        """
+
+        if not self.batch and not self.reset:
+            return
+        if len(self.queue) >= self.queue_size:
+            self.dropped += len(self.batch)
+            self.reset = True
+        else:
+            self.queue.append((self.batch, self.reset))
+            self.reset = False
+            self.batches += 1
+            self.max_depth = max(self.max_depth, len(self.queue))
+            if not self.notified:
+                self.notified = True
+                self.loop.call_soon_threadsafe(self._drain)
+        self.batch = []
+
+    def _drain(self):
+        """
+        Consumer (event loop thread).
+        """
+
+        self.notified = False  # note! cleared before draining so a concurrent push is never missed
+        queue = self.queue
+        while queue:
+            datagrams, reset = queue.popleft()
+            self.receiver.datagrams_sequenced(datagrams, reset)
+
+    def log(self):
+        """
+        Log metrics.
+        """
+
+        logging.info(
+            "[METRICS] channel=%s, received=%d, dropped=%d, batches=%d, depth=%d, max_depth=%d",
+            self.name,
+            self.received,
+            self.dropped,
+            self.batches,
+            len(self.queue),
+            self.max_depth,
+        )
+
+
 class SnapshotMixin:
     """
     Receiver mixin for the snapshot channel.
@@ -525,6 +901,13 @@ class Receiver:
         multicast_snapshot_port: str,
         multicast_incremental_address: str,
         multicast_incremental_port: str,
+        batch_size: int = 0,
+        threads: bool = False,
+        queue_size: int = 1024,
+        metrics_interval: float = 10.0,
+        depth: int = 2,
+        conflate: bool = False,
+        publish_interval: float = 0.0,
     ):
         """
         Main function.
@@ -536,30 +919,83 @@ class Receiver:
 
         # loop.set_debug(True)
 
-        shared = Shared()
+        conflation = Conflation(loop, publish_interval) if conflate else None
 
-        snapshot = loop.create_datagram_endpoint(
-            lambda: Snapshot(shared),
-            sock=create_datagram_socket(
-                local_interface=local_interface,
-                multicast_port=multicast_snapshot_port,
-                multicast_address=multicast_snapshot_address,
-            ),
-        )
+        shared = Shared(depth, conflation)
 
-        incremental = loop.create_datagram_endpoint(
-            lambda: Incremental(shared),
-            sock=create_datagram_socket(
-                local_interface=local_interface,
-                multicast_port=multicast_incremental_port,
-                multicast_address=multicast_incremental_address,
-            ),
-        )
+        receive_threads = []
 
-        tasks = asyncio.gather(snapshot, incremental)
+        snapshot_socket = create_datagram_socket(
+            local_interface=local_interface,
+            multicast_port=multicast_snapshot_port,
+            multicast_address=multicast_snapshot_address,
+        )
 
-        loop.run_until_complete(tasks)
+        incremental_socket = create_datagram_socket(
+            local_interface=local_interface,
+            multicast_port=multicast_incremental_port,
+            multicast_address=multicast_incremental_address,
+        )
 
-        loop.run_forever()
+        if threads:
+            receive_threads = [
+                ReceiveThread(
+                    "snapshot",
+                    snapshot_socket,
+                    Snapshot(shared),
+                    loop,
+                    queue_size=queue_size,
+                    batch_size=batch_size or 64,
+                ),
+                ReceiveThread(
+                    "incremental",
+                    incremental_socket,
+                    Incremental(shared),
+                    loop,
+                    queue_size=queue_size,
+                    batch_size=batch_size or 64,
+                ),
+            ]
+            for receive_thread in receive_threads:
+                receive_thread.start()
+        elif batch_size > 0:
+            readers = [
+                BatchReader(snapshot_socket, Snapshot(shared), batch_size=batch_size),
+                BatchReader(incremental_socket, Incremental(shared), batch_size=batch_size),
+            ]
+            for reader in readers:
+                loop.add_reader(reader.sock, reader.read_ready)
+        else:
+            snapshot = loop.create_datagram_endpoint(
+                lambda: Snapshot(shared),
+                sock=snapshot_socket,
+            )
+
+            incremental = loop.create_datagram_endpoint(
+                lambda: Incremental(shared),
+                sock=incremental_socket,
+            )
+
+            tasks = asyncio.gather(snapshot, incremental)
+
+            loop.run_until_complete(tasks)
+
+        def log_metrics():
+            for receive_thread in receive_threads:
+                receive_thread.log()
+            if conflation is not None:
+                conflation.log()
+            loop.call_later(metrics_interval, log_metrics)
+
+        if metrics_interval > 0 and (receive_threads or conflation is not None):
+            loop.call_later(metrics_interval, log_metrics)
+
+        try:
+            loop.run_forever()
+        finally:
+            for receive_thread in receive_threads:
+                receive_thread.stop()
+            for receive_thread in receive_threads:
+                receive_thread.join(timeout=1.0)
 
         loop.close()
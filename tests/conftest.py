@@ -0,0 +1,60 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+import pytest
+
+
+class FakeHandle:
+    """
+    Handle returned by FakeLoop.call_at.
+    """
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeLoop:
+    """
+    Event loop clock controlled by the test (only time and call_at).
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.handles = []
+
+    def time(self):
+        return self.now
+
+    def call_at(self, when, callback, *args):
+        handle = FakeHandle(when, callback, args)
+        self.handles.append(handle)
+        return handle
+
+    def advance(self, seconds):
+        """
+        Move the clock forward, running callbacks (in order) at the time they are due.
+        """
+
+        target = self.now + seconds
+        while True:
+            self.handles = [handle for handle in self.handles if not handle.cancelled]
+            due = [handle for handle in self.handles if handle.when <= target]
+            if not due:
+                break
+            handle = min(due, key=lambda handle: handle.when)
+            self.handles.remove(handle)
+            self.now = max(self.now, handle.when)
+            handle.callback(*handle.args)
+        self.now = target
+
+
+@pytest.fixture
+def loop():
+    return FakeLoop()
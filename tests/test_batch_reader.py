@@ -0,0 +1,65 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+import socket
+
+import pytest
+
+pytest.importorskip("roq")
+
+from roq_samples.sbe_receiver.sbe_receiver import BatchReader  # noqa: E402
+
+
+class Keeper:
+    """
+    Keeps all datagrams (as the re-order buffer does when they arrive out of order).
+    """
+
+    def __init__(self):
+        self.datagrams = []
+        self.batches = []
+
+    def datagrams_received(self, datagrams):
+        self.datagrams.extend(datagrams)
+        self.batches.append(len(datagrams))
+
+
+def _reader(batch_size):
+    local, remote = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    keeper = Keeper()
+    return BatchReader(local, keeper, batch_size=batch_size, max_packet_size=64), keeper, remote
+
+
+def test_datagrams_are_copied():
+    reader, keeper, remote = _reader(2)
+    packets = [bytes([index]) * (index + 1) for index in range(5)]
+    for packet in packets:
+        remote.send(packet)
+    for _ in range(3):
+        reader.read_ready()
+    assert keeper.batches == [2, 2, 1]
+    assert keeper.datagrams == packets
+    assert all(isinstance(data, bytes) for data in keeper.datagrams)
+    remote.close()
+    reader.sock.close()
+
+
+def test_nothing_to_read():
+    reader, keeper, remote = _reader(4)
+    reader.read_ready()
+    assert not keeper.batches
+    assert reader.batches == 0
+    remote.close()
+    reader.sock.close()
+
+
+def test_truncated_datagram_is_dropped():
+    reader, keeper, remote = _reader(4)
+    remote.send(b"x" * 100)
+    remote.send(b"y")
+    reader.read_ready()
+    assert keeper.datagrams == [b"y"]
+    assert reader.truncated == 1
+    remote.close()
+    reader.sock.close()
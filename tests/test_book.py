@@ -0,0 +1,86 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+import array
+
+import pytest
+
+pytest.importorskip("roq")
+
+from roq_samples.fix_session.book import Levels  # noqa: E402
+
+
+def _top(levels, depth):
+    prices = array.array("d", bytes(8 * depth))
+    sizes = array.array("d", bytes(8 * depth))
+    count = levels.top(depth, prices, sizes)
+    return list(zip(prices[:count], sizes[:count]))
+
+
+def test_insert():
+    levels = Levels(False)
+    for price in (101.0, 100.0, 103.0, 102.0):
+        levels.update(price, price / 100.0)
+    assert len(levels) == 4
+    assert list(levels.prices[:4]) == [100.0, 101.0, 102.0, 103.0]
+    assert levels.best() == (100.0, 1.0)
+
+
+def test_update():
+    levels = Levels(True)
+    levels.update(100.0, 1.0)
+    levels.update(101.0, 2.0)
+    levels.update(100.0, 3.0)
+    assert len(levels) == 2
+    assert _top(levels, 2) == [(101.0, 2.0), (100.0, 3.0)]
+
+
+def test_delete():
+    levels = Levels(False)
+    for price in (100.0, 101.0, 102.0):
+        levels.update(price, 1.0)
+    levels.update(101.0, 0.0)
+    assert _top(levels, 3) == [(100.0, 1.0), (102.0, 1.0)]
+    levels.update(100.0, 0.0)
+    levels.update(102.0, 0.0)
+    assert len(levels) == 0
+    assert levels.best() is None
+
+
+def test_delete_unknown_level():
+    levels = Levels(False)
+    levels.update(100.0, 0.0)
+    assert len(levels) == 0
+    levels.update(100.0, 1.0)
+    levels.update(99.0, 0.0)
+    assert _top(levels, 2) == [(100.0, 1.0)]
+
+
+def test_top_bids_best_first():
+    levels = Levels(True)
+    for price in (98.0, 100.0, 99.0, 97.0):
+        levels.update(price, 1.0)
+    assert _top(levels, 2) == [(100.0, 1.0), (99.0, 1.0)]
+    assert _top(levels, 10) == [(100.0, 1.0), (99.0, 1.0), (98.0, 1.0), (97.0, 1.0)]
+
+
+def test_top_asks_best_first():
+    levels = Levels(False)
+    for price in (102.0, 100.0, 101.0):
+        levels.update(price, 1.0)
+    assert _top(levels, 2) == [(100.0, 1.0), (101.0, 1.0)]
+
+
+def test_top_empty():
+    assert not _top(Levels(True), 5)
+
+
+def test_grows():
+    levels = Levels(False, capacity=2)
+    for price in range(100, 0, -1):
+        levels.update(float(price), 1.0)
+    assert len(levels) == 100
+    assert list(levels.prices[:100]) == [float(price) for price in range(1, 101)]
+    levels.clear()
+    assert len(levels) == 0
@@ -0,0 +1,71 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+import pytest
+
+from roq_samples.fix_session.bootstrap import Bootstrap
+
+
+def _bootstrap():
+    sent = []
+    bootstrap = Bootstrap(sent.append)
+    bootstrap.add("security_list", lambda: "security_list")
+    bootstrap.add("definition_1", lambda: "definition_1")
+    bootstrap.add("definition_2", lambda: "definition_2")
+    bootstrap.add("market_data", lambda: "market_data", depends_on=("definition_1",))
+    bootstrap.add("order", lambda: "order", depends_on=("definition_1", "definition_2"))
+    return bootstrap, sent
+
+
+def test_start_sends_independent_steps():
+    bootstrap, sent = _bootstrap()
+    assert not sent
+    bootstrap.start()
+    assert sent == ["security_list", "definition_1", "definition_2"]
+
+
+def test_dependencies():
+    bootstrap, sent = _bootstrap()
+    bootstrap.start()
+    sent.clear()
+    assert bootstrap.complete("definition_2")
+    assert not sent
+    assert bootstrap.complete("definition_1")
+    assert sent == ["market_data", "order"]
+
+
+def test_done():
+    bootstrap, _ = _bootstrap()
+    bootstrap.start()
+    for request_id in ("security_list", "definition_1", "definition_2", "market_data"):
+        assert bootstrap.complete(request_id)
+        assert not bootstrap.done
+    assert bootstrap.complete("order")
+    assert bootstrap.done
+
+
+def test_complete_untracked():
+    bootstrap, _ = _bootstrap()
+    bootstrap.start()
+    assert not bootstrap.complete("unknown")
+    assert not bootstrap.complete("order")  # note! not yet sent
+    assert bootstrap.complete("security_list")
+    assert not bootstrap.complete("security_list")
+
+
+def test_factory_is_called_when_due():
+    created = []
+    bootstrap = Bootstrap(lambda request: None)
+    bootstrap.add("first", lambda: created.append("first"))
+    bootstrap.add("second", lambda: created.append("second"), depends_on=("first",))
+    bootstrap.start()
+    assert created == ["first"]
+    bootstrap.complete("first")
+    assert created == ["first", "second"]
+
+
+def test_unknown_dependency():
+    bootstrap = Bootstrap(lambda request: None)
+    with pytest.raises(AssertionError):
+        bootstrap.add("second", lambda: None, depends_on=("first",))
@@ -0,0 +1,153 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+# pylint: disable=protected-access
+
+import asyncio
+import time
+
+import pytest
+
+roq = pytest.importorskip("roq")
+
+from roq_samples.fix_session import wire  # noqa: E402
+from roq_samples.fix_session.client import MySession  # noqa: E402
+from roq_samples.fix_session.clock import SessionClock  # noqa: E402
+from roq_samples.fix_session.store import SequenceStore  # noqa: E402
+
+
+class FakeTransport:
+    """
+    Transport collecting written messages.
+    """
+
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append(bytes(data))
+
+    def writelines(self, lines):
+        self.written.extend(bytes(line) for line in lines)
+
+    def is_closing(self):
+        return False
+
+
+def _valid(message: bytes) -> bool:
+    trailer = message.rfind(wire.SOH + b"10=") + 1
+    _, body = wire.split(message)
+    return wire.get(message, 10) == wire.checksum(message[:trailer]) and int(wire.get(message, 9)) == len(body)
+
+
+def _session(store=None) -> MySession:
+    return MySession(
+        sender_comp_id="client",
+        target_comp_id="server",
+        username="user",
+        password="secret",
+        store=store,
+        clock=SessionClock(),
+    )
+
+
+def _heartbeat():
+    return roq.codec.fix.Heartbeat(
+        test_req_id="",
+    )
+
+
+def test_sequence_numbers_without_store():
+    session = _session()
+    session.prepare()
+    msg_seq_num, message = session.logon
+    assert msg_seq_num == 1
+    assert wire.get(message, 34) == b"1"
+    assert session._encode(_heartbeat())[0] == 2
+
+
+def test_continue_from_store(tmp_path):
+    store = SequenceStore(str(tmp_path / "test.store"))
+    store.append(999999, b"last")
+    start = time.perf_counter()
+    session = _session(store)
+    session.prepare()
+    # note! the encoder is not replayed up to the stored sequence number
+    assert time.perf_counter() - start < 0.1
+    msg_seq_num, message = session.logon
+    assert msg_seq_num == 1000000
+    assert wire.get(message, 34) == b"1000000"
+    assert _valid(message)
+    msg_seq_num, message = session._encode(_heartbeat())
+    assert msg_seq_num == 1000001
+    assert wire.get(message, 34) == b"1000001"
+    assert _valid(message)
+    store.close()
+
+
+def test_logon_is_stored_when_written(tmp_path):
+    store = SequenceStore(str(tmp_path / "test.store"))
+    session = _session(store)
+    session.prepare()
+    assert store.next_outbound == 1
+    transport = FakeTransport()
+
+    async def connect():
+        session.connection_made(transport)
+
+    asyncio.run(connect())
+    assert len(transport.written) == 1
+    message = transport.written[0]
+    assert bytes(store.get(1)) == message
+    assert store.next_outbound == 2
+    assert _valid(message)
+    store.close()
+
+
+def test_logon_sending_time_is_refreshed():
+    session = _session()
+    session.prepare()
+    _, encoded = session.logon
+    time.sleep(0.01)
+    transport = FakeTransport()
+
+    async def connect():
+        session.connection_made(transport)
+
+    asyncio.run(connect())
+    message = transport.written[0]
+    assert wire.get(message, 52) >= wire.get(encoded, 52)
+    assert wire.get(message, 34) == wire.get(encoded, 34)
+    assert _valid(message)
+
+
+def test_inbound_gap_is_not_persisted(tmp_path):
+    store = SequenceStore(str(tmp_path / "test.store"))
+    store.set_next_inbound(5)
+    session = _session(store)
+    session.prepare()
+    for msg_seq_num in (8, 9):
+        session._sequence_inbound(msg_seq_num)
+    assert store.next_inbound == 5
+    for msg_seq_num in (5, 6):
+        session._sequence_inbound(msg_seq_num)
+    assert store.next_inbound == 7
+    session._sequence_inbound(7)
+    assert store.next_inbound == 10
+    session._sequence_inbound(10)
+    assert store.next_inbound == 11
+    store.close()
+
+
+def test_template_orders_and_encoder_share_sequence_numbers():
+    session = _session()
+    session.prepare()
+    template = session._get_order_template("A1", "deribit", "BTC-PERPETUAL", roq.fix.Side.BUY)
+    for msg_seq_num in (2, 3, 4):
+        message = session._encode_order(template, f"order_{msg_seq_num}", 100.0, 1)
+        assert wire.get(message, 34) == str(msg_seq_num).encode()
+    msg_seq_num, message = session._encode(_heartbeat())
+    assert msg_seq_num == 5
+    assert wire.get(message, 34) == b"5"
+    assert _valid(message)
@@ -0,0 +1,56 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+from datetime import datetime, timedelta
+
+from roq_samples.fix_session.clock import SessionClock
+
+
+class FakeClocks:
+    def __init__(self):
+        self.monotonic = 0.0
+        self.wall = datetime(2026, 1, 1)
+
+    def advance(self, seconds):
+        self.monotonic += seconds
+        self.wall += timedelta(seconds=seconds)
+
+
+def _clock(clocks, resolution=0.001):
+    return SessionClock(
+        resolution=resolution,
+        monotonic=lambda: clocks.monotonic,
+        wall=lambda: clocks.wall,
+    )
+
+
+def test_cached_within_resolution():
+    clocks = FakeClocks()
+    clock = _clock(clocks)
+    first = clock.now()
+    clocks.advance(0.0005)
+    assert clock.now() is first
+    assert clock.refreshes == 1
+
+
+def test_refreshed_after_resolution():
+    clocks = FakeClocks()
+    clock = _clock(clocks)
+    first = clock.now()
+    clocks.advance(0.001)
+    second = clock.now()
+    assert second == first + timedelta(milliseconds=1)
+    assert clock.refreshes == 2
+
+
+def test_zero_resolution_always_refreshes():
+    clocks = FakeClocks()
+    clock = _clock(clocks, resolution=0.0)
+    for _ in range(3):
+        clock.now()
+    assert clock.refreshes == 3
+
+
+def test_shared_per_loop(loop):
+    assert SessionClock.get(loop) is SessionClock.get(loop)
@@ -0,0 +1,111 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+# pylint: disable=function-redefined,too-few-public-methods
+
+import pytest
+
+from fastcore.all import typedispatch
+
+from roq_samples.fix_session.dispatch import DispatchTable, _ignore
+
+
+class Header:
+    """
+    Message header.
+    """
+
+
+class Heartbeat:
+    """
+    Message handled by the base class.
+    """
+
+
+class Logon:
+    """
+    Message handled by the base class and the mixin.
+    """
+
+
+class Logout:
+    """
+    Message without handler.
+    """
+
+
+class Base:
+    """
+    Handles Heartbeat and Logon.
+    """
+
+    @typedispatch
+    def _callback(self, header: Header, heartbeat: Heartbeat):
+        return "base.heartbeat"
+
+    @typedispatch
+    def _callback(self, header: Header, logon: Logon):
+        return "base.logon"
+
+
+class Mixin:
+    """
+    Overrides Logon.
+    """
+
+    @typedispatch
+    def _callback(self, header: Header, logon: Logon):
+        return "mixin.logon"
+
+
+class Session(Mixin, Base):
+    """
+    The mixin comes first in the MRO.
+    """
+
+
+def _handle(table, message):
+    return table.resolve(Header, type(message))(None, Header(), message)
+
+
+def test_mixin_overrides_base():
+    table = DispatchTable(Session)
+    assert _handle(table, Logon()) == "mixin.logon"
+    assert _handle(table, Heartbeat()) == "base.heartbeat"
+
+
+def test_base_only():
+    table = DispatchTable(Base)
+    assert _handle(table, Logon()) == "base.logon"
+
+
+def test_unknown_message_is_ignored():
+    table = DispatchTable(Session)
+    assert table.resolve(Header, Logout) is _ignore
+    assert _handle(table, Logout()) is None
+
+
+def test_handlers_are_cached():
+    table = DispatchTable(Session)
+    assert not table.handlers
+    handler = table.resolve(Header, Logon)
+    assert table.handlers == {Logon: handler}
+    assert table.resolve(Header, Logon) is handler
+
+
+def test_shared_per_class():
+    assert DispatchTable.get(Session) is DispatchTable.get(Session)
+    assert DispatchTable.get(Session) is not DispatchTable.get(Base)
+
+
+def test_my_session_overrides_client():
+    roq = pytest.importorskip("roq")
+    from roq_samples.fix_session.client import Client, MySession  # pylint: disable=import-outside-toplevel
+
+    table = DispatchTable.get(MySession)
+    header = roq.codec.fix.Header
+    assert table.resolve(header, roq.codec.fix.Logon).__qualname__.startswith("MyMixin.")
+    assert table.resolve(header, roq.codec.fix.ResendRequest).__qualname__.startswith("Client.")
+    assert DispatchTable.get(Client).resolve(header, roq.codec.fix.Logon).__qualname__.startswith("Client.")
+    assert table.resolve(header, type("Unknown", (), {})) is _ignore
@@ -0,0 +1,71 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+from roq_samples.fix_session.framing import FrameBuffer
+
+
+class LineDecoder:
+    """
+    Decodes newline terminated messages (same interface as the FIX decoder).
+    """
+
+    def dispatch(self, callback, frame):
+        data = bytes(frame)
+        index = data.find(b"\n")
+        if index < 0:
+            return 0
+        callback(None, data[:index])
+        return index + 1
+
+
+def _dispatch(buffer):
+    messages = []
+    count = buffer.dispatch(LineDecoder(), lambda header, message: messages.append(message))
+    assert count == len(messages)
+    return messages
+
+
+def test_complete_messages():
+    buffer = FrameBuffer(capacity=64)
+    buffer.append(b"one\ntwo\n")
+    assert _dispatch(buffer) == [b"one", b"two"]
+    assert len(buffer) == 0
+    assert buffer.head == 0 and buffer.tail == 0
+
+
+def test_partial_message():
+    buffer = FrameBuffer(capacity=64)
+    buffer.append(b"one\ntw")
+    assert _dispatch(buffer) == [b"one"]
+    assert len(buffer) == 2
+    buffer.append(b"o\n")
+    assert _dispatch(buffer) == [b"two"]
+
+
+def test_compaction():
+    buffer = FrameBuffer(capacity=16, compact_threshold=4)
+    buffer.append(b"12345\n6")
+    assert _dispatch(buffer) == [b"12345"]
+    assert buffer.head == 0 and buffer.tail == 1
+    assert len(buffer.buffer) == 16
+
+
+def test_grows_for_large_message():
+    buffer = FrameBuffer(capacity=8)
+    message = b"x" * 100
+    for index in range(0, len(message), 7):
+        buffer.append(message[index : index + 7])
+        assert _dispatch(buffer) == []
+    buffer.append(b"\n")
+    assert _dispatch(buffer) == [message]
+
+
+def test_buffered_protocol():
+    buffer = FrameBuffer(capacity=64, read_size=16)
+    region = buffer.get_buffer(-1)
+    assert len(region) >= 16
+    region[:4] = b"abc\n"
+    region.release()
+    buffer.buffer_updated(4)
+    assert _dispatch(buffer) == [b"abc"]
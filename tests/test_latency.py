@@ -0,0 +1,78 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip("roq")
+
+from roq_samples.fix_session.latency import Histogram  # noqa: E402
+
+
+def _exact(values, percentile):
+    values = sorted(values)
+    return values[max(1, int(len(values) * percentile / 100.0 + 0.5)) - 1]
+
+
+def test_empty():
+    histogram = Histogram()
+    assert histogram.percentile(50) == 0
+    assert repr(histogram) == "count=0"
+
+
+def test_small_values_are_exact():
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.record(value)
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(99) == 99
+    assert histogram.percentile(100) == 100
+    assert histogram.min == 1
+    assert histogram.max == 100
+
+
+def test_percentile_bounds():
+    histogram = Histogram()
+    generator = random.Random(1)
+    values = [int(generator.lognormvariate(10.0, 2.0)) for _ in range(10000)]
+    for value in values:
+        histogram.record(value)
+    error = 2 ** (1 - histogram.bits)
+    for percentile in (1, 10, 50, 90, 99, 99.9, 100):
+        exact = _exact(values, percentile)
+        value = histogram.percentile(percentile)
+        # note! reported as the lowest value of the bucket
+        assert value <= exact
+        assert exact - value <= error * exact
+    assert histogram.min == min(values)
+    assert histogram.max == max(values)
+    assert histogram.total == sum(values)
+
+
+def test_bucket_boundaries():
+    histogram = Histogram(bits=4)
+    for value in range(1 << 12):
+        index = histogram._index(value)  # pylint: disable=protected-access
+        low = histogram._value(index)  # pylint: disable=protected-access
+        assert low <= value
+        assert value - low <= value * 2 ** (1 - histogram.bits)
+
+
+def test_clamped():
+    histogram = Histogram(max_value=1000)
+    histogram.record(-5)
+    histogram.record(10**9)
+    assert histogram.min == 0
+    assert histogram.max == 1000
+    assert histogram.percentile(100) == 1000
+
+
+def test_reset():
+    histogram = Histogram()
+    histogram.record(123)
+    histogram.reset()
+    assert histogram.count == 0
+    assert histogram.percentile(50) == 0
+    assert not any(histogram.counts)
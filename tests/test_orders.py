@@ -0,0 +1,73 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+roq = pytest.importorskip("roq")
+
+from roq_samples.fix_session.orders import OrderStates  # noqa: E402
+
+
+def _execution_report(cl_ord_id="", order_id="", orig_cl_ord_id="", ord_status=None, leaves_qty=1.0):
+    return SimpleNamespace(
+        cl_ord_id=cl_ord_id,
+        order_id=order_id,
+        orig_cl_ord_id=orig_cl_ord_id,
+        symbol="BTC-PERPETUAL",
+        side=roq.fix.Side.BUY,
+        ord_status=roq.fix.OrdStatus.NEW if ord_status is None else ord_status,
+        order_qty=1.0,
+        price=100.0,
+        cum_qty=0.0,
+        leaves_qty=leaves_qty,
+        avg_px=0.0,
+    )
+
+
+def test_new_order():
+    orders = OrderStates()
+    order = orders.apply(_execution_report("a", "1"))
+    assert orders.get("a") is order
+    assert orders.get_by_order_id("1") is order
+
+
+def test_replace_moves_cl_ord_id():
+    orders = OrderStates()
+    order = orders.apply(_execution_report("a", "1"))
+    assert orders.apply(_execution_report("a2", "1", orig_cl_ord_id="a")) is order
+    assert order.cl_ord_id == "a2"
+    assert orders.get("a") is None
+    assert len(orders) == 1
+
+
+def test_terminal_moves_to_history():
+    orders = OrderStates()
+    orders.apply(_execution_report("a", "1"))
+    orders.apply(_execution_report("a", "1", ord_status=roq.fix.OrdStatus.CANCELED, leaves_qty=0.0))
+    assert len(orders) == 0
+    assert orders.get("a") is not None
+    assert orders.get_by_order_id("1") is None
+
+
+def test_known_only_by_order_id():
+    orders = OrderStates()
+    order = orders.apply(_execution_report(order_id="1"))
+    assert orders.get_by_order_id("1") is order
+
+
+def test_unknown_order_is_ignored():
+    orders = OrderStates()
+    assert orders.apply(_execution_report()) is None
+    assert orders.apply(_execution_report(order_id="NONE")) is None
+    assert len(orders) == 0
+    assert orders.get("NONE") is None
+
+
+def test_unknown_order_id_is_not_indexed():
+    orders = OrderStates()
+    orders.apply(_execution_report("a", "NONE"))
+    assert orders.get("a").order_id == ""
+    assert orders.get_by_order_id("NONE") is None
@@ -0,0 +1,76 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+import math
+import os
+from types import SimpleNamespace
+
+from roq_samples.fix_session.refdata import Instrument, ReferenceData, open_refdata
+
+
+def _definition(symbol, **kwargs):
+    return SimpleNamespace(symbol=symbol, security_exchange="deribit", **kwargs)
+
+
+def test_append_and_reload(tmp_path):
+    refdata = open_refdata(str(tmp_path), "server")
+    assert refdata.update(_definition("BTC-PERPETUAL", currency="USD", min_price_increment=0.5))
+    assert refdata.update(_definition("ETH-PERPETUAL"))
+    refdata.flush()
+    reloaded = open_refdata(str(tmp_path), "server")
+    assert len(reloaded) == 2
+    assert reloaded.records == 2
+    instrument = reloaded.get("deribit", "BTC-PERPETUAL")
+    assert instrument == Instrument("BTC-PERPETUAL", "deribit", "USD", 0.5)
+    assert math.isnan(instrument.contract_multiplier)
+    assert ("deribit", "ETH-PERPETUAL") in reloaded
+
+
+def test_only_changes_are_appended(tmp_path):
+    refdata = ReferenceData(str(tmp_path / "test.refdata"))
+    assert refdata.update(_definition("BTC-PERPETUAL", currency="USD"))
+    assert not refdata.update(_definition("BTC-PERPETUAL", currency="USD"))
+    # note! undefined fields do not change the instrument
+    assert not refdata.update(_definition("BTC-PERPETUAL"))
+    assert refdata.update(_definition("BTC-PERPETUAL", min_trade_vol=1.0))
+    refdata.flush()
+    reloaded = ReferenceData(refdata.path)
+    assert reloaded.records == 2
+    assert reloaded.get("deribit", "BTC-PERPETUAL") == Instrument("BTC-PERPETUAL", "deribit", "USD", min_trade_vol=1.0)
+
+
+def test_compact(tmp_path):
+    refdata = ReferenceData(str(tmp_path / "test.refdata"))
+    for price in range(1, 1100):
+        refdata.update(_definition("BTC-PERPETUAL", min_price_increment=float(price)))
+        refdata.flush()
+    assert refdata.records < 1024
+    reloaded = ReferenceData(refdata.path)
+    assert len(reloaded) == 1
+    assert reloaded.records == refdata.records
+    assert reloaded.get("deribit", "BTC-PERPETUAL").min_price_increment == 1099.0
+
+
+def test_compact_keeps_changes_of_other_writers(tmp_path):
+    path = str(tmp_path / "test.refdata")
+    first = ReferenceData(path)
+    second = ReferenceData(path)
+    second.update(_definition("ETH-PERPETUAL", currency="USD"))
+    second.flush()
+    first.update(_definition("BTC-PERPETUAL"))
+    first._compact()  # pylint: disable=protected-access
+    reloaded = ReferenceData(path)
+    assert len(reloaded) == 2
+    assert reloaded.get("deribit", "ETH-PERPETUAL").currency == "USD"
+
+
+def test_incomplete_record_is_ignored(tmp_path):
+    refdata = ReferenceData(str(tmp_path / "test.refdata"))
+    refdata.update(_definition("BTC-PERPETUAL"))
+    refdata.update(_definition("ETH-PERPETUAL"))
+    refdata.flush()
+    os.truncate(refdata.path, os.path.getsize(refdata.path) - 1)
+    reloaded = ReferenceData(refdata.path)
+    assert len(reloaded) == 1
+    assert reloaded.get("deribit", "BTC-PERPETUAL") is not None
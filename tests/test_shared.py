@@ -0,0 +1,71 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("roq")
+
+from roq_samples.sbe_receiver import sbe_receiver  # noqa: E402
+
+
+class Recorder:
+    """
+    Instrument recording the updates applied.
+    """
+
+    def __init__(self, exchange, symbol, instrument_id, depth, conflation):  # pylint: disable=unused-argument
+        self.exchange = exchange
+        self.symbol = symbol
+        self.instrument_id = instrument_id
+        self.updates = []
+
+    def apply(self, market_by_price_update, header):  # pylint: disable=unused-argument
+        self.updates.append(market_by_price_update)
+
+
+@pytest.fixture(name="shared")
+def fixture_shared(monkeypatch):
+    monkeypatch.setattr(sbe_receiver, "Instrument", Recorder)
+    return sbe_receiver.Shared()
+
+
+def _update(shared, object_id, symbol, exchange="cme"):
+    update = SimpleNamespace(exchange=exchange, symbol=symbol)
+    shared.update(update, SimpleNamespace(object_id=object_id))
+    return update
+
+
+def test_instruments_are_looked_up_once(shared):
+    first = _update(shared, 7, "ESZ6")
+    second = _update(shared, 7, "ESZ6")
+    (instrument,) = shared.instruments
+    assert instrument.updates == [first, second]
+    assert shared.by_object_id == {7: instrument}
+
+
+def test_large_object_id(shared):
+    _update(shared, 1 << 40, "ESZ6")
+    _update(shared, 3, "NQZ6")
+    assert len(shared.by_object_id) == 2
+    assert [instrument.instrument_id for instrument in shared.instruments] == [0, 1]
+
+
+def test_object_ids_of_the_same_instrument(shared):
+    _update(shared, 1, "ESZ6")
+    _update(shared, 2, "ESZ6")
+    assert len(shared.instruments) == 1
+    assert shared.by_object_id[1] is shared.by_object_id[2]
+
+
+def test_reused_object_id(shared, caplog):
+    _update(shared, 1, "ESZ6")
+    with caplog.at_level(logging.WARNING):
+        update = _update(shared, 1, "NQZ6")
+    assert "object_id=1 has been reused" in caplog.text
+    assert shared.by_object_id[1].symbol == "NQZ6"
+    assert shared.by_object_id[1].updates == [update]
+    assert len(shared.instruments[0].updates) == 1
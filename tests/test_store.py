@@ -0,0 +1,89 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+from roq_samples.fix_session.store import SequenceStore, open_store
+
+
+def test_append_and_get(tmp_path):
+    store = SequenceStore(str(tmp_path / "test.store"))
+    assert store.next_outbound == 1
+    store.append(1, b"first")
+    store.append(2, b"second")
+    assert bytes(store.get(1)) == b"first"
+    assert bytes(store.get(2)) == b"second"
+    assert store.get(3) is None
+    assert store.next_outbound == 3
+    store.close()
+
+
+def test_reopen(tmp_path):
+    path = str(tmp_path / "test.store")
+    store = SequenceStore(path)
+    store.append(1, b"first")
+    store.append(2, b"second")
+    store.set_next_inbound(42)
+    store.close()
+    store = SequenceStore(path)
+    assert store.next_outbound == 3
+    assert store.next_inbound == 42
+    assert bytes(store.get(2)) == b"second"
+    store.append(3, b"third")
+    assert bytes(store.get(3)) == b"third"
+    store.close()
+
+
+def test_grows(tmp_path):
+    store = SequenceStore(str(tmp_path / "test.store"), capacity=256)
+    message = b"x" * 100
+    for msg_seq_num in range(1, 101):
+        store.append(msg_seq_num, message)
+    assert len(store.mmap) > 256
+    assert all(bytes(store.get(msg_seq_num)) == message for msg_seq_num in range(1, 101))
+    store.close()
+
+
+def test_reset(tmp_path):
+    path = str(tmp_path / "test.store")
+    store = SequenceStore(path)
+    store.append(1, b"first")
+    store.reset()
+    assert store.next_outbound == 1
+    assert store.get(1) is None
+    store.close()
+    store = SequenceStore(path)
+    assert store.next_outbound == 1
+    assert store.get(1) is None
+    store.close()
+
+
+def test_open_store(tmp_path):
+    store = open_store(str(tmp_path), "sender", "target")
+    store.append(1, b"first")
+    store.close()
+    store = open_store(str(tmp_path), "sender", "target")
+    assert bytes(store.get(1)) == b"first"
+    store.close()
+
+
+def test_reset_shrinks(tmp_path):
+    store = SequenceStore(str(tmp_path / "test.store"), capacity=256)
+    for msg_seq_num in range(1, 101):
+        store.append(msg_seq_num, b"x" * 100)
+    store.reset()
+    assert len(store.mmap) == 256
+    store.append(1, b"first")
+    assert bytes(store.get(1)) == b"first"
+    store.close()
+
+
+def test_open_store_reset(tmp_path):
+    store = open_store(str(tmp_path), "sender", "target")
+    store.append(1, b"first")
+    store.set_next_inbound(42)
+    store.close()
+    store = open_store(str(tmp_path), "sender", "target", reset=True)
+    assert store.next_outbound == 1
+    assert store.next_inbound == 1
+    assert store.get(1) is None
+    store.close()
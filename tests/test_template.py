@@ -0,0 +1,67 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+roq = pytest.importorskip("roq")
+
+from roq_samples.fix_session import wire  # noqa: E402
+from roq_samples.fix_session.template import OrderTemplate, decimal  # noqa: E402
+
+
+def _template() -> OrderTemplate:
+    return OrderTemplate(
+        "client",
+        "server",
+        "A1",
+        "deribit",
+        "BTC-PERPETUAL",
+        roq.fix.Side.BUY,
+    )
+
+
+def _valid(message: bytes) -> bool:
+    trailer = message.rfind(wire.SOH + b"10=") + 1
+    _, body = wire.split(message)
+    return wire.get(message, 10) == wire.checksum(message[:trailer]) and int(wire.get(message, 9)) == len(body)
+
+
+def test_decimal():
+    assert decimal(1) == b"1"
+    assert decimal(10000.5) == b"10000.5"
+    assert decimal(0.125) == b"0.125"
+    assert decimal(100.0) == b"100"
+    assert decimal(b"1.5") == b"1.5"
+
+
+def test_render():
+    template = _template()
+    now = datetime(2026, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+    message = template.render(1234, now, "order_1", 10000.5, 2)
+    assert _valid(message)
+    assert wire.get(message, 8) == b"FIX.4.4"
+    assert wire.get(message, 34) == b"1234"
+    assert wire.get(message, 52) == b"20260102-03:04:05.678"
+    assert wire.get(message, 11) == b"order_1"
+    assert wire.get(message, 44) == b"10000.5"
+    assert wire.get(message, 38) == b"2"
+    assert wire.get(message, 60) == b"20260102-03:04:05.678"
+    assert wire.get(message, 55) == b"BTC-PERPETUAL"
+
+
+def test_render_reuses_buffer():
+    template = _template()
+    now = datetime.now(timezone.utc)
+    first = template.render(9, now, "a", 1, 1)
+    second = template.render(10, now, "order_with_a_longer_id", 123456.25, 1000)
+    assert _valid(first)
+    assert _valid(second)
+    assert wire.get(first, 34) == b"9"
+    assert wire.get(first, 11) == b"a"
+    assert wire.get(second, 34) == b"10"
+    assert wire.get(second, 11) == b"order_with_a_longer_id"
+    assert wire.get(second, 44) == b"123456.25"
+    assert wire.get(second, 38) == b"1000"
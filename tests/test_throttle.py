@@ -0,0 +1,225 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+from datetime import datetime
+
+import pytest
+
+roq = pytest.importorskip("roq")
+
+from roq_samples.fix_session.throttle import OrderScheduler, TokenBucket  # noqa: E402
+
+
+def _new_order_single(cl_ord_id, order_qty=1, price=100.0):
+    return roq.codec.fix.NewOrderSingle(
+        cl_ord_id=cl_ord_id,
+        account="A1",
+        symbol="BTC-PERPETUAL",
+        security_exchange="deribit",
+        side=roq.fix.Side.BUY,
+        transact_time=datetime.now(),
+        order_qty=order_qty,
+        ord_type=roq.fix.OrdType.LIMIT,
+        price=price,
+        time_in_force=roq.fix.TimeInForce.GTC,
+    )
+
+
+def _order_cancel_replace_request(cl_ord_id, orig_cl_ord_id, order_qty=1, price=100.0):
+    return roq.codec.fix.OrderCancelReplaceRequest(
+        cl_ord_id=cl_ord_id,
+        orig_cl_ord_id=orig_cl_ord_id,
+        account="A1",
+        symbol="BTC-PERPETUAL",
+        security_exchange="deribit",
+        side=roq.fix.Side.BUY,
+        transact_time=datetime.now(),
+        order_qty=order_qty,
+        ord_type=roq.fix.OrdType.LIMIT,
+        price=price,
+        time_in_force=roq.fix.TimeInForce.GTC,
+    )
+
+
+def _order_cancel_request(cl_ord_id, orig_cl_ord_id):
+    return roq.codec.fix.OrderCancelRequest(
+        cl_ord_id=cl_ord_id,
+        orig_cl_ord_id=orig_cl_ord_id,
+        account="A1",
+        symbol="BTC-PERPETUAL",
+        security_exchange="deribit",
+        side=roq.fix.Side.BUY,
+        transact_time=datetime.now(),
+    )
+
+
+def _scheduler(loop, rate=10.0, burst=1):
+    sent = []
+    return OrderScheduler(loop, sent.append, rate, burst), sent
+
+
+def test_token_bucket(loop):
+    bucket = TokenBucket(8.0, 2, loop.time)
+    assert bucket.take()
+    assert bucket.take()
+    assert not bucket.take()
+    assert bucket.delay() == 0.125
+    loop.now += 0.125
+    assert bucket.take()
+    assert not bucket.take()
+
+
+def test_token_bucket_burst_after_idle(loop):
+    bucket = TokenBucket(8.0, 2, loop.time)
+    assert bucket.take()
+    loop.now += 10.0
+    assert bucket.take()
+    assert bucket.take()
+    assert not bucket.take()
+
+
+def test_sent_immediately_with_tokens(loop):
+    scheduler, sent = _scheduler(loop, burst=2)
+    scheduler.submit(_new_order_single("a"))
+    scheduler.submit(_new_order_single("b"))
+    assert [message.cl_ord_id for message in sent] == ["a", "b"]
+    assert not scheduler.queued
+
+
+def test_other_messages_are_not_paced(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))
+    heartbeat = roq.codec.fix.Heartbeat(test_req_id="")
+    scheduler.submit(heartbeat)
+    assert sent[-1] is heartbeat
+
+
+def test_priorities(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))  # note! uses the only token
+    scheduler.submit(_new_order_single("b"))
+    scheduler.submit(_order_cancel_replace_request("a2", "a"))
+    scheduler.submit(_order_cancel_request("x2", "x"))
+    loop.advance(1.0)
+    assert [type(message).__name__ for message in sent] == [
+        "NewOrderSingle",
+        "OrderCancelRequest",
+        "OrderCancelReplaceRequest",
+        "NewOrderSingle",
+    ]
+
+
+def test_rate(loop):
+    scheduler, sent = _scheduler(loop, rate=8.0)  # note! exact in binary floating point
+    for index in range(5):
+        scheduler.submit(_new_order_single(f"o{index}"))
+    assert len(sent) == 1
+    loop.advance(0.125)
+    assert len(sent) == 2
+    loop.advance(0.25)
+    assert len(sent) == 4
+    loop.advance(0.125)
+    assert len(sent) == 5
+
+
+def test_amend_replaces_queued_amend(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))
+    scheduler.submit(_order_cancel_replace_request("a2", "a", order_qty=2))
+    scheduler.submit(_order_cancel_replace_request("a3", "a", order_qty=3))
+    loop.advance(1.0)
+    assert [message.cl_ord_id for message in sent] == ["a", "a3"]
+    assert scheduler.replaced == 1
+
+
+def test_amend_merged_into_queued_new_order(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))
+    scheduler.submit(_new_order_single("b"))
+    scheduler.submit(_order_cancel_replace_request("b2", "b", order_qty=2, price=101.0))
+    loop.advance(1.0)
+    assert [message.cl_ord_id for message in sent] == ["a", "b2"]
+    assert type(sent[1]) is roq.codec.fix.NewOrderSingle
+    assert sent[1].order_qty == 2
+    assert sent[1].price == 101.0
+    assert sent[1].account == "A1"
+    assert sent[1].symbol == "BTC-PERPETUAL"
+    assert scheduler.replaced == 1
+
+
+def test_cancel_of_amended_queued_new_order(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))
+    scheduler.submit(_new_order_single("b"))
+    scheduler.submit(_order_cancel_replace_request("b2", "b", order_qty=2))
+    scheduler.submit(_order_cancel_request("b3", "b2"))
+    loop.advance(1.0)
+    assert [message.cl_ord_id for message in sent] == ["a"]
+    assert not scheduler.queued
+
+
+def test_cancel_of_queued_amend(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))
+    scheduler.submit(_order_cancel_replace_request("b", "a", order_qty=2))
+    scheduler.submit(_order_cancel_request("c", "b"))
+    loop.advance(1.0)
+    assert [message.cl_ord_id for message in sent] == ["a", "c"]
+    assert sent[1].orig_cl_ord_id == "a"
+    assert scheduler.replaced == 1
+    assert not scheduler.queued
+
+
+def test_amend_of_queued_amend(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))
+    scheduler.submit(_order_cancel_replace_request("b", "a", order_qty=2))
+    scheduler.submit(_order_cancel_replace_request("c", "b", order_qty=3))
+    scheduler.submit(_order_cancel_request("d", "c"))
+    loop.advance(1.0)
+    assert [message.cl_ord_id for message in sent] == ["a", "d"]
+    assert sent[1].orig_cl_ord_id == "a"
+    assert not scheduler.queued
+
+
+def test_queued_amend_is_sent_for_the_exchange_order(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))
+    scheduler.submit(_order_cancel_replace_request("b", "a", order_qty=2))
+    scheduler.submit(_order_cancel_replace_request("c", "b", order_qty=3))
+    loop.advance(1.0)
+    assert [message.cl_ord_id for message in sent] == ["a", "c"]
+    assert sent[1].orig_cl_ord_id == "a"
+    assert sent[1].order_qty == 3
+    assert not scheduler.queued
+
+
+def test_cancel_removes_queued_new_order(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))
+    scheduler.submit(_new_order_single("b"))
+    scheduler.submit(_order_cancel_request("b2", "b"))
+    loop.advance(1.0)
+    assert [message.cl_ord_id for message in sent] == ["a"]
+    assert scheduler.dropped == 2
+
+
+def test_amend_of_queued_cancel_is_dropped(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))
+    scheduler.submit(_order_cancel_request("a2", "a"))
+    scheduler.submit(_order_cancel_replace_request("a3", "a"))
+    loop.advance(1.0)
+    assert [message.cl_ord_id for message in sent] == ["a", "a2"]
+    assert scheduler.dropped == 1
+
+
+def test_close_discards_queued(loop):
+    scheduler, sent = _scheduler(loop)
+    scheduler.submit(_new_order_single("a"))
+    scheduler.submit(_new_order_single("b"))
+    scheduler.close()
+    loop.advance(1.0)
+    assert len(sent) == 1
+    assert not scheduler.queued
@@ -0,0 +1,73 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+from roq_samples.fix_session.timer import TimerWheel
+
+
+def test_fires_after_delay(loop):
+    wheel = TimerWheel(loop, resolution=0.1)
+    fired = []
+    wheel.schedule_ticks(3, lambda: fired.append(wheel.tick))
+    loop.advance(0.25)
+    assert not fired
+    loop.advance(0.1)
+    assert fired == [3]
+    assert wheel.pending == 0
+
+
+def test_cancel(loop):
+    wheel = TimerWheel(loop, resolution=0.1)
+    fired = []
+    timer = wheel.schedule_ticks(2, lambda: fired.append(wheel.tick))
+    timer.cancel()
+    loop.advance(1.0)
+    assert not fired
+    assert wheel.pending == 0
+
+
+def test_expiry_beyond_one_rotation(loop):
+    wheel = TimerWheel(loop, resolution=0.1, slots=8)
+    fired = []
+    wheel.schedule_ticks(20, lambda: fired.append(wheel.tick))
+    for _ in range(25):
+        loop.advance(0.1)
+    assert fired == [20]
+
+
+def test_reschedule_during_catch_up(loop):
+    """
+    A callback rescheduling itself (as the heartbeat timer does) while the
+    wheel is catching up after a stall must not skip other timers.
+    """
+
+    wheel = TimerWheel(loop, resolution=0.01)
+    fired = []
+
+    def heartbeat():
+        fired.append(("heartbeat", wheel.tick))
+        wheel.schedule_ticks(100, heartbeat)
+
+    wheel.schedule_ticks(1, heartbeat)
+    wheel.schedule_ticks(3, lambda: fired.append(("timeout", wheel.tick)))
+    loop.now += 1.0  # note! the loop was stalled
+    loop.advance(0.0)
+    assert fired == [("heartbeat", 1), ("timeout", 3)]
+    assert wheel.tick == 100
+    loop.advance(0.01)
+    assert fired[-1] == ("heartbeat", 101)
+
+
+def test_idle_wheel_catches_up(loop):
+    wheel = TimerWheel(loop, resolution=0.125)  # note! exact in binary floating point
+    loop.advance(5.0)
+    fired = []
+    wheel.schedule(0.25, lambda: fired.append(loop.time()))
+    loop.advance(0.125)
+    assert not fired
+    loop.advance(0.125)
+    assert fired == [5.25]
+
+
+def test_shared_per_loop(loop):
+    assert TimerWheel.get(loop) is TimerWheel.get(loop)
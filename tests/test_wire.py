@@ -0,0 +1,96 @@
+"""
+Copyright (c) 2017-2026, Hans Erik Thrane
+"""
+
+from datetime import datetime, timezone
+
+from roq_samples.fix_session import wire
+
+
+SOH = wire.SOH
+
+
+def _message(msg_type: bytes = b"D", msg_seq_num: int = 7) -> bytes:
+    body = (
+        b"35="
+        + msg_type
+        + SOH
+        + b"49=client"
+        + SOH
+        + b"56=server"
+        + SOH
+        + b"34="
+        + str(msg_seq_num).encode()
+        + SOH
+        + b"52=20260101-00:00:00.000"
+        + SOH
+        + b"11=order1"
+        + SOH
+    )
+    return wire.finalize(b"FIX.4.4", body)
+
+
+def _valid(message: bytes) -> bool:
+    trailer = message.rfind(SOH + b"10=") + 1
+    begin_string, body = wire.split(message)
+    return (
+        wire.get(message, 10) == wire.checksum(message[:trailer])
+        and int(wire.get(message, 9)) == len(body)
+        and begin_string == b"FIX.4.4"
+    )
+
+
+def test_finalize():
+    message = _message()
+    assert message.startswith(b"8=FIX.4.4" + SOH + b"9=")
+    assert message.endswith(SOH)
+    assert _valid(message)
+
+
+def test_find_and_get():
+    message = _message()
+    assert wire.get(message, 8) == b"FIX.4.4"
+    assert wire.get(message, 35) == b"D"
+    assert wire.get(message, 11) == b"order1"
+    assert wire.get(message, 1) is None
+    # note! tag 4 must not match the 4 of tag 34
+    assert wire.find(message, 4) is None
+
+
+def test_replace():
+    message = wire.replace(_message(msg_seq_num=7), 34, b"1234")
+    assert wire.get(message, 34) == b"1234"
+    assert _valid(message)
+    message = wire.replace(message, 34, b"8")
+    assert message == _message(msg_seq_num=8)
+
+
+def test_replace_sending_time():
+    message = wire.replace(_message(), 52, b"20260102-03:04:05.678")
+    assert wire.get(message, 52) == b"20260102-03:04:05.678"
+    assert wire.get(message, 11) == b"order1"
+    assert _valid(message)
+
+
+def test_possible_duplicate():
+    message = wire.possible_duplicate(_message())
+    assert wire.get(message, 43) == b"Y"
+    assert wire.get(message, 122) == b"20260101-00:00:00.000"
+    assert wire.get(message, 52) != b"20260101-00:00:00.000"
+    assert wire.get(message, 11) == b"order1"
+    assert _valid(message)
+
+
+def test_gap_fill():
+    message = wire.gap_fill(_message(), 3, 9)
+    assert wire.get(message, 35) == b"4"
+    assert wire.get(message, 34) == b"3"
+    assert wire.get(message, 36) == b"9"
+    assert wire.get(message, 123) == b"Y"
+    assert wire.get(message, 49) == b"client"
+    assert _valid(message)
+
+
+def test_sending_time():
+    now = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+    assert wire.sending_time(now) == b"20260102-03:04:05.678"